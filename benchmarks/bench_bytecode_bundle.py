@@ -0,0 +1,116 @@
+"""
+Benchmark: cold start on a slow filesystem, __pycache__ vs a precompiled bytecode bundle.
+
+"pycache" is a normal start with a warm ``__pycache__``: every module costs stat calls,
+a directory listing per directory, and opening the .pyc file. "bundle" starts with
+``init_comfy(bytecode_bundle=...)``: one read of the bundle, then no file system call
+for bundled modules. Both run init_comfy() and load_nodes() of a synthetic tree (every
+node module does a relative import of a helper module) in a fresh interpreter.
+
+The file system calls the import system makes (stat, lstat, listdir, scandir, opening
+source/bytecode files, open()) are counted, and ``--fs-latency-us`` adds a delay to each
+of them to stand in for an NFS mount, where every call is a network round trip.
+
+Usage:
+    python benchmarks/bench_bytecode_bundle.py --packages 10 --modules 100 --fs-latency-us 300
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from synthetic_tree import create_synthetic_comfy_root
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Counts (and optionally slows down) file system calls, including the ones importlib makes
+_FS_SHIM = """
+import os, posix, time, _io, builtins
+_fs_calls = [0]
+def _slow(function, latency={latency!r}):
+    def wrapper(*args, **kwargs):
+        _fs_calls[0] += 1
+        if latency:
+            end = time.perf_counter() + latency
+            while time.perf_counter() < end:
+                pass
+        return function(*args, **kwargs)
+    return wrapper
+for _module in (os, posix):
+    for _name in ("stat", "lstat", "listdir", "scandir"):
+        setattr(_module, _name, _slow(getattr(_module, _name)))
+_io.open_code = _slow(_io.open_code)
+builtins.open = _slow(builtins.open)
+"""
+
+_RUN = _FS_SHIM + """
+import sys, json, time
+sys.path.insert(0, {repo_root!r})
+calls_before = _fs_calls[0]
+start = time.perf_counter()
+from qabbit_wrapper import init_comfy
+init_comfy({comfy_root!r}, bytecode_bundle={bundle!r})
+from qabbit_wrapper.custom_nodes import load_nodes
+nodes = load_nodes({config_path!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "classes": len(nodes), "fs_calls": _fs_calls[0] - calls_before}}))
+"""
+
+_PRECOMPILE = """
+import sys, json
+sys.path.insert(0, {repo_root!r})
+from qabbit_wrapper import init_comfy
+init_comfy({comfy_root!r})
+from qabbit_wrapper.bytecode_bundle import precompile
+print(json.dumps(precompile({packages!r}, {bundle!r})))
+"""
+
+
+def run(template: str, **kwargs) -> dict:
+    code = template.format(repo_root=REPO_ROOT, **kwargs)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packages", type=int, default=10)
+    parser.add_argument("--modules", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fs-latency-us", type=float, default=300.0,
+                        help="delay added to each file system call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        comfy_root = os.path.join(tmp, "ComfyUI")
+        config = create_synthetic_comfy_root(
+            comfy_root, args.packages, args.modules, classes_per_module=1, relative_imports=True
+        )
+        config_path = os.path.join(tmp, "nodes_config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+        bundle = os.path.join(tmp, "bundle.zip")
+
+        params = dict(comfy_root=comfy_root, config_path=config_path, latency=args.fs_latency_us / 1e6)
+        run(_RUN, bundle=None, **params)  # fill __pycache__
+        built = run(_PRECOMPILE, comfy_root=comfy_root, packages=sorted(config), bundle=bundle)
+        print(f"bundle: {built['modules']} modules, {built['bytes'] / 1024:.0f} KB")
+
+        results = {}
+        for label, bundle_path in (("pycache", None), ("bundle", bundle)):
+            runs = [run(_RUN, bundle=bundle_path, **params) for _ in range(args.repeat)]
+            results[label] = min(runs, key=lambda r: r["seconds"])
+
+    for label, result in results.items():
+        print(f"{label:>8}: {result['seconds'] * 1000:8.1f} ms  ({result['fs_calls']} file system calls, "
+              f"{result['classes']} classes)")
+    print(f"speedup: {results['pycache']['seconds'] / results['bundle']['seconds']:.2f}x "
+          f"(best of {args.repeat}, {args.fs_latency_us:g} us per file system call)")
+
+
+if __name__ == "__main__":
+    main()
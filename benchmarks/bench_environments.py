@@ -0,0 +1,98 @@
+"""
+Benchmark: RSS of serving two custom node trees, two processes vs two environments.
+
+Two synthetic ComfyUI trees with the same custom node packages stand in for two versions
+of a deployment (A/B testing). Every node module imports a heavy shared dependency
+(``--heavy-mb`` of resident memory, standing in for torch / transformers) that lives
+outside the trees. "processes" loads each tree in its own interpreter and adds up their
+RSS; "environments" loads both trees in one interpreter, the second one through a
+ComfyUI environment (see qabbit_wrapper.environment), so the dependency is imported once.
+
+Usage:
+    python benchmarks/bench_environments.py --heavy-mb 500
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from synthetic_tree import create_synthetic_comfy_root
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_HEAVY = """
+_weights = b"w" * ({mb!r} * 1024 * 1024)
+"""
+
+_SCRIPT = """
+import sys, json, time
+sys.path.insert(0, {shared!r})
+sys.path.insert(0, {repo_root!r})
+start = time.perf_counter()
+from qabbit_wrapper import init_comfy
+init_comfy({first_root!r})
+from qabbit_wrapper.custom_nodes import load_nodes
+from qabbit_wrapper.environment import create_environment
+loaded = [load_nodes({config_path!r})]
+for index, root in enumerate({other_roots!r}):
+    loaded.append(create_environment(f"tree{{index + 1}}", root).load_nodes({config_path!r}))
+elapsed = time.perf_counter() - start
+distinct = len({{id(nodes[name]) for nodes in loaded for name in nodes}})
+with open("/proc/self/status") as f:
+    rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:")) * 1024
+print(json.dumps({{"seconds": elapsed, "rss": rss, "classes": distinct}}))
+"""
+
+
+def _run(roots: list, shared: str, config_path: str) -> dict:
+    code = _SCRIPT.format(repo_root=REPO_ROOT, shared=shared, first_root=roots[0], other_roots=roots[1:], config_path=config_path)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packages", type=int, default=4)
+    parser.add_argument("--modules", type=int, default=20)
+    parser.add_argument("--heavy-mb", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = os.path.join(tmp, "site-packages")
+        os.makedirs(shared)
+        with open(os.path.join(shared, "heavy_dependency.py"), "w") as f:
+            f.write(_HEAVY.format(mb=args.heavy_mb))
+
+        roots = []
+        for name in ("ComfyUI-A", "ComfyUI-B"):
+            root = os.path.join(tmp, name)
+            config = create_synthetic_comfy_root(root, args.packages, args.modules, classes_per_module=1)
+            # Every node module uses the shared dependency
+            for package_name, modules in config.items():
+                for module_path in modules:
+                    path = os.path.join(root, "custom_nodes", package_name, *module_path.split("/")) + ".py"
+                    with open(path) as f:
+                        source = f.read()
+                    with open(path, "w") as f:
+                        f.write("import heavy_dependency\n" + source)
+            roots.append(root)
+        config_path = os.path.join(tmp, "nodes_config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+
+        separate = [_run([root], shared, config_path) for root in roots]
+        together = _run(roots, shared, config_path)
+
+    mb = 1024 ** 2
+    print(f"{'mode':>12} {'RSS MB':>8} {'seconds':>8} {'classes':>8}")
+    print(f"{'processes':>12} {sum(r['rss'] for r in separate) / mb:8.1f} "
+          f"{sum(r['seconds'] for r in separate):8.3f} {sum(r['classes'] for r in separate):8d}")
+    print(f"{'environments':>12} {together['rss'] / mb:8.1f} {together['seconds']:8.3f} {together['classes']:8d}")
+
+
+if __name__ == "__main__":
+    main()
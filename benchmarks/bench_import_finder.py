@@ -0,0 +1,154 @@
+"""
+Benchmark: custom node import latency with the meta path finder vs the previous loader.
+
+"before" reproduces the loader as it was before CustomNodeFinder: one
+spec_from_file_location per module, os.path.exists probes for <module>.py and
+<module>/__init__.py, and relative imports inside the modules resolved by the default
+path finders. "after" uses the wrapper's load_nodes(). Every node module does a relative
+import of a helper module, so a tree with P packages x M modules has 2*P*M modules.
+
+Each measurement runs in a fresh interpreter; one untimed run first fills __pycache__.
+Filesystem metadata calls (stat, listdir, scandir) are counted, and ``--fs-latency-us``
+adds a delay to each of them to stand in for a network filesystem, where those round
+trips dominate import time.
+
+Usage:
+    python benchmarks/bench_import_finder.py --packages 10 --modules 150
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from synthetic_tree import create_synthetic_comfy_root
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Counts (and optionally slows down) metadata calls, including the ones importlib makes
+_FS_SHIM = """
+import os, posix, time
+_fs_calls = [0]
+def _slow(function, latency={latency!r}):
+    def wrapper(*args, **kwargs):
+        _fs_calls[0] += 1
+        if latency:
+            end = time.perf_counter() + latency
+            while time.perf_counter() < end:
+                pass
+        return function(*args, **kwargs)
+    return wrapper
+for _module in (os, posix):
+    for _name in ("stat", "lstat", "listdir", "scandir"):
+        setattr(_module, _name, _slow(getattr(_module, _name)))
+"""
+
+_BEFORE = _FS_SHIM + """
+import sys, os, json, time, importlib.util
+config = json.load(open({config_path!r}))
+custom_nodes = os.path.join({comfy_root!r}, "custom_nodes")
+
+def ensure_parents(full_name, package_path):
+    parts = full_name.split(".")
+    for i in range(1, len(parts)):
+        name = ".".join(parts[:i])
+        if name not in sys.modules:
+            module = type(sys)(name)
+            path = os.path.join(package_path, *parts[1:i])
+            module.__path__ = [path]
+            if os.path.exists(os.path.join(path, "__init__.py")):
+                module.__file__ = os.path.join(path, "__init__.py")
+            sys.modules[name] = module
+
+def import_class(package_name, module_path, class_name):
+    package_path = os.path.join(custom_nodes, package_name)
+    parts = module_path.split("/")
+    full_name = package_name.replace("-", "_") + "." + ".".join(parts)
+    ensure_parents(full_name, package_path)
+    if full_name not in sys.modules:
+        module_file = os.path.join(package_path, *parts) + ".py"
+        if not os.path.exists(module_file):
+            module_file = os.path.join(package_path, *parts, "__init__.py")
+            if not os.path.exists(module_file):
+                raise FileNotFoundError(module_file)
+        spec = importlib.util.spec_from_file_location(full_name, module_file)
+        module = importlib.util.module_from_spec(spec)
+        module.__package__ = full_name.rpartition(".")[0]
+        sys.modules[full_name] = module
+        spec.loader.exec_module(module)
+    return getattr(sys.modules[full_name], class_name)
+
+calls_before = _fs_calls[0]
+start = time.perf_counter()
+count = 0
+for package_name, modules in config.items():
+    for module_path, class_names in modules.items():
+        for class_name in class_names:
+            import_class(package_name, module_path, class_name)
+            count += 1
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "classes": count, "fs_calls": _fs_calls[0] - calls_before}}))
+"""
+
+_AFTER = _FS_SHIM + """
+import sys, json, time
+sys.path.insert(0, {repo_root!r})
+from qabbit_wrapper import init_comfy
+from qabbit_wrapper.custom_nodes import load_nodes
+init_comfy({comfy_root!r})
+config = json.load(open({config_path!r}))
+calls_before = _fs_calls[0]
+start = time.perf_counter()
+nodes = load_nodes(config)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "classes": len(nodes), "fs_calls": _fs_calls[0] - calls_before}}))
+"""
+
+
+def run(template: str, **kwargs) -> dict:
+    code = template.format(repo_root=REPO_ROOT, **kwargs)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packages", type=int, default=10)
+    parser.add_argument("--modules", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fs-latency-us", type=float, default=0.0,
+                        help="delay added to each stat/listdir/scandir call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        comfy_root = os.path.join(tmp, "ComfyUI")
+        config = create_synthetic_comfy_root(
+            comfy_root, args.packages, args.modules, classes_per_module=1, relative_imports=True
+        )
+        config_path = os.path.join(tmp, "nodes_config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+
+        params = dict(comfy_root=comfy_root, config_path=config_path,
+                      latency=args.fs_latency_us / 1e6)
+        run(_AFTER, **params)  # fill __pycache__
+
+        results = {}
+        for label, template in (("before", _BEFORE), ("after", _AFTER)):
+            runs = [run(template, **params) for _ in range(args.repeat)]
+            results[label] = min(runs, key=lambda r: r["seconds"])
+
+    modules = 2 * args.packages * args.modules
+    for label, result in results.items():
+        seconds = result["seconds"]
+        print(f"{label:>7}: {seconds * 1000:8.1f} ms  ({seconds / modules * 1e6:6.1f} us/module, "
+              f"{result['fs_calls']} metadata calls)")
+    print(f"speedup: {results['before']['seconds'] / results['after']['seconds']:.2f}x over "
+          f"{modules} modules (best of {args.repeat}, {args.fs_latency_us:g} us per metadata call)")
+
+
+if __name__ == "__main__":
+    main()
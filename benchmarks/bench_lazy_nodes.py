@@ -0,0 +1,129 @@
+"""
+Benchmark: import time and RSS of scripts using a few core nodes, eager vs lazy nodes module.
+
+"eager" is what qabbit_wrapper.nodes did before: ``from nodes import *`` as soon as it is
+imported. "lazy" is the current module, which imports the module defining a class when
+the class is first accessed. The synthetic ComfyUI root has a nodes.py that imports a
+heavy stand-in for torch / comfy.sd (``--heavy-mb`` of resident memory and
+``--heavy-seconds`` of import time) and ``--extras`` comfy_extras/nodes_*.py modules
+that do not import it.
+
+Scripts measured, each in a fresh interpreter:
+
+    import_only   import qabbit_wrapper.nodes, use nothing
+    core_node     use LoadImage (defined in nodes.py)
+    extras_node   use one comfy_extras node
+
+Usage:
+    python benchmarks/bench_lazy_nodes.py --heavy-mb 300 --heavy-seconds 0.5
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+from synthetic_tree import create_synthetic_comfy_root
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_HEAVY = """
+import time
+time.sleep({seconds!r})
+_weights = b"w" * ({mb!r} * 1024 * 1024)
+"""
+
+_EXTRAS = """
+class ExtrasNode{index}:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {{"required": {{"value": ("INT", {{"default": 0}})}}}}
+    RETURN_TYPES = ("INT",)
+    FUNCTION = "run"
+    CATEGORY = "extras"
+
+    def run(self, value):
+        return (value + {index},)
+
+NODE_CLASS_MAPPINGS = {{"ExtrasNode{index}": ExtrasNode{index}}}
+"""
+
+_SCRIPT = """
+import sys, json, time, importlib
+sys.path.insert(0, {repo_root!r})
+start = time.perf_counter()
+from qabbit_wrapper import init_comfy
+init_comfy({comfy_root!r})
+if {eager!r}:
+    from nodes import *          # the previous qabbit_wrapper.nodes
+else:
+    from qabbit_wrapper import nodes
+for module_name, name in {names!r}:
+    if {eager!r}:
+        # comfy_extras nodes had to be imported from their module
+        getattr(importlib.import_module(module_name), name)
+    else:
+        getattr(nodes, name)
+elapsed = time.perf_counter() - start
+with open("/proc/self/status") as f:
+    rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:")) * 1024
+print(json.dumps({{"seconds": elapsed, "rss": rss}}))
+"""
+
+
+def _make_root(root: str, args) -> None:
+    create_synthetic_comfy_root(root, packages=0)
+    with open(os.path.join(root, "heavy_dependency.py"), "w") as f:
+        f.write(_HEAVY.format(seconds=args.heavy_seconds, mb=args.heavy_mb))
+    with open(os.path.join(root, "nodes.py")) as f:
+        nodes_source = f.read()
+    with open(os.path.join(root, "nodes.py"), "w") as f:
+        f.write("import heavy_dependency\n" + nodes_source)
+    extras = os.path.join(root, "comfy_extras")
+    os.makedirs(extras, exist_ok=True)
+    open(os.path.join(extras, "__init__.py"), "w").close()
+    for index in range(args.extras):
+        with open(os.path.join(extras, f"nodes_synthetic_{index}.py"), "w") as f:
+            f.write(_EXTRAS.format(index=index))
+
+
+def _run(comfy_root: str, eager: bool, names: list) -> dict:
+    code = _SCRIPT.format(repo_root=REPO_ROOT, comfy_root=comfy_root, eager=eager, names=names)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--heavy-mb", type=int, default=300)
+    parser.add_argument("--heavy-seconds", type=float, default=0.5)
+    parser.add_argument("--extras", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    scripts = {
+        "import_only": [],
+        "core_node": [("nodes", "LoadImage")],
+        "extras_node": [("comfy_extras.nodes_synthetic_0", "ExtrasNode0")],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        comfy_root = os.path.join(tmp, "ComfyUI")
+        _make_root(comfy_root, args)
+        # Untimed run to fill __pycache__
+        _run(comfy_root, False, scripts["core_node"] + scripts["extras_node"])
+
+        print(f"{'script':>12} {'mode':>6} {'seconds':>9} {'RSS MB':>8}")
+        for script, names in scripts.items():
+            for eager in (True, False):
+                runs = [_run(comfy_root, eager, names) for _ in range(args.repeat)]
+                seconds = statistics.median(r["seconds"] for r in runs)
+                rss = statistics.median(r["rss"] for r in runs) / 1024 ** 2
+                print(f"{script:>12} {'eager' if eager else 'lazy':>6} {seconds:9.3f} {rss:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
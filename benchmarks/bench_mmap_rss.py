@@ -0,0 +1,118 @@
+"""
+Benchmark: host memory of N processes loading the same checkpoint, copied vs mmap.
+
+Writes a synthetic .safetensors checkpoint, then starts N processes that each load it to
+the CPU and read every tensor. "copy" uses safetensors.torch.load_file (a private copy
+per process, as ComfyUI does by default); "mmap" uses the wrapper's
+load_safetensors_mmap(). Once all N processes hold their weights, each one reports RSS,
+PSS (its proportional share of shared pages) and USS (private pages) from
+/proc/self/smaps_rollup. The total PSS is what the host actually spends.
+
+Requires Linux and torch (and safetensors for the "copy" mode).
+
+Usage:
+    python benchmarks/bench_mmap_rss.py --processes 4 --size-mb 512
+"""
+
+import os
+import sys
+import json
+import struct
+import argparse
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import sys, json
+sys.path.insert(0, {repo_root!r})
+import torch
+
+def memory():
+    fields = {{}}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {{"rss": fields["Rss"], "pss": fields["Pss"],
+            "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}}
+
+baseline = memory()
+if {mode!r} == "mmap":
+    from qabbit_wrapper.mmap_loading import load_safetensors_mmap
+    state_dict = load_safetensors_mmap({path!r})
+else:
+    from safetensors.torch import load_file
+    state_dict = load_file({path!r}, device="cpu")
+checksum = sum(float(t.float().sum()) for t in state_dict.values())   # touch every page
+print("ready", flush=True)
+sys.stdin.readline()                                                   # wait for all N processes
+loaded = memory()
+print(json.dumps({{key: loaded[key] - baseline[key] for key in loaded}}), flush=True)
+"""
+
+
+def write_checkpoint(path: str, size_mb: int, tensors: int = 32) -> None:
+    """Write a float16 safetensors file of about size_mb MiB, without torch."""
+    elements = size_mb * 1024 * 1024 // 2 // tensors
+    header, offset = {}, 0
+    for i in range(tensors):
+        header[f"layer.{i}.weight"] = {"dtype": "F16", "shape": [elements],
+                                        "data_offsets": [offset, offset + elements * 2]}
+        offset += elements * 2
+    header_bytes = json.dumps(header).encode()
+    header_bytes += b" " * (-len(header_bytes) % 8)
+    chunk = struct.pack("<e", 0.5) * (1024 * 1024)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        remaining = offset
+        while remaining:
+            f.write(chunk[:remaining])
+            remaining -= min(remaining, len(chunk))
+
+
+def run(mode: str, path: str, processes: int) -> list:
+    code = _CHILD.format(repo_root=REPO_ROOT, mode=mode, path=path)
+    children = [
+        subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE,
+                         stdout=subprocess.PIPE, text=True)
+        for _ in range(processes)
+    ]
+    for child in children:
+        if child.stdout.readline().strip() != "ready":
+            raise RuntimeError(f"{mode} process failed")
+    results = []
+    for child in children:
+        child.stdin.write("\n")
+        child.stdin.flush()
+        results.append(json.loads(child.stdout.readline()))
+    for child in children:
+        child.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--size-mb", type=int, default=512)
+    args = parser.parse_args()
+
+    mib = 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoint.safetensors")
+        write_checkpoint(path, args.size_mb)
+
+        print(f"{args.processes} processes, {args.size_mb} MiB checkpoint "
+              f"(memory added by loading, summed over processes)")
+        for mode in ("copy", "mmap"):
+            results = run(mode, path, args.processes)
+            total = {key: sum(r[key] for r in results) / mib for key in ("rss", "pss", "uss")}
+            print(f"{mode:>5}: RSS {total['rss']:8.0f} MiB   PSS {total['pss']:8.0f} MiB   "
+                  f"USS {total['uss']:8.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
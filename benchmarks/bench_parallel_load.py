@@ -0,0 +1,76 @@
+"""
+Benchmark: sequential vs threaded load_nodes() on a synthetic custom_nodes tree.
+
+Each measurement runs in a fresh interpreter so no module is already cached.
+
+Usage:
+    python benchmarks/bench_parallel_load.py --packages 4 --modules 6 --delay 0.02 --workers 4
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from synthetic_tree import create_synthetic_comfy_root
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import sys, json, time
+sys.path.insert(0, {repo_root!r})
+from qabbit_wrapper import init_comfy
+from qabbit_wrapper.custom_nodes import load_nodes
+init_comfy({comfy_root!r})
+config = json.load(open({config_path!r}))
+start = time.perf_counter()
+nodes = load_nodes(config, workers={workers!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "classes": len(nodes)}}))
+"""
+
+
+def run_once(comfy_root: str, config_path: str, workers) -> dict:
+    code = _CHILD.format(
+        repo_root=REPO_ROOT, comfy_root=comfy_root, config_path=config_path, workers=workers
+    )
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packages", type=int, default=4)
+    parser.add_argument("--modules", type=int, default=6)
+    parser.add_argument("--classes", type=int, default=2)
+    parser.add_argument("--delay", type=float, default=0.02,
+                        help="seconds each module sleeps (stands in for I/O / GIL-free work)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        comfy_root = os.path.join(tmp, "ComfyUI")
+        config = create_synthetic_comfy_root(
+            comfy_root, args.packages, args.modules, args.classes, args.delay
+        )
+        config_path = os.path.join(tmp, "nodes_config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+
+        results = {}
+        for label, workers in (("sequential", None), (f"workers={args.workers}", args.workers)):
+            times = [run_once(comfy_root, config_path, workers)["seconds"] for _ in range(args.repeat)]
+            results[label] = min(times)
+            print(f"{label:>14}: best of {args.repeat} = {results[label] * 1000:.1f} ms")
+
+        speedup = results["sequential"] / results[f"workers={args.workers}"]
+        print(f"{'speedup':>14}: {speedup:.2f}x "
+              f"({args.packages} packages x {args.modules} modules, {args.delay * 1000:.0f} ms/module)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: cold vs warm job latency for WarmWorkerPool on a synthetic ComfyUI tree.
+
+"cold" starts a fresh interpreter per job that runs init_comfy(), load_nodes() and one node
+call, which is what a one-process-per-job pipeline pays. "warm" submits the same call to a
+WarmWorkerPool whose workers are forked from a pre-initialized template.
+
+Usage:
+    python benchmarks/bench_worker_pool.py --jobs 20 --processes 2 --delay 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+from synthetic_tree import create_synthetic_comfy_root
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+_COLD_JOB = """
+import sys, json
+sys.path.insert(0, {repo_root!r})
+from qabbit_wrapper import init_comfy
+from qabbit_wrapper.custom_nodes import load_nodes
+init_comfy({comfy_root!r})
+nodes = load_nodes(json.load(open({config_path!r})))
+node_class = nodes[{class_name!r}]
+print(getattr(node_class(), node_class.FUNCTION)(value=1))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--packages", type=int, default=2)
+    parser.add_argument("--modules", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds each module sleeps on import")
+    parser.add_argument("--max-jobs-per-worker", type=int, default=None)
+    args = parser.parse_args()
+
+    from qabbit_wrapper.worker_pool import WarmWorkerPool
+
+    with tempfile.TemporaryDirectory() as tmp:
+        comfy_root = os.path.join(tmp, "ComfyUI")
+        config = create_synthetic_comfy_root(comfy_root, args.packages, args.modules, 2, args.delay)
+        config_path = os.path.join(tmp, "nodes_config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+        class_name = "Synth0Node0_0"
+
+        cold = []
+        code = _COLD_JOB.format(repo_root=REPO_ROOT, comfy_root=comfy_root,
+                                config_path=config_path, class_name=class_name)
+        for _ in range(min(args.jobs, 5)):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+            cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with WarmWorkerPool(comfy_root, config, processes=args.processes,
+                            max_jobs_per_worker=args.max_jobs_per_worker) as pool:
+            startup = time.perf_counter() - start
+            warm = []
+            for _ in range(args.jobs):
+                start = time.perf_counter()
+                pool.submit(class_name, {"value": 1}).result()
+                warm.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            pool.map(class_name, [{"value": i} for i in range(args.jobs)])
+            throughput = args.jobs / (time.perf_counter() - start)
+
+    cold.sort()
+    warm.sort()
+    print(f"cold job (new process):   median {cold[len(cold) // 2] * 1000:8.1f} ms")
+    print(f"warm pool startup:                {startup * 1000:8.1f} ms (paid once)")
+    print(f"warm job (forked worker): median {warm[len(warm) // 2] * 1000:8.1f} ms")
+    print(f"warm map throughput:             {throughput:8.1f} jobs/s")
+
+
+if __name__ == "__main__":
+    main()
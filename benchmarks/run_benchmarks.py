@@ -0,0 +1,191 @@
+"""
+Benchmark harness: time the wrapper's public entry points on synthetic ComfyUI trees.
+
+For each scale (packages x modules per package), a synthetic ComfyUI root is generated
+(see synthetic_tree.py: hyphenated packages, nested sub-packages, relative imports) and
+each measurement runs in a fresh interpreter so imports are cold:
+
+    init_comfy                    init_comfy() on the stub root
+    list_available_custom_nodes   listing custom_nodes/
+    load_custom_node              creating the alias of every package
+    get_custom_node_cold          importing every class, in config order
+    get_custom_node_warm          the same lookups again (modules already loaded)
+    load_nodes                    load_nodes(config) in a new process
+    load_nodes_threaded           load_nodes(config, workers=4) in a new process
+
+Timings are the median over ``--repeat`` runs, in seconds, and are written as JSON with
+the commit, Python version and platform, so runs can be compared between commits:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    git checkout other-branch
+    python benchmarks/run_benchmarks.py --output after.json --compare before.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+from synthetic_tree import create_synthetic_comfy_root
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SCALES = ["2x10", "10x50", "20x200"]
+
+_API_RUN = """
+import sys, json, time
+sys.path.insert(0, {repo_root!r})
+config = json.load(open({config_path!r}))
+timings = {{}}
+
+start = time.perf_counter()
+from qabbit_wrapper import init_comfy
+init_comfy({comfy_root!r})
+timings["init_comfy"] = time.perf_counter() - start
+
+from qabbit_wrapper.custom_nodes_logic import load_custom_node, get_custom_node, list_available_custom_nodes
+
+start = time.perf_counter()
+list_available_custom_nodes()
+timings["list_available_custom_nodes"] = time.perf_counter() - start
+
+start = time.perf_counter()
+for package_name in config:
+    load_custom_node(package_name)
+timings["load_custom_node"] = time.perf_counter() - start
+
+entries = [(p, m, c) for p, modules in config.items() for m, classes in modules.items() for c in classes]
+for label in ("get_custom_node_cold", "get_custom_node_warm"):
+    start = time.perf_counter()
+    for package_name, module_path, class_name in entries:
+        get_custom_node(package_name, module_path, class_name)
+    timings[label] = time.perf_counter() - start
+
+print(json.dumps(timings))
+"""
+
+_LOAD_NODES_RUN = """
+import sys, json, time
+sys.path.insert(0, {repo_root!r})
+from qabbit_wrapper import init_comfy
+from qabbit_wrapper.custom_nodes import load_nodes
+init_comfy({comfy_root!r})
+start = time.perf_counter()
+load_nodes({config_path!r}, workers={workers!r})
+print(json.dumps({{{label!r}: time.perf_counter() - start}}))
+"""
+
+
+def _run(template: str, **kwargs) -> dict:
+    code = template.format(repo_root=REPO_ROOT, **kwargs)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_scale(packages: int, modules: int, args) -> dict:
+    """Measure every entry point on one synthetic tree; returns median timings."""
+    with tempfile.TemporaryDirectory() as tmp:
+        comfy_root = os.path.join(tmp, "ComfyUI")
+        config = create_synthetic_comfy_root(
+            comfy_root, packages, modules, args.classes,
+            relative_imports=True, depth=args.depth,
+        )
+        config_path = os.path.join(tmp, "nodes_config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+
+        paths = dict(comfy_root=comfy_root, config_path=config_path)
+        runs = [
+            (_API_RUN, {}),
+            (_LOAD_NODES_RUN, {"workers": None, "label": "load_nodes"}),
+            (_LOAD_NODES_RUN, {"workers": 4, "label": "load_nodes_threaded"}),
+        ]
+        # Untimed run to fill __pycache__
+        _run(_API_RUN, **paths)
+
+        samples: dict = {}
+        for _ in range(args.repeat):
+            for template, extra in runs:
+                for name, seconds in _run(template, **paths, **extra).items():
+                    samples.setdefault(name, []).append(seconds)
+
+    return {
+        "packages": packages,
+        "modules_per_package": modules,
+        "classes": packages * modules * args.classes,
+        "timings": {name: statistics.median(values) for name, values in samples.items()},
+    }
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Print current / baseline ratios per scale and entry point."""
+    previous = {(r["packages"], r["modules_per_package"]): r for r in baseline["results"]}
+    print(f"\ncompared with {baseline['meta'].get('commit')} (ratio > 1 means slower now)")
+    for result in current["results"]:
+        old = previous.get((result["packages"], result["modules_per_package"]))
+        if old is None:
+            continue
+        ratios = ", ".join(
+            f"{name} {seconds / old['timings'][name]:.2f}x"
+            for name, seconds in result["timings"].items()
+            if old["timings"].get(name)
+        )
+        print(f"  {result['packages']}x{result['modules_per_package']}: {ratios}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES,
+                        help="PACKAGESxMODULES per scale (default: %(default)s)")
+    parser.add_argument("--classes", type=int, default=2, help="classes per module")
+    parser.add_argument("--depth", type=int, default=2, help="package nesting of node modules")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "classes_per_module": args.classes,
+            "depth": args.depth,
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    for scale in args.scales:
+        packages, modules = (int(n) for n in scale.lower().split("x"))
+        result = run_scale(packages, modules, args)
+        results["results"].append(result)
+        timings = "  ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in result["timings"].items())
+        print(f"{scale:>8} ({result['classes']} classes): {timings}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
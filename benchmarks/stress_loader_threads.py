@@ -0,0 +1,154 @@
+"""
+Stress test: many threads resolving the same custom nodes at once.
+
+Every round runs in a fresh interpreter, so all modules are cold. ``--threads`` threads
+are released together by a barrier; each calls get_custom_node() for every class of a
+synthetic tree in its own shuffled order (the first call of each thread also races on
+creating the global loader), while ``--plain-importers`` threads create the package
+aliases and import the same modules with ordinary ``importlib.import_module``. Node
+modules sleep before defining their classes, so a thread that gets a module before its execution finished fails to find the
+class or its NODE_CLASS_MAPPINGS.
+
+A round passes if no call fails, every thread got the same class object for each node,
+every module was executed exactly once and every module is complete.
+
+Usage:
+    python benchmarks/stress_loader_threads.py --threads 32 --rounds 20
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from synthetic_tree import create_synthetic_comfy_root
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_ROUND = """
+import sys, json, random, builtins, threading, importlib, traceback
+sys.path.insert(0, {repo_root!r})
+from qabbit_wrapper import init_comfy
+init_comfy({comfy_root!r})
+from qabbit_wrapper.custom_nodes_logic import get_custom_node, load_custom_node
+
+config = json.load(open({config_path!r}))
+entries = [(p, m, c) for p, modules in config.items() for m, classes in modules.items() for c in classes]
+module_names = sorted({{(p, p.replace("-", "_") + "." + m.replace("/", ".")) for p, m, c in entries}})
+
+# Count executions of each node module
+executions = {{}}
+builtins._qabbit_stress_executed = lambda name: executions.__setitem__(name, executions.get(name, 0) + 1)
+
+barrier = threading.Barrier({threads} + {plain})
+results = [None] * {threads}
+errors = []
+
+def resolve(index):
+    order = list(entries)
+    random.Random(index).shuffle(order)
+    barrier.wait()
+    try:
+        found = {{}}
+        for package_name, module_path, class_name in order:
+            node_class = get_custom_node(package_name, module_path, class_name)
+            module = sys.modules[node_class.__module__]
+            if "NODE_CLASS_MAPPINGS" not in vars(module):
+                raise RuntimeError(f"got half-built module {{module.__name__}}")
+            found[class_name] = id(node_class)
+        results[index] = found
+    except Exception:
+        errors.append(traceback.format_exc())
+
+def plain_import(index):
+    order = list(module_names)
+    random.Random(-index).shuffle(order)
+    barrier.wait()
+    try:
+        for package_name, name in order:
+            # Races with the other threads on creating the package alias
+            load_custom_node(package_name)
+            module = importlib.import_module(name)
+            if "NODE_CLASS_MAPPINGS" not in vars(module):
+                raise RuntimeError(f"import_module returned half-built module {{name}}")
+    except Exception:
+        errors.append(traceback.format_exc())
+
+threads = [threading.Thread(target=resolve, args=(i,)) for i in range({threads})]
+threads += [threading.Thread(target=plain_import, args=(i,)) for i in range({plain})]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+
+if not errors:
+    first = results[0]
+    if any(r != first for r in results):
+        errors.append("threads got different class objects for the same node")
+    twice = sorted(name for name, count in executions.items() if count != 1)
+    if twice:
+        errors.append(f"modules executed more than once: {{twice[:5]}}")
+print(json.dumps({{"errors": errors[:3], "error_count": len(errors), "modules": len(executions)}}))
+"""
+
+_COUNTER = "import builtins\nbuiltins._qabbit_stress_executed(__name__)\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packages", type=int, default=4)
+    parser.add_argument("--modules", type=int, default=8)
+    parser.add_argument("--classes", type=int, default=2)
+    parser.add_argument("--delay", type=float, default=0.002,
+                        help="seconds each module sleeps before defining its classes")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--plain-importers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        comfy_root = os.path.join(tmp, "ComfyUI")
+        config = create_synthetic_comfy_root(
+            comfy_root, args.packages, args.modules, args.classes, args.delay,
+            relative_imports=True, depth=2,
+        )
+        # Prepend the execution counter to every node module
+        for package_name, modules in config.items():
+            for module_path in modules:
+                path = os.path.join(comfy_root, "custom_nodes", package_name, *module_path.split("/")) + ".py"
+                with open(path) as f:
+                    source = f.read()
+                with open(path, "w") as f:
+                    f.write(_COUNTER + source)
+        config_path = os.path.join(tmp, "nodes_config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+
+        code = _ROUND.format(
+            repo_root=REPO_ROOT, comfy_root=comfy_root, config_path=config_path,
+            threads=args.threads, plain=args.plain_importers,
+        )
+        for round_index in range(args.rounds):
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+            try:
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                result = {"error_count": 1, "errors": [out.stderr[-2000:]], "modules": 0}
+            status = "ok" if result["error_count"] == 0 else "FAILED"
+            print(f"round {round_index + 1}/{args.rounds}: {status} "
+                  f"({result['modules']} modules, {args.threads} threads + {args.plain_importers} plain importers)")
+            if result["error_count"]:
+                failures += 1
+                for error in result["errors"]:
+                    print(error)
+
+    print(f"{args.rounds - failures}/{args.rounds} rounds passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Synthetic ComfyUI tree generator for benchmarks.
+
+Creates a fake ComfyUI root with stub ``folder_paths``, ``comfy.model_management``,
+``comfy.cli_args`` and ``nodes`` modules, plus a ``custom_nodes`` directory of hyphenated
+packages whose modules define node classes. Module bodies can sleep for a configurable
+time to stand in for the file I/O and GIL-releasing C extension work real node modules do.
+Modules can be nested in sub-packages and import helper modules relatively, as real
+custom node packages do.
+"""
+
+import os
+import textwrap
+from typing import Dict, List
+
+
+_STUB_FILES = {
+    "folder_paths.py": """
+        import os
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        models_dir = os.path.join(base_path, "models")
+    """,
+    "comfy/__init__.py": "",
+    "comfy/cli_args.py": """
+        class _Args:
+            cpu = False
+        args = _Args()
+    """,
+    "comfy/model_management.py": """
+        from comfy.cli_args import args
+
+        def get_torch_device():
+            return "cpu"
+    """,
+    "nodes.py": """
+        class LoadImage:
+            @classmethod
+            def INPUT_TYPES(cls):
+                return {"required": {"image": ("STRING", {})}}
+            RETURN_TYPES = ("IMAGE", "MASK")
+            FUNCTION = "load_image"
+            CATEGORY = "image"
+
+            def load_image(self, image):
+                return (image, None)
+
+        NODE_CLASS_MAPPINGS = {"LoadImage": LoadImage}
+    """,
+}
+
+
+def _write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(textwrap.dedent(content).lstrip())
+
+
+def _node_module_source(module_index: int, classes: List[str], import_delay: float,
+                        relative_imports: bool = False) -> str:
+    lines = ["import time", ""]
+    if relative_imports:
+        lines += [f"from ._helper_{module_index} import OFFSET", ""]
+    if import_delay:
+        lines += [f"time.sleep({import_delay!r})", ""]
+    for class_name in classes:
+        lines += [
+            f"class {class_name}:",
+            "    @classmethod",
+            "    def INPUT_TYPES(cls):",
+            '        return {"required": {"value": ("INT", {"default": 0})}}',
+            '    RETURN_TYPES = ("INT",)',
+            '    FUNCTION = "run"',
+            f'    CATEGORY = "synthetic/{module_index}"',
+            "",
+            "    def run(self, value):",
+            f"        return (value + {'OFFSET' if relative_imports else module_index},)",
+            "",
+        ]
+    lines.append("NODE_CLASS_MAPPINGS = {%s}" % ", ".join(f'"{c}": {c}' for c in classes))
+    return "\n".join(lines) + "\n"
+
+
+def create_synthetic_comfy_root(
+    root: str,
+    packages: int = 2,
+    modules_per_package: int = 4,
+    classes_per_module: int = 2,
+    import_delay: float = 0.0,
+    relative_imports: bool = False,
+    depth: int = 1,
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create a fake ComfyUI root with a synthetic custom_nodes tree.
+
+    Args:
+        root: Directory to create the tree in
+        packages: Number of custom node packages (named "ComfyUI-Synth<N>")
+        modules_per_package: Node modules per package, placed under "nodes/"
+        classes_per_module: Node classes defined in each module
+        import_delay: Seconds each node module sleeps while being executed
+        relative_imports: Give each node module a helper module it imports with
+                          ``from ._helper_<N> import OFFSET``
+        depth: Package nesting of the node modules. 1 puts them in "nodes/"; deeper
+               levels spread them over "nodes/group_<K>/..." sub-packages
+
+    Returns:
+        A load_nodes() config covering every generated class
+    """
+    for relpath, content in _STUB_FILES.items():
+        _write(os.path.join(root, relpath), content)
+
+    config: Dict[str, Dict[str, List[str]]] = {}
+    for p in range(packages):
+        package_name = f"ComfyUI-Synth{p}"
+        package_path = os.path.join(root, "custom_nodes", package_name)
+        _write(os.path.join(package_path, "__init__.py"), "")
+        modules: Dict[str, List[str]] = {}
+        for m in range(modules_per_package):
+            classes = [f"Synth{p}Node{m}_{c}" for c in range(classes_per_module)]
+            parts = ["nodes"] + [f"group_{(m >> level) % 2}" for level in range(depth - 1)]
+            directory = os.path.join(package_path, *parts)
+            for level in range(2, len(parts) + 1):
+                init_file = os.path.join(package_path, *parts[:level], "__init__.py")
+                if not os.path.exists(init_file):
+                    _write(init_file, "")
+            _write(
+                os.path.join(directory, f"module_{m}.py"),
+                _node_module_source(m, classes, import_delay, relative_imports),
+            )
+            if relative_imports:
+                _write(os.path.join(directory, f"_helper_{m}.py"), f"OFFSET = {m}\n")
+            modules["/".join(parts + [f"module_{m}"])] = classes
+        config[package_name] = modules
+    return config
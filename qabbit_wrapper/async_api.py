@@ -0,0 +1,284 @@
+"""
+Async API module - run node calls from asyncio services without blocking the event loop.
+
+Node methods are CPU/GPU bound and synchronous, so ``run_node()`` runs them on an
+executor (a thread pool by default; torch releases the GIL in its kernels) and returns
+an awaitable. A ProcessPoolExecutor (or another process-based executor) also works: the
+node class, method name and kwargs are pickled, so the node class has to be importable
+in the worker processes (e.g. workers forked after load_nodes(), or an initializer that
+calls init_comfy() and loads the same packages). Concurrency can be capped per node class, e.g. so only one
+``WanVideoModelLoader`` runs at a time while other nodes keep running.
+
+Cancellation: a call still waiting for its class's slot or for an executor thread is
+cancelled outright. A call that is already running is asked to stop; it raises
+``NodeCancelled`` at its next ``comfy.utils.ProgressBar`` update (e.g. the next sampler
+step). The awaiting task is cancelled immediately either way, and the class's slot is
+released only once the node has actually stopped. With a process-based executor only
+calls that have not started yet can be cancelled; a running call finishes in its worker.
+
+Usage:
+    from qabbit_wrapper.async_api import get_async_runner, run_node
+
+    get_async_runner().set_limit("WanVideoModelLoader", 1)
+
+    async def handler(request):
+        (model,) = await run_node(WanVideoModelLoader, {"model": "...", "base_precision": "bf16"})
+        task = get_async_runner().submit(ImageResizeKJv2, {...})   # asyncio.Task
+        ...
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional, Dict, Any, Union
+
+from .events import chain_progress_hook
+
+
+class NodeCancelled(Exception):
+    """Raised inside a running node call when its task has been cancelled."""
+
+
+class _Call:
+    """State of one node call, visible to the thread running it."""
+
+    __slots__ = ("node_class", "node_id", "cancelled")
+
+    def __init__(self, node_class: type, node_id: Optional[str]):
+        self.node_class = node_class
+        self.node_id = node_id
+        self.cancelled = threading.Event()
+
+
+_current = threading.local()
+
+
+def current_call_cancelled() -> bool:
+    """Return True if the node call running on this thread has been cancelled."""
+    call = getattr(_current, "call", None)
+    return call is not None and call.cancelled.is_set()
+
+
+def check_cancelled() -> None:
+    """Raise NodeCancelled if the node call running on this thread has been cancelled."""
+    call = getattr(_current, "call", None)
+    if call is not None and call.cancelled.is_set():
+        raise NodeCancelled(f"{call.node_class.__name__} call cancelled")
+
+
+_hook_installed = False
+_hook_lock = threading.Lock()
+
+
+def _install_cancel_hook() -> None:
+    """Check for cancellation on every comfy.utils.ProgressBar update."""
+    global _hook_installed
+    with _hook_lock:
+        if not _hook_installed:
+            _hook_installed = chain_progress_hook(
+                lambda value, total, preview_image, prompt_id=None, node_id=None: check_cancelled()
+            )
+
+
+def _call_node(node_class: type, method: str, kwargs: Dict[str, Any]):
+    """Run a node call in a process-based executor (module level, so it can be pickled)."""
+    return getattr(node_class(), method)(**kwargs)
+
+
+def _class_name(node_class: Union[type, str]) -> str:
+    return node_class if isinstance(node_class, str) else node_class.__name__
+
+
+class AsyncNodeRunner:
+    """Runs node calls on an executor with per-class concurrency limits."""
+
+    def __init__(self, executor: Optional[Executor] = None, max_workers: Optional[int] = None,
+                 limits: Optional[Dict[Union[type, str], int]] = None, default_limit: Optional[int] = None):
+        """
+        Initialize an async node runner.
+
+        Args:
+            executor: Executor running the node calls. If None, a ThreadPoolExecutor
+                      with ``max_workers`` threads is created (and owned by the runner).
+                      Executors other than a ThreadPoolExecutor are treated as
+                      process-based: arguments are pickled and running calls cannot
+                      be interrupted.
+            max_workers: Size of the default thread pool
+            limits: Maximum concurrent calls per node class (class or class name)
+            default_limit: Maximum concurrent calls for classes without a limit.
+                           None means unlimited (bounded only by the executor).
+        """
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="qabbit-node")
+        # Thread executors run calls in this process (cancellation, running() per call)
+        self._in_process = isinstance(self.executor, ThreadPoolExecutor)
+        self.default_limit = default_limit
+        self._limits: Dict[str, int] = {}
+        # Event loop -> class name -> semaphore; an asyncio.Semaphore belongs to one loop
+        self._semaphores: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]] = {}
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = {}
+        for node_class, limit in (limits or {}).items():
+            self.set_limit(node_class, limit)
+
+    def set_limit(self, node_class: Union[type, str], limit: Optional[int]) -> None:
+        """
+        Cap the number of concurrent calls of a node class.
+
+        Args:
+            node_class: Node class or class name (e.g. "WanVideoModelLoader")
+            limit: Maximum concurrent calls, or None for no cap. Applies to calls
+                   started after this point.
+        """
+        name = _class_name(node_class)
+        with self._lock:
+            if limit is None:
+                self._limits.pop(name, None)
+            else:
+                self._limits[name] = limit
+            for semaphores in self._semaphores.values():
+                semaphores.pop(name, None)
+
+    def _semaphore_for(self, name: str) -> Optional[asyncio.Semaphore]:
+        with self._lock:
+            limit = self._limits.get(name, self.default_limit)
+            if limit is None:
+                return None
+            loop = asyncio.get_running_loop()
+            if loop not in self._semaphores:
+                # Forget the loops that were closed (e.g. by earlier asyncio.run() calls)
+                for other in [other for other in self._semaphores if other.is_closed()]:
+                    del self._semaphores[other]
+            semaphores = self._semaphores.setdefault(loop, {})
+            semaphore = semaphores.get(name)
+            if semaphore is None:
+                semaphore = semaphores[name] = asyncio.Semaphore(limit)
+            return semaphore
+
+    def _invoke(self, call: _Call, method: str, kwargs: Dict[str, Any]):
+        """Run a node call on an executor thread."""
+        from .core import get_comfy_root
+
+        if call.cancelled.is_set():
+            raise NodeCancelled(f"{call.node_class.__name__} call cancelled before it started")
+        name = call.node_class.__name__
+        with self._lock:
+            self._running[name] = self._running.get(name, 0) + 1
+        server = None
+        if get_comfy_root() is not None:
+            import server as server_module
+            server = server_module.PromptServer.instance
+            server.last_node_id = call.node_id
+        _current.call = call
+        try:
+            return getattr(call.node_class(), method)(**kwargs)
+        finally:
+            _current.call = None
+            if server is not None:
+                server.last_node_id = None
+            with self._lock:
+                self._running[name] -= 1
+
+    async def run(self, node_class: type, kwargs: Optional[Dict[str, Any]] = None,
+                  method: Optional[str] = None, node_id: Optional[str] = None):
+        """
+        Call a node method on the executor and wait for its result.
+
+        Args:
+            node_class: Node class (e.g. from get_custom_node())
+            kwargs: Keyword arguments of the method
+            method: Method to call. Defaults to the class's FUNCTION.
+            node_id: Reported as PromptServer.instance.last_node_id during the call
+
+        Returns:
+            The method's return value
+        """
+        _install_cancel_hook()
+        loop = asyncio.get_running_loop()
+        call = _Call(node_class, node_id)
+        method = method or node_class.FUNCTION
+
+        semaphore = self._semaphore_for(node_class.__name__)
+        if semaphore is not None:
+            await semaphore.acquire()
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+        try:
+            if self._in_process:
+                future = self.executor.submit(self._invoke, call, method, kwargs or {})
+            else:
+                future = self.executor.submit(_call_node, node_class, method, kwargs or {})
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+        if semaphore is not None:
+            # Keep the slot until the call has really finished, even if the task is cancelled
+            future.add_done_callback(release)
+        if not self._in_process:
+            # Counted from submission: the worker process cannot report when it starts
+            self._track_remote(node_class.__name__, future)
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            call.cancelled.set()
+            future.cancel()
+            raise
+
+    def _track_remote(self, name: str, future) -> None:
+        with self._lock:
+            self._running[name] = self._running.get(name, 0) + 1
+
+        def done(_):
+            with self._lock:
+                self._running[name] -= 1
+
+        future.add_done_callback(done)
+
+    def submit(self, node_class: type, kwargs: Optional[Dict[str, Any]] = None,
+               method: Optional[str] = None, node_id: Optional[str] = None) -> "asyncio.Task":
+        """Schedule a node call as a task of the running event loop (see run())."""
+        return asyncio.ensure_future(self.run(node_class, kwargs, method, node_id))
+
+    def running(self) -> Dict[str, int]:
+        """
+        Return the number of calls currently executing, per node class name.
+
+        With a process-based executor, calls are counted from submission until they finish.
+        """
+        with self._lock:
+            return {name: count for name, count in self._running.items() if count}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the executor if the runner created it."""
+        if self._owns_executor:
+            self.executor.shutdown(wait=wait)
+
+
+# Global runner instance
+_runner: Optional[AsyncNodeRunner] = None
+
+
+def get_async_runner() -> AsyncNodeRunner:
+    """Get or create the global async node runner."""
+    global _runner
+    if _runner is None:
+        _runner = AsyncNodeRunner()
+    return _runner
+
+
+async def run_node(node_class: type, kwargs: Optional[Dict[str, Any]] = None,
+                   method: Optional[str] = None, node_id: Optional[str] = None):
+    """
+    Call a node method without blocking the event loop, using the global runner.
+
+    Example:
+        >>> image, = await run_node(ImageResizeKJv2, {"image": image, "width": 512, ...})
+    """
+    return await get_async_runner().run(node_class, kwargs, method, node_id)
@@ -0,0 +1,219 @@
+"""
+Batching module - coalesce many per-item calls of one node class into batched calls.
+
+Image nodes are usually called once per image in a Python loop. ``run_batched()`` takes
+the list of per-item keyword arguments instead, concatenates the IMAGE / MASK / LATENT
+inputs of compatible items along the batch dimension, calls the node once per group and
+splits the outputs back per item:
+
+    - items are grouped by their other (non-tensor) arguments and by the shape of their
+      tensors without the batch dimension (shape buckets), so only items that can be
+      stacked are stacked;
+    - IMAGE / MASK / LATENT outputs are split by each item's batch size, other outputs
+      (INT, STRING, ...) are given to every item of the group.
+
+This is only correct for nodes that process each batch element independently, which is
+the case for most image operations. If a node's output batch does not match its input
+batch (e.g. ImageBatchMulti), the group is run again item by item and the class is not
+batched again. Classes can opt out with ``QABBIT_BATCHABLE = False``.
+
+Usage:
+    from qabbit_wrapper.batching import run_batched
+
+    outputs = run_batched(ImageResizeKJv2, [
+        {"image": image, "width": 512, "height": 512, "upscale_method": "lanczos", ...}
+        for image in images
+    ])
+    resized = [image for image, width, height in outputs]
+"""
+
+from typing import Optional, Dict, Any, List
+
+from .graph import _value_key
+
+
+BATCH_TYPES = ("IMAGE", "MASK", "LATENT")
+
+# Classes whose outputs turned out not to follow their input batch
+_unbatchable: set = set()
+
+
+def _input_types(node_class: type) -> Dict[str, str]:
+    """Map input name -> type name (e.g. "IMAGE") from INPUT_TYPES()."""
+    try:
+        spec = node_class.INPUT_TYPES()
+    except Exception:
+        return {}
+    types = {}
+    for section in ("required", "optional"):
+        for name, info in (spec.get(section) or {}).items():
+            if isinstance(info, (list, tuple)) and info and isinstance(info[0], str):
+                types[name] = info[0]
+    return types
+
+
+def _batch_size(kind: str, value) -> Optional[int]:
+    """Return the batch size of an IMAGE/MASK/LATENT value, or None if it cannot be stacked."""
+    if kind == "LATENT":
+        if not isinstance(value, dict) or "samples" not in value:
+            return None
+        if set(value) - {"samples"}:
+            # noise_mask / batch_index would have to be merged too
+            return None
+        value = value["samples"]
+    shape = getattr(value, "shape", None)
+    if shape is None:
+        return None
+    if kind == "MASK" and len(shape) == 2:
+        return 1
+    return shape[0] if len(shape) else None
+
+
+def _item_shape(kind: str, value) -> tuple:
+    if kind == "LATENT":
+        value = value["samples"]
+    shape = tuple(value.shape)
+    if kind == "MASK" and len(shape) == 2:
+        return shape
+    return shape[1:]
+
+
+def _group_key(item: Dict[str, Any], batch_inputs: Dict[str, str]):
+    """
+    Return (key, batch size) of an item; items with equal keys can be stacked.
+    Returns (None, None) if the item cannot be batched.
+    """
+    sizes = set()
+    parts = []
+    for name in sorted(item):
+        value = item[name]
+        kind = batch_inputs.get(name)
+        if kind is None:
+            parts.append((name, _value_key(value)))
+            continue
+        size = _batch_size(kind, value)
+        if size is None:
+            return None, None
+        sizes.add(size)
+        parts.append((name, kind, _item_shape(kind, value), str(getattr(_samples(kind, value), "dtype", ""))))
+    if len(sizes) != 1:
+        # No tensor input, or inputs with different batch sizes in one item
+        return None, None
+    return tuple(parts), sizes.pop()
+
+
+def _samples(kind: str, value):
+    return value["samples"] if kind == "LATENT" else value
+
+
+def _stack(kind: str, values: list):
+    import torch
+
+    tensors = [_samples(kind, v) for v in values]
+    if kind == "MASK":
+        tensors = [t.unsqueeze(0) if t.ndim == 2 else t for t in tensors]
+    stacked = torch.cat(tensors, dim=0)
+    return {"samples": stacked} if kind == "LATENT" else stacked
+
+
+def _split(kind: str, value, sizes: List[int]) -> Optional[list]:
+    """Split a batched output by item batch sizes, or return None if it does not match."""
+    tensor = _samples(kind, value)
+    shape = getattr(tensor, "shape", None)
+    if shape is None or not len(shape) or shape[0] != sum(sizes):
+        return None
+    parts = list(tensor.split(sizes, dim=0))
+    if kind == "LATENT":
+        return [{**value, "samples": part} for part in parts]
+    return parts
+
+
+def _split_outputs(node_class: type, outputs, sizes: List[int]) -> Optional[list]:
+    """Split a node's return value into one return value per item."""
+    ui = None
+    if isinstance(outputs, dict):
+        ui = outputs.get("ui")
+        outputs = outputs.get("result", ())
+    return_types = getattr(node_class, "RETURN_TYPES", ())
+    columns = []
+    for index, value in enumerate(outputs):
+        kind = return_types[index] if index < len(return_types) else None
+        if kind in BATCH_TYPES:
+            parts = _split(kind, value, sizes)
+            if parts is None:
+                return None
+        else:
+            parts = [value] * len(sizes)
+        columns.append(parts)
+    per_item = [tuple(column[i] for column in columns) for i in range(len(sizes))]
+    if ui is not None:
+        return [{"ui": ui, "result": result} for result in per_item]
+    return per_item
+
+
+def run_batched(node_class: type, items: List[Dict[str, Any]], method: Optional[str] = None,
+                max_batch: Optional[int] = None) -> list:
+    """
+    Call a node once per group of compatible items instead of once per item.
+
+    Args:
+        node_class: Node class whose method processes batch elements independently
+        items: Keyword arguments of each per-item call
+        method: Method to call. Defaults to the class's FUNCTION.
+        max_batch: Maximum total batch size of one call (e.g. to bound memory)
+
+    Returns:
+        list: The return value of each item's call, in item order
+    """
+    method = method or node_class.FUNCTION
+    node = node_class()
+    function = getattr(node, method)
+    results: list = [None] * len(items)
+
+    batch_inputs = {
+        name: kind for name, kind in _input_types(node_class).items() if kind in BATCH_TYPES
+    }
+    if not batch_inputs or node_class in _unbatchable or getattr(node_class, "QABBIT_BATCHABLE", True) is False:
+        return [function(**item) for item in items]
+
+    # Bucket items by non-tensor arguments and tensor shapes
+    groups: Dict[Any, list] = {}
+    for index, item in enumerate(items):
+        key, size = _group_key(item, batch_inputs)
+        if key is None:
+            results[index] = function(**item)
+        else:
+            groups.setdefault(key, []).append((index, size))
+
+    for members in groups.values():
+        chunks, chunk, total = [], [], 0
+        for index, size in members:
+            if chunk and max_batch is not None and total + size > max_batch:
+                chunks.append(chunk)
+                chunk, total = [], 0
+            chunk.append((index, size))
+            total += size
+        chunks.append(chunk)
+
+        for chunk in chunks:
+            indices = [index for index, _ in chunk]
+            if len(chunk) == 1 or node_class in _unbatchable:
+                for index in indices:
+                    results[index] = function(**items[index])
+                continue
+            first = items[indices[0]]
+            kwargs = {
+                name: _stack(batch_inputs[name], [items[i][name] for i in indices])
+                if name in batch_inputs else value
+                for name, value in first.items()
+            }
+            per_item = _split_outputs(node_class, function(**kwargs), [size for _, size in chunk])
+            if per_item is None:
+                # Output batch does not follow the input batch: not a per-element node
+                _unbatchable.add(node_class)
+                for index in indices:
+                    results[index] = function(**items[index])
+                continue
+            for index, result in zip(indices, per_item):
+                results[index] = result
+    return results
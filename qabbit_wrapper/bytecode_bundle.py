@@ -0,0 +1,379 @@
+"""
+Bytecode bundle module - warm starts from one precompiled file instead of many small reads.
+
+``precompile()`` compiles every module of the selected custom node packages, plus the
+core ComfyUI modules imported so far (those init_comfy() imports, and any other module
+of the ComfyUI root already loaded, e.g. ``nodes``), into a single zip file. The bundle
+also stores the directory listings of the custom node packages.
+
+``init_comfy(bytecode_bundle=...)`` (or QABBIT_BYTECODE_BUNDLE) reads the bundle with one
+sequential read before anything is imported. Core modules are then served by a meta
+path finder, and custom node modules by the loader's finder, whose directory listings
+are pre-filled from the bundle: importing a bundled module does no ``stat``, ``listdir``
+or file read at all. On a network filesystem, where each of those is a round trip, this
+replaces thousands of round trips with one read.
+
+The bundle is trusted as written, like an unchecked hash-based .pyc: rebuild it after
+updating ComfyUI or a custom node package. With ``check_source=True`` each source file is
+``stat``-ed once and the bundled code is used only if its mtime and size are unchanged.
+A bundle written by another Python version or for another ComfyUI root is ignored with
+a warning. Modules not in the bundle are imported normally.
+
+Usage:
+    # Once, e.g. in the image build or after deploying custom nodes
+    from qabbit_wrapper import init_comfy
+    from qabbit_wrapper.bytecode_bundle import precompile
+
+    init_comfy("/mnt/nfs/ComfyUI")
+    precompile(["ComfyUI-KJNodes", "ComfyUI-WanVideoWrapper"], "/var/cache/qabbit/bundle.zip")
+
+    # Or: python -m qabbit_wrapper.bytecode_bundle --comfy-root /mnt/nfs/ComfyUI \\
+    #         --output /var/cache/qabbit/bundle.zip ComfyUI-KJNodes ComfyUI-WanVideoWrapper
+
+    # Every start
+    init_comfy("/mnt/nfs/ComfyUI", bytecode_bundle="/var/cache/qabbit/bundle.zip")
+"""
+
+import io
+import os
+import sys
+import json
+import marshal
+import zipfile
+import warnings
+import threading
+import importlib.abc
+import importlib.util
+from typing import Optional, Dict, Any, List, Iterable
+
+from . import import_finder
+from .import_finder import SourceStatLoader, get_custom_node_finder
+
+
+BUNDLE_VERSION = 1
+
+_MANIFEST = "manifest.json"
+# Suffix of the marshalled code entries (no .pyc header, so not named .pyc)
+_CODE_SUFFIX = ".code"
+
+
+def _relative(path: str, comfy_root: str) -> str:
+    return os.path.relpath(path, comfy_root).replace(os.sep, "/")
+
+
+def _absolute(relative_path: str, comfy_root: str) -> str:
+    return os.path.join(comfy_root, *relative_path.split("/"))
+
+
+class BundleLoader(SourceStatLoader):
+    """Source file loader whose code object comes from a bytecode bundle."""
+
+    def __init__(self, fullname: str, path: str, bundle: "BytecodeBundle"):
+        super().__init__(fullname, path)
+        self._bundle = bundle
+
+    def get_code(self, fullname):
+        code = self._bundle.get_code(self.path)
+        if code is None:
+            return super().get_code(fullname)
+        return code
+
+
+class BytecodeBundle:
+    """Code objects and directory listings read from a precompiled bundle file."""
+
+    def __init__(self, path: str, check_source: bool = False):
+        """
+        Read a bundle (one sequential read of the whole file).
+
+        Args:
+            path: Path of the bundle written by precompile()
+            check_source: stat each source file before using its bundled code
+
+        Raises:
+            ValueError: If the file is not a bundle of this version
+        """
+        self.path = os.path.abspath(path)
+        self.check_source = check_source
+        with open(self.path, "rb") as f:
+            data = f.read()
+        self._entries: Dict[str, bytes] = {}
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            try:
+                manifest = json.loads(archive.read(_MANIFEST))
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"{path} is not a bytecode bundle: {e}")
+            for info in archive.infolist():
+                if info.filename.endswith(_CODE_SUFFIX):
+                    self._entries[info.filename[:-len(_CODE_SUFFIX)]] = archive.read(info)
+        if manifest.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"{path}: unsupported bundle version {manifest.get('version')!r}")
+
+        self.magic: str = manifest["magic"]
+        self.comfy_root: str = manifest["comfy_root"]
+        # Relative source path -> [mtime, size] when it was compiled
+        self.files: Dict[str, List[float]] = manifest["files"]
+        # Core module name -> relative source path
+        self.core_modules: Dict[str, str] = manifest["core_modules"]
+        # Relative directory -> [files, directories]
+        self.listings: Dict[str, List[List[str]]] = manifest["listings"]
+        self.packages: List[str] = manifest["packages"]
+
+    def compatible(self, comfy_root: str) -> Optional[str]:
+        """Return why the bundle cannot be used for ``comfy_root``, or None if it can."""
+        if self.magic != importlib.util.MAGIC_NUMBER.hex():
+            return "compiled by a different Python version"
+        if os.path.abspath(comfy_root) != self.comfy_root:
+            return f"built for a different ComfyUI root ({self.comfy_root})"
+        return None
+
+    def get_code(self, path: str):
+        """Return the bundled code object of a source file, or None."""
+        relative_path = _relative(path, self.comfy_root)
+        data = self._entries.get(relative_path)
+        if data is None:
+            return None
+        mtime, size = self.files[relative_path]
+        if self.check_source:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            if (st.st_mtime, st.st_size) != (mtime, size):
+                return None
+        # Recorded as if the loader had stat'ed the file, for hot reload
+        import_finder.source_stats[path] = (mtime, size)
+        return marshal.loads(data)
+
+    def has_code(self, path: str) -> bool:
+        return _relative(path, self.comfy_root) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BundleFinder(importlib.abc.MetaPathFinder):
+    """Meta path finder serving the bundled core ComfyUI modules."""
+
+    def __init__(self, bundle: BytecodeBundle):
+        self.bundle = bundle
+
+    def find_spec(self, fullname, path=None, target=None):
+        relative_path = self.bundle.core_modules.get(fullname)
+        if relative_path is None:
+            return None
+        module_file = _absolute(relative_path, self.bundle.comfy_root)
+        search_locations = None
+        if os.path.basename(module_file) == "__init__.py":
+            search_locations = [os.path.dirname(module_file)]
+        return importlib.util.spec_from_file_location(
+            fullname, module_file,
+            loader=BundleLoader(fullname, module_file, self.bundle),
+            submodule_search_locations=search_locations,
+        )
+
+
+# Active bundle and its finder
+_active: Optional[BytecodeBundle] = None
+_active_finder: Optional[BundleFinder] = None
+_active_lock = threading.Lock()
+
+
+def _bundle_loader(fullname: str, path: str):
+    bundle = _active
+    if bundle is not None and bundle.has_code(path):
+        return BundleLoader(fullname, path, bundle)
+    return None
+
+
+def activate(path: str, comfy_root: str, check_source: bool = False) -> Optional[BytecodeBundle]:
+    """
+    Read a bundle and serve imports from it.
+
+    Args:
+        path: Path of the bundle written by precompile()
+        comfy_root: The ComfyUI root being initialized
+        check_source: stat each source file before using its bundled code
+
+    Returns:
+        BytecodeBundle, or None if the bundle is missing or incompatible (a warning is
+        issued and modules are imported normally)
+    """
+    global _active, _active_finder
+    try:
+        bundle = BytecodeBundle(path, check_source=check_source)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        warnings.warn(f"Bytecode bundle not used: {e}")
+        return None
+    reason = bundle.compatible(comfy_root)
+    if reason is not None:
+        warnings.warn(f"Bytecode bundle {path} not used: {reason}")
+        return None
+
+    with _active_lock:
+        deactivate()
+        # Directory listings of the bundled packages, so resolving their modules does no scandir
+        finder = get_custom_node_finder()
+        finder.preload_listings({
+            _absolute(directory, bundle.comfy_root): (files, dirs)
+            for directory, (files, dirs) in bundle.listings.items()
+        })
+        _active = bundle
+        _active_finder = BundleFinder(bundle)
+        sys.meta_path.insert(0, _active_finder)
+        import_finder.code_provider = _bundle_loader
+    return bundle
+
+
+def deactivate() -> None:
+    """Stop serving imports from the active bundle (modules already imported stay)."""
+    global _active, _active_finder
+    if _active_finder is not None and _active_finder in sys.meta_path:
+        sys.meta_path.remove(_active_finder)
+    if import_finder.code_provider is _bundle_loader:
+        import_finder.code_provider = None
+    _active = None
+    _active_finder = None
+
+
+def get_active_bundle() -> Optional[BytecodeBundle]:
+    """Get the bundle imports are served from, if any."""
+    return _active
+
+
+def _package_directory(comfy_root: str, package_name: str) -> str:
+    """Directory of a custom node package, accepting "ComfyUI-KJNodes" or "ComfyUI_KJNodes"."""
+    custom_nodes = os.path.join(comfy_root, "custom_nodes")
+    for candidate in (package_name, package_name.replace("_", "-")):
+        path = os.path.join(custom_nodes, candidate)
+        if os.path.isdir(path):
+            return path
+    raise FileNotFoundError(f"Custom node package not found: {package_name} (searched in {custom_nodes})")
+
+
+def _core_module_files(comfy_root: str, extra: Iterable[str]) -> Dict[str, str]:
+    """Module name -> source file of the loaded modules of the ComfyUI root (not custom nodes)."""
+    custom_nodes = os.path.join(comfy_root, "custom_nodes") + os.sep
+    for name in extra:
+        importlib.import_module(name)
+    modules: Dict[str, str] = {}
+    for name, module in list(sys.modules.items()):
+        spec = getattr(module, "__spec__", None)
+        origin = getattr(spec, "origin", None)
+        if not origin or not origin.endswith(".py") or spec.name != name:
+            continue
+        origin = os.path.abspath(origin)
+        if origin.startswith(comfy_root + os.sep) and not origin.startswith(custom_nodes):
+            modules[name] = origin
+    return modules
+
+
+def _compile(path: str, optimize: int):
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        source = f.read()
+    code = compile(source, path, "exec", dont_inherit=True, optimize=optimize)
+    return code, [st.st_mtime, st.st_size]
+
+
+def precompile(packages: Iterable[str], output: str, core_modules: Iterable[str] = (),
+               optimize: int = -1) -> Dict[str, Any]:
+    """
+    Compile custom node packages and the loaded core ComfyUI modules into a bundle.
+
+    ComfyUI must be initialized (init_comfy()); the modules init_comfy() imported, and
+    any other module of the ComfyUI root imported so far, are included.
+
+    Args:
+        packages: Custom node package names (e.g. ["ComfyUI-KJNodes"]); every .py file
+                  of each package is compiled (without being executed)
+        output: Path of the bundle to write (atomically)
+        core_modules: Extra ComfyUI module names to import and include (e.g. ["nodes"])
+        optimize: Optimization level passed to compile() (-1: the interpreter's)
+
+    Returns:
+        dict: {"path", "modules", "bytes", "skipped"} where skipped lists the files that
+        failed to compile (they are imported from source as usual)
+    """
+    from .core import ensure_initialized, get_comfy_root
+
+    ensure_initialized()
+    comfy_root = os.path.abspath(get_comfy_root())
+    files: Dict[str, List[float]] = {}
+    code: Dict[str, bytes] = {}
+    listings: Dict[str, List[List[str]]] = {}
+    skipped: List[str] = []
+
+    def add(path: str) -> bool:
+        relative_path = _relative(path, comfy_root)
+        if relative_path in code:
+            return True
+        try:
+            compiled, stat = _compile(path, optimize)
+        except (OSError, SyntaxError, ValueError) as e:
+            skipped.append(f"{relative_path}: {e}")
+            return False
+        code[relative_path] = marshal.dumps(compiled)
+        files[relative_path] = stat
+        return True
+
+    core = {}
+    for name, path in sorted(_core_module_files(comfy_root, core_modules).items()):
+        if add(path):
+            core[name] = _relative(path, comfy_root)
+
+    package_names = []
+    for package_name in packages:
+        package_path = _package_directory(comfy_root, package_name)
+        package_names.append(os.path.basename(package_path))
+        for directory, dirs, filenames in os.walk(package_path):
+            # The same view CustomNodeFinder.listdir() would build
+            listings[_relative(directory, comfy_root)] = [sorted(filenames), sorted(dirs)]
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__" and not d.startswith("."))
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    add(os.path.join(directory, filename))
+
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "magic": importlib.util.MAGIC_NUMBER.hex(),
+        "python": list(sys.version_info[:3]),
+        "comfy_root": comfy_root,
+        "packages": package_names,
+        "core_modules": core,
+        "files": files,
+        "listings": listings,
+    }
+    output = os.path.abspath(output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    tmp_path = f"{output}.tmp.{os.getpid()}"
+    # Stored, not deflated: reading is the bottleneck on a network filesystem, not size
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr(_MANIFEST, json.dumps(manifest))
+        for relative_path, data in code.items():
+            archive.writestr(relative_path + _CODE_SUFFIX, data)
+    os.replace(tmp_path, output)
+    return {"path": output, "modules": len(code), "bytes": os.path.getsize(output), "skipped": skipped}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    from .core import init_comfy
+
+    parser = argparse.ArgumentParser(description="Precompile custom node packages into a bytecode bundle.")
+    parser.add_argument("packages", nargs="+", help="custom node package names")
+    parser.add_argument("--output", required=True, help="bundle file to write")
+    parser.add_argument("--comfy-root", default=os.environ.get("COMFY_ROOT"))
+    parser.add_argument("--core-module", action="append", default=[],
+                        help="extra ComfyUI module to include (e.g. nodes); repeatable")
+    args = parser.parse_args(argv)
+
+    init_comfy(args.comfy_root)
+    result = precompile(args.packages, args.output, core_modules=args.core_module)
+    print(f"Wrote {result['modules']} modules ({result['bytes'] / 1024:.0f} KB) to {result['path']}")
+    for entry in result["skipped"]:
+        print(f"Skipped {entry}")
+
+
+if __name__ == "__main__":
+    main()
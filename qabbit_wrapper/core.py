@@ -5,9 +5,16 @@ Handles path setup, fake server creation, and basic ComfyUI initialization.
 
 import sys
 import os
+import threading
 import importlib.util
 from typing import Optional
 
+from .profiler import enable_profiling, profiling_requested, profile_section
+from .events import get_event_bus, install_progress_hook
+from .mmap_loading import mmap_requested, enable_mmap_loading
+from .perf_profile import PerfProfile, perf_profile_requested, apply_to_args, record_runtime
+from .tracing import tracing_requested, enable_tracing
+
 # Global variable to track ComfyUI root path
 _COMFY_ROOT: Optional[str] = None
 _INITIALIZED: bool = False
@@ -27,13 +34,36 @@ def get_comfy_root() -> Optional[str]:
 def _create_fake_server():
     """Create a fake server module to avoid import errors in nodes that require server."""
     # Create a fake PromptServer class
+    # last_node_id / client_id are per thread, so nodes running concurrently
+    # (see qabbit_wrapper.async_api) each see their own values
     class FakePromptServer:
         def __init__(self):
-            self.last_node_id = None
-            self.client_id = None
+            self._local = threading.local()
+        
+        @property
+        def last_node_id(self):
+            return getattr(self._local, "last_node_id", None)
+        
+        @last_node_id.setter
+        def last_node_id(self, value):
+            self._local.last_node_id = value
+        
+        @property
+        def client_id(self):
+            return getattr(self._local, "client_id", None)
         
-        def send_sync(self, *args, **kwargs):
-            pass  # No-op for script usage
+        @client_id.setter
+        def client_id(self, value):
+            self._local.client_id = value
+        
+        def send_sync(self, event, data=None, sid=None):
+            # Handed to the event bus (see qabbit_wrapper.events); never blocks
+            get_event_bus().publish(event, data, sid if sid is not None else self.client_id)
+        
+        def send_progress_text(self, text, node_id, sid=None):
+            get_event_bus().publish(
+                "progress_text", {"text": text, "node": node_id}, sid if sid is not None else self.client_id
+            )
     
     # Create instance before creating the class attribute
     fake_prompt_server_instance = FakePromptServer()
@@ -42,7 +72,9 @@ def _create_fake_server():
     # Create fake server module
     class FakeServer:
         PromptServer = FakePromptServer
-        BinaryEventTypes = type('BinaryEventTypes', (), {'PREVIEW_IMAGE': 1})()
+        BinaryEventTypes = type('BinaryEventTypes', (), {
+            'PREVIEW_IMAGE': 1, 'UNENCODED_PREVIEW_IMAGE': 2, 'TEXT': 3, 'PREVIEW_IMAGE_WITH_METADATA': 4
+        })()
     
     # Set up fake server before loading modules that might import it
     if 'server' not in sys.modules:
@@ -51,19 +83,43 @@ def _create_fake_server():
     return FakeServer
 
 
-def init_comfy(comfy_root: Optional[str] = None) -> None:
+def init_comfy(comfy_root: Optional[str] = None, profile: bool = False, perf_profile=None,
+               bytecode_bundle: Optional[str] = None) -> None:
     """
     Initialize ComfyUI environment.
     
     Args:
         comfy_root: Path to ComfyUI root directory. If None, will try to auto-detect
                     by looking for ComfyUI directory relative to this file.
+        profile: Record startup timings of every module executed through the wrapper
+                 until load_nodes() returns or stop_profiling() is called (see
+                 qabbit_wrapper.profiler). Also enabled by QABBIT_PROFILE=1.
+        perf_profile: Device / precision / threading options (a PerfProfile, a dict, a
+                 preset name or a JSON file path, see qabbit_wrapper.perf_profile) set on
+                 comfy.cli_args.args before comfy.model_management reads them.
+                 Defaults to QABBIT_PERF_PROFILE.
+        bytecode_bundle: Bundle written by qabbit_wrapper.bytecode_bundle.precompile();
+                 bundled modules are imported from it without touching their files.
+                 Defaults to QABBIT_BYTECODE_BUNDLE.
     """
     global _COMFY_ROOT, _INITIALIZED
     
+    if profile or profiling_requested():
+        enable_profiling()
+    
     if _INITIALIZED:
+        if perf_profile is not None:
+            print("Warning: ComfyUI is already initialized; perf_profile is ignored")
+        if bytecode_bundle is not None:
+            print("Warning: ComfyUI is already initialized; bytecode_bundle is ignored")
         return
     
+    if perf_profile is None:
+        perf_profile = perf_profile_requested()
+    if perf_profile is not None:
+        # Validate before anything is imported
+        perf_profile = PerfProfile.load(perf_profile)
+    
     # Determine ComfyUI root path
     if comfy_root is None:
         if _COMFY_ROOT:
@@ -100,20 +156,48 @@ def init_comfy(comfy_root: Optional[str] = None) -> None:
     if comfy_root not in sys.path:
         sys.path.insert(0, comfy_root)
     
+    # Serve ComfyUI and custom node modules from a precompiled bundle (one read)
+    bytecode_bundle = bytecode_bundle or os.environ.get("QABBIT_BYTECODE_BUNDLE")
+    if bytecode_bundle:
+        # Imported here so "python -m qabbit_wrapper.bytecode_bundle" runs it only once
+        from .bytecode_bundle import activate
+        activate(bytecode_bundle, comfy_root)
+    
     # Create fake server before importing any ComfyUI modules
     _create_fake_server()
     
     # Import essential ComfyUI modules
     try:
-        import folder_paths
-        import comfy.model_management as mm
-        from comfy.cli_args import args
+        with profile_section("init_comfy"):
+            import folder_paths
+            from comfy.cli_args import args
+            if perf_profile is not None:
+                # model_management reads args when it is imported
+                apply_to_args(perf_profile, args)
+            import comfy.model_management as mm
     except ImportError as e:
         raise ImportError(
             f"Failed to import ComfyUI modules. Make sure ComfyUI is properly installed at {comfy_root}. "
             f"Error: {e}"
         )
     
+    # Opt-in memory-mapped checkpoint loading (see qabbit_wrapper.mmap_loading)
+    mmap_loading = perf_profile.mmap_loading if perf_profile is not None else None
+    if mmap_loading or (mmap_loading is None and mmap_requested()):
+        enable_mmap_loading()
+    
+    if perf_profile is not None:
+        record_runtime(mm)
+        print(f"Performance profile applied: {perf_profile!r}")
+    
+    # Opt-in per-node tracing (see qabbit_wrapper.tracing)
+    if tracing_requested():
+        enable_tracing()
+    
+    # Listeners subscribed before initialization also get sampler progress
+    if get_event_bus().stats()["listeners"]:
+        install_progress_hook()
+    
     _INITIALIZED = True
     print(f"ComfyUI initialized successfully from: {comfy_root}")
 
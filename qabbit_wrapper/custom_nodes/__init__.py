@@ -13,14 +13,20 @@ Usage:
 """
 
 import os
+import time
 import importlib
+import contextvars
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Optional
 from ..custom_nodes_logic import (
     load_custom_node,
     get_custom_node,
     list_available_custom_nodes,
     get_loader,
+    apply_class_hooks,
     CustomNodeLoader
 )
+from ..profiler import _startup_finished
 
 
 __all__ = [
@@ -30,6 +36,7 @@ __all__ = [
     'get_loader',
     'CustomNodeLoader',
     'load_nodes',
+    'LazyNodeRegistry',
 ]
 
 
@@ -42,18 +49,35 @@ class CustomNodePackage:
     Usage:
         kj = CustomNodePackage("ComfyUI-KJNodes")
         ImageResizeKJv2 = kj.get("nodes/image_nodes", "ImageResizeKJv2")
+
+        # Run the package in its own process (see qabbit_wrapper.isolation)
+        leaky = CustomNodePackage("ComfyUI-SomeLeakyNodes", isolated=True)
     """
     
-    def __init__(self, package_name: str):
+    def __init__(self, package_name: str, isolated: Optional[bool] = None,
+                 loader: Optional[CustomNodeLoader] = None):
         """
         Initialize a custom node package wrapper.
         
         Args:
             package_name: Name of the package (e.g., "ComfyUI-KJNodes")
+            isolated: Run the package in a dedicated child process and return proxy
+                      classes. Defaults to whether isolate_package() marked it.
+            loader: Loader to use. Defaults to get_loader() (the active environment's).
         """
+        from ..isolation import is_isolated, get_isolated_package
+
         self.package_name = package_name
-        self.python_package_name = load_custom_node(package_name)
-        self._loader = get_loader()
+        self._loader = loader or get_loader()
+        if isolated is None:
+            isolated = is_isolated(package_name)
+        if isolated:
+            # Never imported in this process
+            self.python_package_name = None
+            self._isolated = get_isolated_package(package_name)
+        else:
+            self.python_package_name = self._loader.load_custom_node_package(package_name)
+            self._isolated = None
     
     def get(self, module_path: str, class_name: str):
         """
@@ -64,8 +88,10 @@ class CustomNodePackage:
             class_name: Name of the class to import
             
         Returns:
-            The imported class
+            The imported class (a proxy class if the package is isolated)
         """
+        if self._isolated is not None:
+            return self._isolated.get(module_path, class_name)
         return self._loader.import_from_custom_node(
             self.package_name,
             module_path,
@@ -83,11 +109,46 @@ class CustomNodePackage:
         Returns:
             Loaded module
         """
+        if self._isolated is not None:
+            raise RuntimeError(f"{self.package_name} is isolated: its modules are not loaded in this process")
         return self._loader.load_submodule(
             self.python_package_name,
             submodule_name,
             filename
         )
+    
+    def reload(self):
+        """
+        Re-execute the modules of this package that changed on disk, and their dependents.
+        
+        Classes already returned by get() are updated in place.
+        
+        Returns:
+            Names of the re-executed modules (see qabbit_wrapper.hot_reload)
+        """
+        if self._isolated is not None:
+            raise RuntimeError(f"{self.package_name} is isolated: restart its process with close() instead")
+        from ..hot_reload import get_reloader
+        return get_reloader(self._loader).reload(self.package_name)
+    
+    def probe(self, module_path: Optional[str] = None, fallback: bool = True) -> Dict[str, Any]:
+        """
+        Get node metadata (INPUT_TYPES, RETURN_TYPES, CATEGORY, ...) without executing the package.
+        
+        Args:
+            module_path: Only probe this module (e.g., "nodes/image_nodes"). Defaults to all modules.
+            fallback: Import classes whose metadata is computed at runtime in a subprocess
+            
+        Returns:
+            Probe result, see qabbit_wrapper.probe.probe_custom_node()
+        """
+        from ..probe import probe_custom_node
+        return probe_custom_node(
+            self.package_name,
+            module_path,
+            comfy_root=self._loader.comfy_root,
+            fallback=fallback
+        )
 
 
 # Pre-configured package wrappers for common packages
@@ -141,53 +202,294 @@ def get_WanVideoWrapper():
     return CustomNodePackage("ComfyUI-WanVideoWrapper")
 
 
-def load_nodes(config):
+def _read_config(config) -> dict:
+    """Return the node config as a dict, reading it from a JSON file if given a path."""
+    if isinstance(config, str):
+        import json
+        with open(config, 'r') as f:
+            config = json.load(f)
+    return config
+
+
+def _iter_config_entries(config: dict):
+    """
+    Flatten a node config into (package_name, module_path, class_name, is_custom) tuples.
+
+    A package counts as a custom node package when a directory of that name exists
+    under ``<comfy_root>/custom_nodes``; anything else is treated as an importable
+    Python package (e.g. ``comfy_extras``).
+    """
+    custom_nodes_path = get_loader().custom_nodes_path
+
+    for package_name, modules in config.items():
+        # Check if it's a custom node package by looking in the custom_nodes directory
+        is_custom_pkg = os.path.exists(os.path.join(custom_nodes_path, package_name))
+        for module_path, class_names in modules.items():
+            if isinstance(class_names, str):
+                class_names = [class_names]
+            for class_name in class_names:
+                yield package_name, module_path, class_name, is_custom_pkg
+
+
+def _import_standard_node(package_name: str, module_path: str, class_name: str):
+    """Import a node class from a regular (non custom_nodes) Python package."""
+    # In this case, package_name is the base module (e.g., 'comfy_extras')
+    # and module_path is the relative module path (e.g., 'nodes_lumina2')
+    if module_path:
+        full_module_path = f"{package_name}.{module_path}"
+    else:
+        full_module_path = package_name
+    module = importlib.import_module(full_module_path)
+    return apply_class_hooks(getattr(module, class_name))
+
+
+def _load_package_entries(package_name: str, entries: list, is_custom_pkg: bool) -> Dict[str, Any]:
+    """
+    Import the (module_path, class_name) entries of one package in order.
+
+    Returns a mapping of class name to either the node class or the exception raised
+    while importing it, so callers can decide how to report failures.
+    """
+    results: Dict[str, Any] = {}
+    pkg = None
+    for module_path, class_name in entries:
+        try:
+            if is_custom_pkg:
+                if pkg is None:
+                    pkg = CustomNodePackage(package_name)
+                results[class_name] = pkg.get(module_path, class_name)
+            else:
+                results[class_name] = _import_standard_node(package_name, module_path, class_name)
+        except Exception as e:
+            results[class_name] = e
+    return results
+
+
+def _load_grouped(order: list, grouped: Dict[str, list], load_group, workers: Optional[int]) -> Dict[str, Any]:
+    """
+    Run ``load_group(package_name, entries)`` for each package, in a thread pool when
+    ``workers`` > 1, and assemble the classes in ``order``.
+
+    ``load_group`` returns a mapping of class name to node class or exception; the
+    exception of the first failing class in ``order`` is raised.
+    """
+    results: Dict[str, Any] = {}
+    if workers is None or workers <= 1 or len(grouped) <= 1:
+        for package_name, entries in grouped.items():
+            results.update(load_group(package_name, entries))
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Create the global loader up front rather than racing to create it in the workers
+        get_loader()
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(grouped))) as executor:
+            # Each task runs in a copy of this context, so it uses the same environment's loader
+            futures = [
+                executor.submit(contextvars.copy_context().run, load_group, package_name, entries)
+                for package_name, entries in grouped.items()
+            ]
+            for future in futures:
+                results.update(future.result())
+
+    loaded_nodes = {}
+    for class_name in order:
+        result = results[class_name]
+        if isinstance(result, BaseException):
+            raise result
+        loaded_nodes[class_name] = result
+    return loaded_nodes
+
+
+def load_nodes(config, workers: Optional[int] = None, lockfile: Optional[str] = None):
     """
     Load multiple nodes based on a configuration dictionary or JSON file.
     
     Args:
         config (dict or str): Path to a JSON file or a dictionary mapping 
                              package names to module/class mappings.
+        workers (int, optional): Number of threads used to import packages
+                             concurrently. Modules of one package are always imported
+                             in order by a single thread; different packages (e.g.
+                             KJNodes and WanVideoWrapper) are imported in parallel.
+                             If None or 1, everything is imported sequentially.
+        lockfile (str, optional): Path of a startup snapshot (see qabbit_wrapper.snapshot).
+                             If it is up to date, classes are imported directly from the
+                             recorded files (and init_comfy() is called with the recorded
+                             root if needed); otherwise nodes are discovered normally and
+                             the snapshot is rewritten.
         
     Returns:
-        dict: Mapping of class names to node classes.
+        dict: Mapping of class names to node classes, in config order.
+
+    Raises:
+        The exception of the first failing entry in config order, regardless of
+        which import finished first.
     """
-    if isinstance(config, str):
-        import json
-        with open(config, 'r') as f:
-            config = json.load(f)
-            
-    from ..core import get_comfy_root
-    comfy_root = get_comfy_root()
-    
-    loaded_nodes = {}
-    for package_name, modules in config.items():
-        # Check if it's a custom node package by looking in the custom_nodes directory
-        is_custom_pkg = os.path.exists(os.path.join(comfy_root, "custom_nodes", package_name))
-        
+    try:
+        snapshot = None
+        if lockfile is not None:
+            from ..snapshot import StartupSnapshot
+            snapshot = StartupSnapshot(lockfile)
+            loaded_nodes = snapshot.load(config, workers)
+            if loaded_nodes is not None:
+                return loaded_nodes
+
+        loaded_nodes = _discover_nodes(config, workers)
+        if snapshot is not None:
+            snapshot.record(config, loaded_nodes)
+        return loaded_nodes
+    finally:
+        # The startup profiler (if enabled) ends here
+        _startup_finished()
+
+
+def _discover_nodes(config, workers: Optional[int]) -> Dict[str, Any]:
+    """Resolve and import the classes of a config (see load_nodes())."""
+    config = _read_config(config)
+
+    if workers is None or workers <= 1:
+        packages: Dict[str, CustomNodePackage] = {}
+        loaded_nodes = {}
+        for package_name, module_path, class_name, is_custom_pkg in _iter_config_entries(config):
+            if is_custom_pkg:
+                if package_name not in packages:
+                    packages[package_name] = CustomNodePackage(package_name)
+                loaded_nodes[class_name] = packages[package_name].get(module_path, class_name)
+            else:
+                loaded_nodes[class_name] = _import_standard_node(package_name, module_path, class_name)
+        return loaded_nodes
+
+    # Group entries by package, keeping config order
+    order = []
+    grouped: Dict[str, list] = {}
+    is_custom: Dict[str, bool] = {}
+    for package_name, module_path, class_name, is_custom_pkg in _iter_config_entries(config):
+        order.append(class_name)
+        grouped.setdefault(package_name, []).append((module_path, class_name))
+        is_custom[package_name] = is_custom_pkg
+
+    return _load_grouped(
+        order, grouped,
+        lambda package_name, entries: _load_package_entries(package_name, entries, is_custom[package_name]),
+        workers
+    )
+
+
+class LazyNodeRegistry(Mapping):
+    """
+    A registry of node classes that are imported on first access.
+
+    Built from the same config format as ``load_nodes()``, but only records the
+    package/module/class triples up front. The module defining a class is executed
+    the first time the class is looked up, so workers only pay for the nodes they use.
+
+    Usage:
+        nodes = LazyNodeRegistry("nodes_config.json")
+        resize_node = nodes.ImageResizeKJv2()      # imports nodes/image_nodes now
+        sampler = nodes["WanVideoSampler"]          # imports nodes_sampler now
+        nodes.preload(["WanVideoDecode"])           # warm-up
+        print(nodes.report())
+    """
+
+    def __init__(self, config):
+        """
+        Initialize a lazy node registry.
+
+        Args:
+            config (dict or str): Path to a JSON file or a dictionary mapping
+                                 package names to module/class mappings.
+        """
+        # Classes are resolved with the loader active when the registry was created
+        self._loader = get_loader()
+        self._entries: Dict[str, tuple] = {}
+        for package_name, module_path, class_name, is_custom_pkg in _iter_config_entries(_read_config(config)):
+            self._entries[class_name] = (package_name, module_path, is_custom_pkg)
+        self._packages: Dict[str, CustomNodePackage] = {}
+        self._resolved: Dict[str, Any] = {}
+        self._load_times: Dict[str, float] = {}
+
+    def _resolve(self, class_name: str):
+        if class_name in self._resolved:
+            return self._resolved[class_name]
+        if class_name not in self._entries:
+            raise KeyError(f"Node {class_name} is not registered in this config")
+
+        package_name, module_path, is_custom_pkg = self._entries[class_name]
+        start = time.perf_counter()
         if is_custom_pkg:
-            pkg = CustomNodePackage(package_name)
-            for module_path, class_names in modules.items():
-                if isinstance(class_names, str):
-                    class_names = [class_names]
-                for class_name in class_names:
-                    loaded_nodes[class_name] = pkg.get(module_path, class_name)
+            if package_name not in self._packages:
+                self._packages[package_name] = CustomNodePackage(package_name, loader=self._loader)
+            node_class = self._packages[package_name].get(module_path, class_name)
         else:
-            # Standard module import
-            for module_path, class_names in modules.items():
-                # In this case, package_name is the base module (e.g., 'comfy_extras')
-                # and module_path is the relative module path (e.g., 'nodes_lumina2')
-                if module_path:
-                    full_module_path = f"{package_name}.{module_path}"
-                else:
-                    full_module_path = package_name
-                    
-                module = importlib.import_module(full_module_path)
-                
-                if isinstance(class_names, str):
-                    class_names = [class_names]
-                for class_name in class_names:
-                    loaded_nodes[class_name] = getattr(module, class_name)
-                
-    return loaded_nodes
+            node_class = _import_standard_node(package_name, module_path, class_name)
+        self._load_times[class_name] = time.perf_counter() - start
+        self._resolved[class_name] = node_class
+        return node_class
+
+    def __getitem__(self, class_name: str):
+        return self._resolve(class_name)
+
+    def __getattr__(self, class_name: str):
+        if class_name.startswith("_"):
+            raise AttributeError(class_name)
+        try:
+            return self._resolve(class_name)
+        except KeyError as e:
+            raise AttributeError(str(e)) from None
+
+    def __contains__(self, class_name) -> bool:
+        return class_name in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __dir__(self):
+        return list(super().__dir__()) + list(self._entries)
 
+    def is_loaded(self, class_name: str) -> bool:
+        """Return True if the class has already been imported."""
+        return class_name in self._resolved
+
+    def preload(self, class_names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Import classes ahead of time (e.g. during worker warm-up).
+
+        Args:
+            class_names: Classes to import. If None, imports every registered class.
+
+        Returns:
+            dict: Mapping of the requested class names to node classes.
+        """
+        if class_names is None:
+            class_names = list(self._entries)
+        return {name: self._resolve(name) for name in class_names}
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Describe what has actually been loaded so far.
+
+        Returns:
+            dict with ``loaded`` (class name -> package, module and load time in seconds),
+            ``pending`` (registered but never accessed class names) and ``modules``
+            (distinct package/module pairs that were executed).
+        """
+        loaded = {}
+        modules = []
+        for class_name in self._resolved:
+            package_name, module_path, _ = self._entries[class_name]
+            loaded[class_name] = {
+                "package": package_name,
+                "module": module_path,
+                "seconds": self._load_times[class_name],
+            }
+            if (package_name, module_path) not in modules:
+                modules.append((package_name, module_path))
+        return {
+            "loaded": loaded,
+            "pending": [name for name in self._entries if name not in self._resolved],
+            "modules": [f"{package}:{module}" for package, module in modules],
+        }
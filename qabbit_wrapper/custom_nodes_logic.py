@@ -7,26 +7,74 @@ This module provides utilities to load custom nodes, especially those with hyphe
 
 import sys
 import os
+import threading
+import importlib
 import importlib.util
+from contextvars import ContextVar
 from typing import Optional, Dict, Any, List
 from .core import get_comfy_root, ensure_initialized
+from .profiler import profile_section
+from .import_finder import get_custom_node_finder, source_loader
 
 
 class CustomNodeLoader:
     """Loader for custom nodes with support for hyphenated package names."""
     
-    def __init__(self, comfy_root: Optional[str] = None):
+    def __init__(self, comfy_root: Optional[str] = None, namespace: Optional[str] = None):
         """
         Initialize custom node loader.
         
         Args:
             comfy_root: Path to ComfyUI root. If None, uses get_comfy_root().
+            namespace: Suffix of the package aliases (e.g. "v2" gives "ComfyUI_KJNodes__v2"),
+                       so several loaders can load the same package side by side
+                       (see qabbit_wrapper.environment). None for the plain aliases.
         """
         ensure_initialized()
         self.comfy_root = comfy_root or get_comfy_root()
         self.custom_nodes_path = os.path.join(self.comfy_root, "custom_nodes")
+        self.namespace = namespace
+        self._alias_suffix = f"__{namespace}" if namespace else ""
         self._loaded_modules: Dict[str, Any] = {}
         self._loaded_packages: Dict[str, Any] = {}
+        # Guards package alias creation
+        self._lock = threading.RLock()
+        # Resolves submodules of the aliases created below from cached directory listings
+        self._finder = get_custom_node_finder()
+    
+    def _exec_spec(self, spec) -> Any:
+        """
+        Create and execute the module of a spec, unless another thread already did.
+        
+        Holds the import system's lock for the module name, so concurrent calls and
+        plain ``import`` statements for the same module wait for one execution and never
+        see a half-built module. A module whose execution fails is removed again.
+        """
+        name = spec.name
+        with module_import_lock(name):
+            module = sys.modules.get(name)
+            if module is not None:
+                return module
+            module = importlib.util.module_from_spec(spec)
+            # Makes the import system wait on the lock above instead of returning the module early
+            spec._initializing = True
+            sys.modules[name] = module
+            try:
+                with profile_section(name):
+                    spec.loader.exec_module(module)
+            except BaseException:
+                sys.modules.pop(name, None)
+                raise
+            finally:
+                spec._initializing = False
+            # The module may have replaced itself in sys.modules
+            return sys.modules.get(name, module)
+    
+    def alias_for(self, package_name: str) -> str:
+        """
+        Get the Python-importable alias of a package (e.g. "ComfyUI-KJNodes" -> "ComfyUI_KJNodes").
+        """
+        return package_name.replace("-", "_") + self._alias_suffix
     
     def _create_package_alias(self, package_name: str, package_path: str) -> str:
         """
@@ -40,17 +88,20 @@ class CustomNodeLoader:
             Python-importable package name (e.g., "ComfyUI_KJNodes")
         """
         # Replace hyphens with underscores for Python import
-        python_package_name = package_name.replace("-", "_")
-        
-        if python_package_name in self._loaded_packages:
-            return python_package_name
+        python_package_name = self.alias_for(package_name)
         
-        # Create parent package module
-        parent_module = type(sys)(python_package_name)
-        parent_module.__path__ = [package_path]
-        parent_module.__file__ = os.path.join(package_path, "__init__.py")
-        sys.modules[python_package_name] = parent_module
-        self._loaded_packages[python_package_name] = parent_module
+        with self._lock:
+            if python_package_name in self._loaded_packages:
+                return python_package_name
+            
+            # Create parent package module; it is published in _loaded_packages last, so
+            # other threads only see the alias once it can resolve submodules
+            parent_module = type(sys)(python_package_name)
+            parent_module.__path__ = [package_path]
+            parent_module.__file__ = os.path.join(package_path, "__init__.py")
+            self._finder.register(python_package_name, package_path)
+            sys.modules[python_package_name] = parent_module
+            self._loaded_packages[python_package_name] = parent_module
         
         return python_package_name
     
@@ -83,16 +134,12 @@ class CustomNodeLoader:
         full_module_name = f"{package_name}.{submodule_name}"
         
         # Check if already loaded
-        if full_module_name in sys.modules:
-            return sys.modules[full_module_name]
-        
-        # Load the submodule
-        spec = importlib.util.spec_from_file_location(full_module_name, filepath)
-        module = importlib.util.module_from_spec(spec)
-        module.__package__ = package_name
-        module.__name__ = full_module_name
-        sys.modules[full_module_name] = module
-        spec.loader.exec_module(module)
+        module = sys.modules.get(full_module_name)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(
+                full_module_name, filepath, loader=source_loader(full_module_name, filepath)
+            )
+            module = self._exec_spec(spec)
         
         self._loaded_modules[full_module_name] = module
         return module
@@ -108,11 +155,10 @@ class CustomNodeLoader:
             Python-importable package name
         """
         # Normalize package name (handle both hyphen and underscore)
+        python_package_name = self.alias_for(package_name)
         if "-" in package_name:
-            python_package_name = package_name.replace("-", "_")
             original_name = package_name
         else:
-            python_package_name = package_name
             # Try to find original name with hyphen
             potential_original = package_name.replace("_", "-")
             if os.path.exists(os.path.join(self.custom_nodes_path, potential_original)):
@@ -142,7 +188,11 @@ class CustomNodeLoader:
         parts = full_module_name.split('.')
         for i in range(1, len(parts)):
             parent_name = '.'.join(parts[:i])
-            if parent_name not in sys.modules:
+            if parent_name in sys.modules:
+                continue
+            with module_import_lock(parent_name):
+                if parent_name in sys.modules:
+                    continue
                 # Create a dummy module/package
                 module = type(sys)(parent_name)
                 # Try to determine path if it's within our package
@@ -154,7 +204,7 @@ class CustomNodeLoader:
                     parent_path = package_path
                 
                 module.__path__ = [parent_path]
-                if os.path.exists(os.path.join(parent_path, "__init__.py")):
+                if self._finder.has_file(parent_path, "__init__.py"):
                     module.__file__ = os.path.join(parent_path, "__init__.py")
                 
                 sys.modules[parent_name] = module
@@ -174,16 +224,7 @@ class CustomNodeLoader:
         python_package_name = self.load_custom_node_package(package_name)
         package_path = self._loaded_packages[python_package_name].__path__[0]
         
-        # Convert module path to Python import path
-        if "/" in module_path:
-            module_parts = module_path.split("/")
-        else:
-            module_parts = [module_path]
-        
-        # Remove .py extension if present
-        if module_parts[-1].endswith(".py"):
-            module_parts[-1] = module_parts[-1][:-3]
-        
+        module_parts = _module_parts(module_path)
         full_module_name = f"{python_package_name}.{'.'.join(module_parts)}"
         
         # Ensure parent modules exist
@@ -191,25 +232,16 @@ class CustomNodeLoader:
         
         # Try to load the module
         try:
-            if full_module_name in sys.modules:
-                module = sys.modules[full_module_name]
-            else:
-                # Load submodule
-                module_file = os.path.join(package_path, *module_parts) + ".py"
-                
-                if not os.path.exists(module_file):
-                    # Try index file
-                    module_file = os.path.join(package_path, *module_parts, "__init__.py")
-                    if not os.path.exists(module_file):
-                        raise FileNotFoundError(f"Module file not found: {module_file}")
-                
-                spec = importlib.util.spec_from_file_location(full_module_name, module_file)
-                module = importlib.util.module_from_spec(spec)
-                # Set __package__ to the parent module's name
-                module.__package__ = '.'.join(full_module_name.split('.')[:-1])
-                module.__name__ = full_module_name
-                sys.modules[full_module_name] = module
-                spec.loader.exec_module(module)
+            module = sys.modules.get(full_module_name)
+            if module is None or _initializing(module):
+                # Resolve <module>.py or <module>/__init__.py from the cached listing
+                parent_path = os.path.join(package_path, *module_parts[:-1])
+                spec = self._finder.find_spec(full_module_name, [parent_path])
+                if spec is None or spec.loader is None:
+                    raise FileNotFoundError(
+                        f"Module file not found: {os.path.join(package_path, *module_parts)}.py"
+                    )
+                module = self._exec_spec(spec)
         except Exception as e:
             raise ImportError(
                 f"Failed to import module {full_module_name} from package {package_name}: {e}"
@@ -222,18 +254,149 @@ class CustomNodeLoader:
                 f"Class {class_name} not found in module {full_module_name}"
             )
         
-        return getattr(module, class_name)
+        return apply_class_hooks(getattr(module, class_name))
+    
+    def module_name_for(self, package_name: str, module_path: str) -> str:
+        """
+        Get the full Python module name import_from_custom_node() uses for a module.
+        
+        Args:
+            package_name: Name of the package (e.g., "ComfyUI-KJNodes")
+            module_path: Path to the module relative to package root (e.g., "nodes/image_nodes")
+            
+        Returns:
+            Full module name (e.g., "ComfyUI_KJNodes.nodes.image_nodes")
+        """
+        python_package_name = self.load_custom_node_package(package_name)
+        return f"{python_package_name}.{'.'.join(_module_parts(module_path))}"
+    
+    def import_from_file(self, package_path: str, full_module_name: str, module_file: str, class_name: str):
+        """
+        Import a class from an already resolved module file.
+        
+        Used by startup snapshots (see qabbit_wrapper.snapshot): the package directory,
+        module name and file recorded by an earlier import_from_custom_node() are used
+        as-is, skipping the package name variants and file probing.
+        
+        Args:
+            package_path: Path to the package directory (e.g., ".../custom_nodes/ComfyUI-KJNodes")
+            full_module_name: Full module name (e.g., "ComfyUI_KJNodes.nodes.image_nodes")
+            module_file: Path of the module's .py file (or its __init__.py)
+            class_name: Name of the class to import
+            
+        Returns:
+            The imported class
+        """
+        python_package_name = full_module_name.partition(".")[0]
+        if python_package_name not in self._loaded_packages:
+            self._create_package_alias(os.path.basename(package_path), package_path)
+        self._ensure_parent_modules(full_module_name, package_path)
+        
+        try:
+            module = sys.modules.get(full_module_name)
+            if module is None or _initializing(module):
+                search_locations = None
+                if os.path.basename(module_file) == "__init__.py":
+                    search_locations = [os.path.dirname(module_file)]
+                spec = importlib.util.spec_from_file_location(
+                    full_module_name, module_file,
+                    loader=source_loader(full_module_name, module_file),
+                    submodule_search_locations=search_locations
+                )
+                module = self._exec_spec(spec)
+        except Exception as e:
+            raise ImportError(f"Failed to import module {full_module_name} from {module_file}: {e}")
+        
+        if not hasattr(module, class_name):
+            raise AttributeError(
+                f"Class {class_name} not found in module {full_module_name}"
+            )
+        
+        return apply_class_hooks(getattr(module, class_name))
+
+
+def module_import_lock(name: str):
+    """
+    Return a context manager holding the per-module import lock for ``name``.
+    
+    This is the lock the import system itself takes (with its deadlock detection), so
+    the loader and ordinary imports of the same module exclude each other.
+    """
+    manager = getattr(importlib._bootstrap, "_ModuleLockManager", None)
+    if manager is not None:
+        return manager(name)
+    # Fallback for interpreters without importlib's lock manager
+    with _fallback_locks_guard:
+        lock = _fallback_locks.get(name)
+        if lock is None:
+            lock = _fallback_locks[name] = threading.RLock()
+        return lock
+
+
+_fallback_locks: Dict[str, threading.RLock] = {}
+_fallback_locks_guard = threading.Lock()
+
+
+# Callables applied to every class the loader returns (e.g. tracing instrumentation)
+_class_hooks: List[Any] = []
+
+
+def add_class_hook(hook) -> None:
+    """
+    Register a callable applied to every node class returned by the loader.
+    
+    The hook receives the class and must return it (possibly modified in place).
+    Registering the same hook twice has no effect.
+    """
+    if hook not in _class_hooks:
+        _class_hooks.append(hook)
+
+
+def remove_class_hook(hook) -> None:
+    """Unregister a hook added with add_class_hook()."""
+    if hook in _class_hooks:
+        _class_hooks.remove(hook)
+
+
+def apply_class_hooks(node_class):
+    """Run the registered class hooks on a node class and return it."""
+    for hook in list(_class_hooks):
+        node_class = hook(node_class)
+    return node_class
+
+
+def _initializing(module) -> bool:
+    """Whether a module in sys.modules is still being executed (by another thread)."""
+    return getattr(getattr(module, "__spec__", None), "_initializing", False)
+
+
+def _module_parts(module_path: str) -> List[str]:
+    """Split a module path such as "nodes/image_nodes.py" into ["nodes", "image_nodes"]."""
+    module_parts = module_path.split("/")
+    # Remove .py extension if present
+    if module_parts[-1].endswith(".py"):
+        module_parts[-1] = module_parts[-1][:-3]
+    return module_parts
 
 
 # Global loader instance
 _loader: Optional[CustomNodeLoader] = None
+_loader_lock = threading.Lock()
+
+# Loader of the environment active in the current thread / task (see qabbit_wrapper.environment)
+_active_loader: ContextVar[Optional[CustomNodeLoader]] = ContextVar("qabbit_active_loader", default=None)
 
 
 def get_loader() -> CustomNodeLoader:
-    """Get or create the global custom node loader."""
+    """Get the loader of the active environment, or create the global custom node loader."""
     global _loader
+    active = _active_loader.get()
+    if active is not None:
+        return active
     if _loader is None:
-        _loader = CustomNodeLoader()
+        with _loader_lock:
+            if _loader is None:
+                _loader = CustomNodeLoader()
     return _loader
 
 
@@ -0,0 +1,222 @@
+"""
+Environment module - several custom node trees / versions side by side in one process.
+
+An environment owns a ComfyUI root, a CustomNodeLoader and a namespaced module registry:
+its package aliases carry the environment's name (``ComfyUI_KJNodes__v2`` in environment
+"v2"), so two versions of a custom node package, from two ComfyUI trees or two copies of
+the package, load side by side without replacing each other in ``sys.modules``.
+Relative imports inside the packages resolve within the environment's aliases.
+
+Everything else is shared: torch, transformers and the other third-party modules are
+imported once for all environments, and so are the ComfyUI core modules (``comfy``,
+``folder_paths``, ``nodes``, ``comfy_extras``) of the root passed to init_comfy(). Custom
+nodes import those by absolute name, so every environment's custom nodes run against the
+process's ComfyUI core; an environment on another tree contributes that tree's
+``custom_nodes`` directory. Trees needing a different ComfyUI core version have to run in
+another process (see qabbit_wrapper.isolation / worker_pool).
+
+Inside ``with env:`` (per thread / asyncio task) get_loader() returns the environment's
+loader, so get_custom_node(), load_nodes(), CustomNodePackage, LazyNodeRegistry,
+startup snapshots and hot reload all work on the environment unchanged.
+
+Usage:
+    from qabbit_wrapper import init_comfy
+    from qabbit_wrapper.environment import create_environment
+
+    init_comfy("/opt/ComfyUI")                              # core modules, shared
+    stable = create_environment("stable")                   # /opt/ComfyUI/custom_nodes
+    candidate = create_environment("candidate", "/opt/ComfyUI-next")
+
+    A = stable.get_custom_node("ComfyUI-KJNodes", "nodes/image_nodes", "ImageResizeKJv2")
+    B = candidate.get_custom_node("ComfyUI-KJNodes", "nodes/image_nodes", "ImageResizeKJv2")
+    assert A is not B       # ComfyUI_KJNodes__stable... vs ComfyUI_KJNodes__candidate...
+
+    with candidate:
+        nodes = load_nodes("nodes_config.json")           # from the candidate tree
+
+    candidate.close()                                       # drop its modules
+"""
+
+import os
+import sys
+import threading
+import contextvars
+from typing import Optional, Dict, Any, List
+
+from .core import ensure_initialized, get_comfy_root
+from .custom_nodes_logic import CustomNodeLoader, _active_loader
+
+
+# (environment, _active_loader token) of the open "with env:" blocks, innermost last.
+# A context variable, so threads and asyncio tasks each have their own stack.
+_entered: contextvars.ContextVar = contextvars.ContextVar("qabbit_entered_environments", default=())
+
+
+class ComfyEnvironment:
+    """A ComfyUI root with its own custom node loader and package aliases."""
+
+    def __init__(self, name: str, comfy_root: Optional[str] = None):
+        """
+        Initialize an environment (use create_environment() to register it by name).
+
+        Args:
+            name: Environment name, used as the alias suffix (a Python identifier)
+            comfy_root: ComfyUI root whose custom_nodes directory is used. Defaults to
+                        the root passed to init_comfy().
+        """
+        if not name.isidentifier():
+            raise ValueError(f"Environment name must be a Python identifier, got {name!r}")
+        ensure_initialized()
+        comfy_root = os.path.abspath(comfy_root or get_comfy_root())
+        if not os.path.isdir(comfy_root):
+            raise ValueError(f"ComfyUI root directory does not exist: {comfy_root}")
+        self.name = name
+        self.comfy_root = comfy_root
+        self.loader = CustomNodeLoader(comfy_root, namespace=name)
+        self.closed = False
+
+    def __enter__(self) -> "ComfyEnvironment":
+        self._check_open()
+        _entered.set(_entered.get() + ((self, _active_loader.set(self.loader)),))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        entered = _entered.get()
+        if not entered or entered[-1][0] is not self:
+            raise RuntimeError(f"Environment {self.name!r} exited out of order or in another context")
+        _entered.set(entered[:-1])
+        _active_loader.reset(entered[-1][1])
+
+    def _check_open(self) -> None:
+        if self.closed:
+            raise RuntimeError(f"Environment {self.name!r} is closed")
+
+    def alias_for(self, package_name: str) -> str:
+        """Python alias of a package in this environment (e.g. "ComfyUI_KJNodes__v2")."""
+        return self.loader.alias_for(package_name)
+
+    def load_custom_node(self, package_name: str) -> str:
+        """Load a custom node package; returns its alias in this environment."""
+        self._check_open()
+        return self.loader.load_custom_node_package(package_name)
+
+    def get_custom_node(self, package_name: str, module_path: str, class_name: str):
+        """Get a node class of a custom node package, as get_custom_node() does."""
+        self._check_open()
+        return self.loader.import_from_custom_node(package_name, module_path, class_name)
+
+    def package(self, package_name: str):
+        """Get a CustomNodePackage bound to this environment."""
+        from .custom_nodes import CustomNodePackage
+
+        self._check_open()
+        return CustomNodePackage(package_name, isolated=False, loader=self.loader)
+
+    def load_nodes(self, config, workers: Optional[int] = None, lockfile: Optional[str] = None) -> Dict[str, Any]:
+        """Load the nodes of a config from this environment (see load_nodes())."""
+        from .custom_nodes import load_nodes
+
+        with self:
+            return load_nodes(config, workers=workers, lockfile=lockfile)
+
+    def lazy_nodes(self, config):
+        """Create a LazyNodeRegistry resolving its classes in this environment."""
+        from .custom_nodes import LazyNodeRegistry
+
+        with self:
+            return LazyNodeRegistry(config)
+
+    def reload(self, package_name: Optional[str] = None) -> List[str]:
+        """Reload the changed modules of this environment's packages (see qabbit_wrapper.hot_reload)."""
+        from .hot_reload import get_reloader
+
+        self._check_open()
+        return get_reloader(self.loader).reload(package_name)
+
+    def modules(self) -> Dict[str, Any]:
+        """The modules loaded in this environment (its package aliases and their submodules)."""
+        aliases = tuple(self.loader._loaded_packages)
+        prefixes = tuple(f"{alias}." for alias in aliases)
+        return {
+            name: module for name, module in list(sys.modules.items())
+            if name in aliases or name.startswith(prefixes)
+        }
+
+    def close(self) -> None:
+        """
+        Remove this environment's modules from sys.modules and unregister it.
+
+        Classes already handed out keep working; the modules are freed once nothing
+        refers to them anymore.
+        """
+        from . import hot_reload
+
+        if self.closed:
+            return
+        finder = self.loader._finder
+        with self.loader._lock:
+            for name in self.modules():
+                sys.modules.pop(name, None)
+            for alias in list(self.loader._loaded_packages):
+                finder.unregister(alias)
+            self.loader._loaded_packages.clear()
+            self.loader._loaded_modules.clear()
+        with hot_reload._reloaders_lock:
+            hot_reload._reloaders.pop(self.loader, None)
+        with _environments_lock:
+            if _environments.get(self.name) is self:
+                del _environments[self.name]
+        self.closed = True
+
+    def __repr__(self):
+        state = "closed" if self.closed else f"{len(self.loader._loaded_packages)} packages"
+        return f"ComfyEnvironment({self.name!r}, {self.comfy_root!r}, {state})"
+
+
+# Registered environments
+_environments: Dict[str, ComfyEnvironment] = {}
+_environments_lock = threading.Lock()
+
+
+def create_environment(name: str, comfy_root: Optional[str] = None) -> ComfyEnvironment:
+    """
+    Create and register an environment.
+
+    Args:
+        name: Environment name (a Python identifier, unique in the process)
+        comfy_root: ComfyUI root whose custom_nodes directory is used. Defaults to the
+                    root passed to init_comfy().
+
+    Returns:
+        ComfyEnvironment
+    """
+    with _environments_lock:
+        if name in _environments:
+            raise ValueError(f"Environment {name!r} already exists")
+        environment = _environments[name] = ComfyEnvironment(name, comfy_root)
+    return environment
+
+
+def get_environment(name: str) -> ComfyEnvironment:
+    """Get a registered environment by name."""
+    try:
+        return _environments[name]
+    except KeyError:
+        raise KeyError(f"No environment named {name!r}") from None
+
+
+def list_environments() -> List[ComfyEnvironment]:
+    """List the registered environments."""
+    with _environments_lock:
+        return list(_environments.values())
+
+
+def current_environment() -> Optional[ComfyEnvironment]:
+    """The environment active in this thread / task, or None for the global loader."""
+    loader = _active_loader.get()
+    if loader is None:
+        return None
+    for environment in list_environments():
+        if environment.loader is loader:
+            return environment
+    return None
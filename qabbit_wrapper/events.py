@@ -0,0 +1,381 @@
+"""
+Event bus module - delivers the events nodes send through PromptServer to listeners.
+
+In script mode there is no web server, so ``PromptServer.instance.send_sync()`` (progress,
+previews, executing/executed messages, custom node messages) goes to this bus instead.
+Publishing never blocks: events go into a bounded queue that drops the oldest event
+when full, and a background thread hands them to the listeners. Nothing is queued
+while no listener is subscribed.
+
+Preview images are passed through as the raw payload; ``Event.image`` decodes (or
+resizes) them only when a listener asks for it, on the dispatch thread.
+
+Usage:
+    from qabbit_wrapper.events import get_event_bus, LogListener, JsonlListener
+
+    bus = get_event_bus()
+    bus.subscribe(LogListener())
+    bus.subscribe(JsonlListener("events.jsonl"), event_types=["progress", "executed"])
+    ...
+    bus.seconds_since_last_event()   # tell a slow sampler from a hung one
+"""
+
+import io
+import json
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List, Callable, Iterable
+
+
+DEFAULT_MAX_EVENTS = 1024
+
+# ComfyUI's server.BinaryEventTypes
+BINARY_EVENT_NAMES = {
+    1: "preview_image",
+    2: "unencoded_preview_image",
+    3: "text",
+    4: "preview_image_with_metadata",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class Event:
+    """One message sent through PromptServer.send_sync()."""
+
+    __slots__ = ("type", "data", "sid", "timestamp", "_image")
+
+    def __init__(self, event_type, data, sid: Optional[str] = None):
+        self.type: str = BINARY_EVENT_NAMES.get(event_type, str(event_type))
+        self.data = data
+        self.sid = sid
+        self.timestamp = time.time()
+        self._image = None
+
+    @property
+    def is_preview(self) -> bool:
+        return self.type in ("preview_image", "unencoded_preview_image", "preview_image_with_metadata")
+
+    @property
+    def image(self):
+        """
+        The preview as a PIL image, decoded on first access (None for other events).
+
+        Accepts the payloads ComfyUI sends: encoded image bytes (optionally prefixed
+        with the 8 byte binary event header), or an (image format, PIL image, max size)
+        tuple, which is resized to max size.
+        """
+        if self._image is None and self.is_preview:
+            self._image = _decode_preview(self.data)
+        return self._image
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form; preview payloads are summarized, not encoded."""
+        if self.is_preview:
+            try:
+                image = self.image
+            except Exception:
+                # Undecodable payload, or PIL is not installed
+                image = None
+            data = {"size": list(image.size)} if image is not None else None
+        else:
+            data = _jsonable(self.data)
+        return {"type": self.type, "timestamp": self.timestamp, "sid": self.sid, "data": data}
+
+    def __repr__(self):
+        return f"Event({self.type!r}, t={self.timestamp:.3f})"
+
+
+def _decode_preview(data):
+    from PIL import Image
+
+    if isinstance(data, dict) and "image" in data:
+        # preview_image_with_metadata
+        data = data["image"]
+    if isinstance(data, (tuple, list)) and len(data) >= 2:
+        image = data[1]
+        max_size = data[2] if len(data) > 2 else None
+        if max_size and hasattr(image, "resize") and max(image.size) > max_size:
+            scale = max_size / max(image.size)
+            image = image.resize((round(image.size[0] * scale), round(image.size[1] * scale)))
+        return image
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data)
+        try:
+            return Image.open(io.BytesIO(data))
+        except Exception:
+            # Skip the binary websocket header (event type + image type)
+            return Image.open(io.BytesIO(data[8:]))
+    return data if hasattr(data, "size") else None
+
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        pass
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return repr(value)
+
+
+class EventBus:
+    """Bounded, drop-oldest event queue with a background dispatch thread."""
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS):
+        """
+        Initialize an event bus.
+
+        Args:
+            max_events: Queue capacity. When full, the oldest queued event is dropped.
+        """
+        self.max_events = max_events
+        self._queue: deque = deque(maxlen=max_events)
+        self._cond = threading.Condition()
+        self._listeners: List[tuple] = []
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._in_flight = 0
+        self._last_event_time: Optional[float] = None
+        self._stats = {"published": 0, "delivered": 0, "dropped": 0, "listener_errors": 0}
+
+    # ---- listeners ------------------------------------------------------------------
+
+    def subscribe(self, listener: Callable[[Event], Any], event_types: Optional[Iterable[str]] = None):
+        """
+        Call ``listener(event)`` on the dispatch thread for each event.
+
+        Args:
+            listener: Callable taking an Event
+            event_types: Only deliver these event types (e.g. ["progress"]). None means all.
+
+        Returns:
+            The listener, so it can be passed to unsubscribe()
+        """
+        types = frozenset(event_types) if event_types is not None else None
+        with self._cond:
+            self._listeners.append((listener, types))
+            if self._thread is None or not self._thread.is_alive():
+                self._closed = False
+                self._thread = threading.Thread(target=self._dispatch, name="qabbit-events", daemon=True)
+                self._thread.start()
+        install_progress_hook()
+        return listener
+
+    def unsubscribe(self, listener) -> None:
+        """Stop delivering events to a listener."""
+        with self._cond:
+            self._listeners = [(l, t) for l, t in self._listeners if l is not listener]
+
+    # ---- publishing -----------------------------------------------------------------
+
+    def publish(self, event_type, data=None, sid: Optional[str] = None) -> None:
+        """Queue an event without blocking. Dropped if no listener is subscribed."""
+        self._last_event_time = time.monotonic()
+        if not self._listeners:
+            return
+        event = Event(event_type, data, sid)
+        with self._cond:
+            if len(self._queue) == self.max_events:
+                self._stats["dropped"] += 1
+            self._queue.append(event)
+            self._stats["published"] += 1
+            self._cond.notify()
+
+    def seconds_since_last_event(self) -> Optional[float]:
+        """Seconds since a node last sent anything, or None if nothing was sent yet."""
+        if self._last_event_time is None:
+            return None
+        return time.monotonic() - self._last_event_time
+
+    # ---- dispatching ----------------------------------------------------------------
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                event = self._queue.popleft()
+                self._in_flight += 1
+                listeners = list(self._listeners)
+            for listener, types in listeners:
+                if types is not None and event.type not in types:
+                    continue
+                try:
+                    listener(event)
+                    self._stats["delivered"] += 1
+                except Exception:
+                    self._stats["listener_errors"] += 1
+                    logger.exception("Event listener %r failed on %r", listener, event)
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued event has been delivered.
+
+        Returns:
+            False if the timeout expired first
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._in_flight, timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Deliver the queued events, then stop the dispatch thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return published/delivered/dropped counters and the current queue length."""
+        with self._cond:
+            return {**self._stats, "queued": len(self._queue), "listeners": len(self._listeners)}
+
+
+class LogListener:
+    """Logs progress and execution events (previews are only counted)."""
+
+    def __init__(self, log: Optional[logging.Logger] = None, level: int = logging.INFO):
+        self.log = log or logger
+        self.level = level
+        self.previews = 0
+
+    def __call__(self, event: Event) -> None:
+        if event.is_preview:
+            self.previews += 1
+            return
+        data = event.data
+        if event.type == "progress" and isinstance(data, dict):
+            self.log.log(self.level, "progress %s/%s (node %s)", data.get("value"), data.get("max"), data.get("node"))
+        else:
+            self.log.log(self.level, "%s: %s", event.type, _jsonable(data))
+
+
+class JsonlListener:
+    """Appends one JSON object per event to a file."""
+
+    def __init__(self, path: str, include_previews: bool = False):
+        """
+        Args:
+            path: Output file (appended to)
+            include_previews: Also write preview events (as their image size)
+        """
+        self.path = path
+        self.include_previews = include_previews
+        self._file = open(path, "a", buffering=1)
+
+    def __call__(self, event: Event) -> None:
+        if event.is_preview and not self.include_previews:
+            return
+        self._file.write(json.dumps(event.to_dict()) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class QueueListener:
+    """
+    Local stand-in for a websocket client: events are put on a queue the consumer reads.
+
+    Usage:
+        client = bus.subscribe(QueueListener())
+        for event in client.iter(timeout=1.0):
+            ...
+    """
+
+    def __init__(self, maxsize: int = 0):
+        self.queue: "queue.Queue[Event]" = queue.Queue(maxsize)
+
+    def __call__(self, event: Event) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            pass
+
+    def iter(self, timeout: Optional[float] = None):
+        """Yield events until none arrives within ``timeout`` seconds."""
+        while True:
+            try:
+                yield self.queue.get(timeout=timeout)
+            except queue.Empty:
+                return
+
+
+def chain_progress_hook(hook: Callable) -> bool:
+    """
+    Add a comfy.utils.ProgressBar hook, called before the one already installed (if any).
+
+    The hook is called with (value, total, preview_image, prompt_id, node_id) on the
+    thread that runs the node.
+
+    Returns:
+        False if comfy.utils cannot be imported (ComfyUI not initialized)
+    """
+    try:
+        import comfy.utils
+    except ImportError:
+        return False
+    previous = getattr(comfy.utils, "PROGRESS_BAR_HOOK", None)
+
+    def chained(value, total, preview_image, prompt_id=None, node_id=None):
+        hook(value, total, preview_image, prompt_id, node_id)
+        if previous is None:
+            return
+        if prompt_id is None and node_id is None:
+            # Hooks of older ComfyUI versions only take three arguments
+            previous(value, total, preview_image)
+        else:
+            previous(value, total, preview_image, prompt_id=prompt_id, node_id=node_id)
+
+    comfy.utils.set_progress_bar_global_hook(chained)
+    return True
+
+
+_hook_installed = False
+_hook_lock = threading.Lock()
+
+
+def install_progress_hook() -> bool:
+    """
+    Route comfy.utils.ProgressBar updates (sampler steps and previews) to the bus, like
+    ComfyUI's server does. Hooks installed earlier keep being called.
+
+    Returns:
+        True if the hook is installed
+    """
+    global _hook_installed
+
+    def hook(value, total, preview_image, prompt_id=None, node_id=None):
+        bus = get_event_bus()
+        bus.publish("progress", {"value": value, "max": total, "prompt_id": prompt_id, "node": node_id})
+        if preview_image is not None:
+            bus.publish("unencoded_preview_image", preview_image)
+
+    with _hook_lock:
+        if not _hook_installed:
+            _hook_installed = chain_progress_hook(hook)
+        return _hook_installed
+
+
+# Global event bus instance
+_bus: Optional[EventBus] = None
+
+
+def get_event_bus() -> EventBus:
+    """Get or create the global event bus."""
+    global _bus
+    if _bus is None:
+        _bus = EventBus()
+    return _bus
@@ -0,0 +1,342 @@
+"""
+Graph executor module - chain node calls and re-run only what changed.
+
+A graph is either a ComfyUI API-format prompt::
+
+    {
+        "1": {"class_type": "LoadImage", "inputs": {"image": "input.png"}},
+        "2": {"class_type": "ImageResizeKJv2", "inputs": {"image": ["1", 0], "width": 512, ...}},
+    }
+
+or built in Python with node classes (e.g. loaded via load_nodes())::
+
+    graph = Graph()
+    image = graph.add(LoadImage, image="input.png")
+    resized = graph.add(ImageResizeKJv2, image=image[0], width=512, ...)
+
+The executor reads each class's INPUT_TYPES / FUNCTION / RETURN_TYPES, orders the nodes
+topologically and runs them. Node instances and outputs are kept between runs; a node is
+executed again only if its class, its literal inputs, its IS_CHANGED result or one of its
+upstream nodes changed. Changing the seed of a sampler therefore re-runs the sampler and
+what follows it, not the model loaders before it.
+
+Usage:
+    executor = GraphExecutor(load_nodes("nodes_config.json"))
+    outputs = executor.run(prompt)
+    outputs["2"]          # tuple returned by node "2"
+    executor.last_run     # {"executed": [...], "cached": [...]}
+"""
+
+import math
+import itertools
+from typing import Optional, Dict, Any, List, Tuple
+
+from .node_cache import hash_inputs, UnhashableInput
+
+
+def _is_link(value) -> bool:
+    """API-format links are [node_id, output_index] pairs."""
+    return (
+        isinstance(value, (list, tuple)) and len(value) == 2
+        and isinstance(value[0], str) and isinstance(value[1], int)
+    )
+
+
+def _value_key(value):
+    """Build a hashable key for a literal input value."""
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(_value_key(v) for v in value)
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted((str(k), _value_key(v)) for k, v in value.items()))
+    # Tensors / arrays are compared by content, other objects (models) by identity
+    try:
+        return ("content", hash_inputs(value))
+    except UnhashableInput:
+        return _Identity(value)
+
+
+class _Identity:
+    """Key comparing an object by identity; holds the object so its id cannot be reused."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, _Identity) and other.value is self.value
+
+    def __hash__(self):
+        return id(self.value)
+
+
+class NodeOutput:
+    """Reference to one output of a node in a Graph; used as an input of another node."""
+
+    def __init__(self, node_id: str, index: int):
+        self.node_id = node_id
+        self.index = index
+
+    def to_link(self) -> list:
+        return [self.node_id, self.index]
+
+
+class NodeRef:
+    """Handle returned by Graph.add(); index it to refer to an output (``ref[0]``)."""
+
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+
+    def __getitem__(self, index: int) -> NodeOutput:
+        return NodeOutput(self.node_id, index)
+
+
+class Graph:
+    """A graph of node classes built in Python."""
+
+    def __init__(self):
+        self._nodes: Dict[str, Tuple[type, Dict[str, Any]]] = {}
+
+    def add(self, node_class: type, node_id: Optional[str] = None, **inputs) -> NodeRef:
+        """
+        Add a node to the graph.
+
+        Args:
+            node_class: Node class (e.g. ImageResizeKJv2)
+            node_id: Optional stable id. Defaults to the insertion index.
+            **inputs: Literal values or outputs of other nodes (``ref[0]``)
+
+        Returns:
+            NodeRef for linking this node's outputs
+        """
+        node_id = str(node_id if node_id is not None else len(self._nodes) + 1)
+        if node_id in self._nodes:
+            raise ValueError(f"Duplicate node id: {node_id}")
+        self._nodes[node_id] = (node_class, inputs)
+        return NodeRef(node_id)
+
+    def to_prompt(self) -> Tuple[Dict[str, Any], Dict[str, type]]:
+        """
+        Convert to an API-format prompt.
+
+        Returns:
+            (prompt, node_classes) where node_classes maps each class_type to its class
+        """
+        prompt = {}
+        node_classes = {}
+        for node_id, (node_class, inputs) in self._nodes.items():
+            class_type = node_class.__name__
+            node_classes[class_type] = node_class
+            prompt[node_id] = {
+                "class_type": class_type,
+                "inputs": {
+                    name: value.to_link() if isinstance(value, NodeOutput) else value
+                    for name, value in inputs.items()
+                },
+            }
+        return prompt, node_classes
+
+
+class GraphExecutor:
+    """Executes graphs in-process and caches node outputs between runs."""
+
+    def __init__(self, node_classes: Optional[Dict[str, type]] = None):
+        """
+        Initialize a graph executor.
+
+        Args:
+            node_classes: Mapping of class_type to node class, e.g. the result of
+                          load_nodes() or a LazyNodeRegistry. Classes not found here are
+                          looked up in ComfyUI's NODE_CLASS_MAPPINGS.
+        """
+        self.node_classes = node_classes if node_classes is not None else {}
+        # Classes registered by Graph objects passed to run()
+        self._graph_classes: Dict[str, type] = {}
+        # node_id -> (signature, outputs, number of the run that executed the node)
+        self._cache: Dict[str, Tuple[Any, tuple, int]] = {}
+        self._runs = itertools.count(1)
+        self._instances: Dict[str, Tuple[type, Any]] = {}
+        self.last_run: Dict[str, List[str]] = {"executed": [], "cached": []}
+
+    def _get_class(self, class_type: str) -> type:
+        if class_type in self._graph_classes:
+            return self._graph_classes[class_type]
+        if class_type in self.node_classes:
+            return self.node_classes[class_type]
+        import nodes
+        mappings = getattr(nodes, "NODE_CLASS_MAPPINGS", {})
+        if class_type in mappings:
+            return mappings[class_type]
+        if hasattr(nodes, class_type):
+            return getattr(nodes, class_type)
+        raise KeyError(f"Unknown node class: {class_type}")
+
+    def _get_instance(self, node_id: str, node_class: type):
+        cached = self._instances.get(node_id)
+        if cached is None or cached[0] is not node_class:
+            cached = self._instances[node_id] = (node_class, node_class())
+        return cached[1]
+
+    @staticmethod
+    def _topological_order(prompt: Dict[str, Any]) -> List[str]:
+        """Order node ids so each node comes after the nodes it links to (Kahn's algorithm)."""
+        dependencies = {}
+        for node_id, node in prompt.items():
+            deps = set()
+            for name, value in node.get("inputs", {}).items():
+                if _is_link(value):
+                    if value[0] not in prompt:
+                        raise ValueError(f"Node {node_id} input '{name}' links to missing node {value[0]}")
+                    deps.add(value[0])
+            dependencies[node_id] = deps
+
+        order = []
+        ready = sorted((n for n, deps in dependencies.items() if not deps), key=_sort_key)
+        remaining = {n: set(deps) for n, deps in dependencies.items() if deps}
+        while ready:
+            node_id = ready.pop(0)
+            order.append(node_id)
+            newly_ready = []
+            for other, deps in list(remaining.items()):
+                deps.discard(node_id)
+                if not deps:
+                    del remaining[other]
+                    newly_ready.append(other)
+            ready = sorted(ready + newly_ready, key=_sort_key)
+        if remaining:
+            raise ValueError(f"Graph contains a cycle involving nodes: {sorted(remaining, key=_sort_key)}")
+        return order
+
+    @staticmethod
+    def _required_upstream(prompt: Dict[str, Any], targets: List[str]) -> set:
+        needed = set()
+        stack = list(targets)
+        while stack:
+            node_id = stack.pop()
+            if node_id in needed:
+                continue
+            if node_id not in prompt:
+                raise KeyError(f"Unknown output node: {node_id}")
+            needed.add(node_id)
+            for value in prompt[node_id].get("inputs", {}).values():
+                if _is_link(value):
+                    stack.append(value[0])
+        return needed
+
+    def _validate(self, node_id: str, node_class: type, inputs: Dict[str, Any],
+                  prompt: Dict[str, Any]) -> None:
+        """Check required inputs and link types against INPUT_TYPES / RETURN_TYPES."""
+        input_types = node_class.INPUT_TYPES() if hasattr(node_class, "INPUT_TYPES") else {}
+        required = input_types.get("required", {})
+        declared = {**required, **input_types.get("optional", {})}
+        for name in required:
+            if name not in inputs:
+                raise ValueError(f"Node {node_id} ({node_class.__name__}) is missing required input '{name}'")
+        for name, value in inputs.items():
+            if not _is_link(value) or name not in declared:
+                continue
+            expected = declared[name][0] if declared[name] else None
+            source_class = self._get_class(prompt[value[0]]["class_type"])
+            return_types = getattr(source_class, "RETURN_TYPES", ())
+            if value[1] >= len(return_types):
+                raise ValueError(
+                    f"Node {node_id} input '{name}' links to output {value[1]} of node {value[0]}, "
+                    f"which only has {len(return_types)} outputs"
+                )
+            actual = return_types[value[1]]
+            if (isinstance(expected, str) and isinstance(actual, str)
+                    and "*" not in (expected, actual) and expected != actual):
+                raise ValueError(
+                    f"Node {node_id} input '{name}' expects {expected} but node {value[0]} "
+                    f"output {value[1]} is {actual}"
+                )
+
+    def run(self, graph, outputs: Optional[List[str]] = None) -> Dict[str, tuple]:
+        """
+        Execute a graph, reusing cached outputs of unchanged nodes.
+
+        Args:
+            graph: API-format prompt dict or a Graph
+            outputs: Node ids whose results are needed. If None, every node is evaluated;
+                     otherwise only these nodes and their upstream nodes are.
+
+        Returns:
+            dict: node_id -> tuple of outputs, for every evaluated node
+        """
+        if isinstance(graph, Graph):
+            prompt, classes = graph.to_prompt()
+            self._graph_classes.update(classes)
+        else:
+            prompt = graph
+
+        order = self._topological_order(prompt)
+        if outputs is not None:
+            needed = self._required_upstream(prompt, [str(o) for o in outputs])
+            order = [node_id for node_id in order if node_id in needed]
+
+        # Forget nodes that are no longer part of the graph
+        for node_id in list(self._cache):
+            if node_id not in prompt:
+                del self._cache[node_id]
+                self._instances.pop(node_id, None)
+
+        results: Dict[str, tuple] = {}
+        # Downstream nodes key on (signature, run number) of their inputs, so a node that
+        # executed again (e.g. IS_CHANGED returned NaN) invalidates what follows it
+        signatures: Dict[str, Any] = {}
+        run_number = next(self._runs)
+        self.last_run = {"executed": [], "cached": []}
+        for node_id in order:
+            node = prompt[node_id]
+            node_class = self._get_class(node["class_type"])
+            inputs = node.get("inputs", {})
+            self._validate(node_id, node_class, inputs, prompt)
+
+            kwargs = {}
+            key_parts = []
+            for name in sorted(inputs):
+                value = inputs[name]
+                if _is_link(value):
+                    kwargs[name] = results[value[0]][value[1]]
+                    key_parts.append((name, "link", signatures[value[0]], value[1]))
+                else:
+                    kwargs[name] = value
+                    key_parts.append((name, _value_key(value)))
+
+            changed = None
+            if hasattr(node_class, "IS_CHANGED"):
+                changed = node_class.IS_CHANGED(**kwargs)
+            signature = (node["class_type"], tuple(key_parts), _value_key(changed))
+
+            cached = self._cache.get(node_id)
+            always_run = isinstance(changed, float) and math.isnan(changed)
+            if cached is not None and cached[0] == signature and not always_run:
+                results[node_id] = cached[1]
+                signatures[node_id] = (signature, cached[2])
+                self.last_run["cached"].append(node_id)
+                continue
+
+            instance = self._get_instance(node_id, node_class)
+            output = getattr(instance, node_class.FUNCTION)(**kwargs)
+            if isinstance(output, dict):
+                # Output nodes may return {"ui": ..., "result": (...)}
+                output = output.get("result", ())
+            output = tuple(output) if output is not None else ()
+            self._cache[node_id] = (signature, output, run_number)
+            results[node_id] = output
+            signatures[node_id] = (signature, run_number)
+            self.last_run["executed"].append(node_id)
+
+        return results
+
+    def clear(self) -> None:
+        """Drop all cached outputs and node instances."""
+        self._cache.clear()
+        self._instances.clear()
+
+
+def _sort_key(node_id: str):
+    # Numeric ids ("2" < "10") first, in numeric order, then others alphabetically
+    return (0, int(node_id), "") if node_id.isdigit() else (1, 0, node_id)
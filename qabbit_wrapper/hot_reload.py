@@ -0,0 +1,382 @@
+"""
+Hot reload module - pick up changed custom node files without restarting the process.
+
+``reload()`` compares each loaded module of the custom node packages with its file on
+disk (the mtime and size recorded when the module was executed), then re-executes only
+the changed modules and the modules that depend on them (modules that import one of them,
+including ``from .helper import VALUE`` imports of plain values, or whose globals refer to
+a class or function defined in one of them), dependencies first.
+
+Class handles that were already returned (by get_custom_node(), load_nodes(), a
+LazyNodeRegistry, ...) stay valid: each class of a reloaded module is updated in place
+with the new definition, and the re-executed modules refer to that same class object,
+so old and new lookups give one class whose methods are the new code. If a module fails
+to re-execute, every module of the reload is put back as it was and ImportError is raised.
+
+Usage:
+    from qabbit_wrapper.hot_reload import reload, watch
+
+    reloaded = reload("ComfyUI-KJNodes")    # ['ComfyUI_KJNodes.nodes.image_nodes', ...]
+
+    watcher = watch(interval=2.0, on_reload=print)   # poll in a background thread
+    ...
+    watcher.stop()
+"""
+
+import os
+import ast
+import sys
+import types
+import contextlib
+import threading
+import importlib.util
+import importlib.machinery
+from typing import Optional, Dict, Any, List, Callable, Iterable
+
+from . import import_finder
+from .import_finder import SourceStatLoader
+from .custom_nodes_logic import get_loader, CustomNodeLoader, module_import_lock, apply_class_hooks
+
+
+# Class attributes that cannot be replaced on an existing class
+_FIXED_CLASS_ATTRIBUTES = frozenset(("__dict__", "__weakref__"))
+
+
+def _file_stat(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size)
+
+
+def _source_file(module) -> Optional[str]:
+    """Source file of a module executed from a .py file, None for alias/namespace modules."""
+    spec = getattr(module, "__spec__", None)
+    origin = getattr(spec, "origin", None)
+    if not origin or not origin.endswith(".py") or not isinstance(spec.loader, importlib.machinery.SourceFileLoader):
+        return None
+    return origin
+
+
+def _imported_modules(module) -> set:
+    """Absolute names of the modules (and possible submodules) a module's source imports."""
+    path = _source_file(module)
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return set()
+    package = getattr(module, "__package__", None) or ""
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                found.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            try:
+                base = importlib.util.resolve_name("." * node.level + (node.module or ""), package)
+            except (ImportError, ValueError):
+                continue
+            found.add(base)
+            # "from package import name" may import the submodule package.name
+            found.update(f"{base}.{alias.name}" for alias in node.names if alias.name != "*")
+    return found
+
+
+def _dependencies(module, names: Iterable[str]) -> set:
+    """Names (among ``names``) of the modules a module imports or whose definitions its globals refer to."""
+    names = set(names)
+    found = _imported_modules(module) & names
+    for value in list(vars(module).values()):
+        if isinstance(value, types.ModuleType):
+            name = value.__name__
+        else:
+            name = getattr(value, "__module__", None) if isinstance(value, (type, types.FunctionType)) else None
+        if name in names:
+            found.add(name)
+    found.discard(module.__name__)
+    return found
+
+
+def _update_class(old: type, new: type) -> bool:
+    """Give ``old`` the attributes of ``new``; return False if it cannot be updated."""
+    if type(old) is not type(new) or getattr(old, "__slots__", None) != getattr(new, "__slots__", None):
+        return False
+    try:
+        for name in list(vars(old)):
+            if name not in _FIXED_CLASS_ATTRIBUTES and name not in vars(new):
+                delattr(old, name)
+        for name, value in vars(new).items():
+            if name not in _FIXED_CLASS_ATTRIBUTES:
+                setattr(old, name, value)
+    except (AttributeError, TypeError):
+        return False
+    # Zero-argument super() in the new methods refers to the new class: point it at the old one
+    for value in vars(new).values():
+        function = getattr(value, "__func__", value)
+        for cell in getattr(function, "__closure__", None) or ():
+            try:
+                if cell.cell_contents is new:
+                    cell.cell_contents = old
+            except ValueError:
+                continue
+    return True
+
+
+class HotReloader:
+    """Finds changed custom node modules and re-executes them with their dependents."""
+
+    def __init__(self, loader: Optional[CustomNodeLoader] = None):
+        """
+        Initialize a hot reloader.
+
+        Args:
+            loader: Custom node loader whose packages are reloaded. Defaults to get_loader().
+        """
+        self.loader = loader or get_loader()
+        # Stats of files that were loaded without being recorded, taken on the first check
+        self._baseline: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def _package_names(self, package_name: Optional[str]) -> List[str]:
+        if package_name is None:
+            return list(self.loader._loaded_packages)
+        return [self.loader.alias_for(package_name)]
+
+    def _modules(self, package_name: Optional[str] = None) -> Dict[str, types.ModuleType]:
+        """Loaded modules of the packages that were executed from source files."""
+        prefixes = tuple(f"{name}." for name in self._package_names(package_name))
+        return {
+            name: module for name, module in list(sys.modules.items())
+            if name.startswith(prefixes) and module is not None and _source_file(module)
+        }
+
+    def _loaded_stat(self, path: str):
+        stat = import_finder.source_stats.get(path)
+        if stat is None:
+            stat = self._baseline.setdefault(path, _file_stat(path))
+        return stat
+
+    def changed_modules(self, package_name: Optional[str] = None) -> List[str]:
+        """
+        List the loaded modules whose source file changed since it was executed.
+
+        Args:
+            package_name: Only check this package (e.g., "ComfyUI-KJNodes"). Defaults to all.
+        """
+        changed = []
+        for name, module in self._modules(package_name).items():
+            path = _source_file(module)
+            if _file_stat(path) != self._loaded_stat(path):
+                changed.append(name)
+        return sorted(changed)
+
+    def reload(self, package_name: Optional[str] = None, modules: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Re-execute changed modules and the modules depending on them.
+
+        Args:
+            package_name: Only reload this package (e.g., "ComfyUI-KJNodes"). Defaults to all.
+            modules: Reload these module names (e.g. "ComfyUI_KJNodes.nodes.image_nodes")
+                     instead of the changed ones
+
+        Returns:
+            list: Names of the re-executed modules, in execution order
+
+        Raises:
+            ImportError: A module failed to execute; all modules are left as they were.
+        """
+        with self._lock:
+            importlib.invalidate_caches()
+            loaded = self._modules(package_name)
+            changed = set(modules) if modules is not None else set(self.changed_modules(package_name))
+            changed &= set(loaded)
+            if not changed:
+                return []
+
+            dependencies = {name: _dependencies(module, loaded) for name, module in loaded.items()}
+            affected = set(changed)
+            grew = True
+            while grew:
+                grew = False
+                for name, deps in dependencies.items():
+                    if name not in affected and deps & affected:
+                        affected.add(name)
+                        grew = True
+            order = self._execution_order(affected, dependencies)
+
+            # Other threads importing these modules wait until the reload is done
+            with contextlib.ExitStack() as stack:
+                for name in sorted(order):
+                    stack.enter_context(module_import_lock(name))
+                self._replace(order, loaded)
+            return order
+
+    @staticmethod
+    def _execution_order(affected: set, dependencies: Dict[str, set]) -> List[str]:
+        """Order modules so that dependencies come first (cycles are broken by name order)."""
+        order: List[str] = []
+        visiting: set = set()
+
+        def visit(name: str):
+            if name in order or name in visiting:
+                return
+            visiting.add(name)
+            for dep in sorted(dependencies.get(name, ()) & affected):
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in sorted(affected):
+            visit(name)
+        return order
+
+    def _replace(self, order: List[str], loaded: Dict[str, types.ModuleType]) -> None:
+        old_modules = {name: loaded[name] for name in order}
+        old_stats = {name: import_finder.source_stats.get(_source_file(module))
+                     for name, module in old_modules.items()}
+        for name in order:
+            sys.modules.pop(name, None)
+
+        new_modules: Dict[str, types.ModuleType] = {}
+        try:
+            for name in order:
+                if name in sys.modules:
+                    # Already imported again by a module executed before it
+                    new_modules[name] = sys.modules[name]
+                    continue
+                old = old_modules[name]
+                path = _source_file(old)
+                spec = importlib.util.spec_from_file_location(
+                    name, path, loader=SourceStatLoader(name, path),
+                    submodule_search_locations=old.__spec__.submodule_search_locations,
+                )
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[name] = module
+                spec.loader.exec_module(module)
+                new_modules[name] = module
+        except BaseException as e:
+            failed = name
+            for name, module in old_modules.items():
+                sys.modules[name] = module
+                path = _source_file(module)
+                if old_stats[name] is None:
+                    import_finder.source_stats.pop(path, None)
+                else:
+                    import_finder.source_stats[path] = old_stats[name]
+            raise ImportError(f"Hot reload of {failed} failed, modules left unchanged: {e}") from e
+
+        # Keep class identities: update the old classes and point the new modules at them
+        replaced: Dict[int, type] = {}
+        for name, module in new_modules.items():
+            old = old_modules[name]
+            for attr, value in vars(module).items():
+                previous = vars(old).get(attr)
+                if (isinstance(value, type) and isinstance(previous, type)
+                        and value.__module__ == name and previous.__module__ == name
+                        and value.__qualname__ == previous.__qualname__
+                        and _update_class(previous, value)):
+                    replaced[id(value)] = previous
+                    # e.g. tracing wraps the updated methods again
+                    apply_class_hooks(previous)
+        for module in new_modules.values():
+            namespace = vars(module)
+            for attr, value in list(namespace.items()):
+                if id(value) in replaced and isinstance(value, type):
+                    namespace[attr] = replaced[id(value)]
+
+        for name, module in new_modules.items():
+            parent_name, _, child = name.rpartition(".")
+            parent = sys.modules.get(parent_name)
+            if parent is not None:
+                setattr(parent, child, module)
+            if name in self.loader._loaded_modules:
+                self.loader._loaded_modules[name] = module
+
+    def watch(self, interval: float = 1.0, package_name: Optional[str] = None,
+              on_reload: Optional[Callable[[List[str]], None]] = None,
+              on_error: Optional[Callable[[Exception], None]] = None) -> "Watcher":
+        """
+        Check for changed files every ``interval`` seconds in a background thread.
+
+        Args:
+            interval: Seconds between checks
+            package_name: Only watch this package. Defaults to all loaded packages.
+            on_reload: Called with the reloaded module names after each reload
+            on_error: Called with the ImportError of a failed reload (default: print it)
+
+        Returns:
+            Watcher: call ``stop()`` to end watching
+        """
+        return Watcher(self, interval, package_name, on_reload, on_error)
+
+
+class Watcher:
+    """Background thread polling a HotReloader."""
+
+    def __init__(self, reloader: HotReloader, interval: float, package_name: Optional[str],
+                 on_reload: Optional[Callable], on_error: Optional[Callable]):
+        self.reloader = reloader
+        self.interval = interval
+        self.package_name = package_name
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self._stop = threading.Event()
+        # Take the baseline of modules loaded before watching started
+        reloader.changed_modules(package_name)
+        self._thread = threading.Thread(target=self._run, name="qabbit-hot-reload", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        failed = None
+        while not self._stop.wait(self.interval):
+            changed = self.reloader.changed_modules(self.package_name)
+            if not changed:
+                continue
+            # Do not retry a failed reload until the files change again
+            state = [(name, _file_stat(_source_file(sys.modules[name]))) for name in changed]
+            if state == failed:
+                continue
+            try:
+                reloaded = self.reloader.reload(self.package_name, changed)
+            except ImportError as e:
+                failed = state
+                if self.on_error is not None:
+                    self.on_error(e)
+                else:
+                    print(f"Warning: {e}")
+                continue
+            failed = None
+            if self.on_reload is not None and reloaded:
+                self.on_reload(reloaded)
+
+    def stop(self) -> None:
+        """Stop watching and wait for the thread to end."""
+        self._stop.set()
+        self._thread.join()
+
+
+# Reloader of each loader (the global one and those of environments)
+_reloaders: Dict[CustomNodeLoader, HotReloader] = {}
+_reloaders_lock = threading.Lock()
+
+
+def get_reloader(loader: Optional[CustomNodeLoader] = None) -> HotReloader:
+    """Get or create the hot reloader of a loader (default: get_loader(), the active environment's)."""
+    loader = loader or get_loader()
+    with _reloaders_lock:
+        reloader = _reloaders.get(loader)
+        if reloader is None:
+            reloader = _reloaders[loader] = HotReloader(loader)
+        return reloader
+
+
+def reload(package_name: Optional[str] = None) -> List[str]:
+    """Reload the changed modules of a package (or of all packages); see HotReloader.reload()."""
+    return get_reloader().reload(package_name)
+
+
+def watch(interval: float = 1.0, package_name: Optional[str] = None, **kwargs) -> Watcher:
+    """Reload changed modules in a background thread; see HotReloader.watch()."""
+    return get_reloader().watch(interval, package_name, **kwargs)
@@ -0,0 +1,187 @@
+"""
+Import finder module - resolves modules of aliased custom node packages.
+
+CustomNodeLoader registers every package alias it creates (e.g. ``ComfyUI_KJNodes`` for
+``custom_nodes/ComfyUI-KJNodes``) with a single finder installed at the front of
+``sys.meta_path``. Submodules of those packages, whether imported by the wrapper or by
+ordinary ``import`` statements and relative imports inside the custom nodes, are then
+resolved from one cached directory listing per directory, without repeated ``stat``
+calls, and loaded by ``SourceFileLoader`` so the standard ``__pycache__`` bytecode cache
+is used.
+
+Resolution follows the regular import system's order: a directory with ``__init__.py``
+is a package, then ``<name>.py`` is a module, then a directory without ``__init__.py``
+is a namespace package. Extension modules are left to the default finders.
+
+``importlib.invalidate_caches()`` clears the directory listings.
+
+The loaders remember the mtime and size of each source file they execute (from the
+``stat`` the bytecode cache check already makes), so hot reloading can tell which
+modules changed on disk since they were imported (see qabbit_wrapper.hot_reload).
+
+While a bytecode bundle is active, modules it contains get their code objects from the
+bundle and the listings of the bundled directories are pre-filled, so no file system
+call is made for them (see qabbit_wrapper.bytecode_bundle).
+"""
+
+import os
+import sys
+import threading
+import importlib.abc
+import importlib.machinery
+import importlib.util
+from typing import Optional, Dict, Tuple, FrozenSet, Iterable
+
+
+_EXTENSION_SUFFIXES = tuple(importlib.machinery.EXTENSION_SUFFIXES)
+
+# Source file -> (mtime, size) when it was last executed
+source_stats: Dict[str, Tuple[float, int]] = {}
+
+
+class SourceStatLoader(importlib.machinery.SourceFileLoader):
+    """SourceFileLoader recording the stat of each source file it loads."""
+
+    def path_stats(self, path):
+        stats = super().path_stats(path)
+        source_stats[path] = (stats["mtime"], stats["size"])
+        return stats
+
+
+# Returns a loader serving precompiled code for (fullname, path), or None; set while a
+# bytecode bundle is active (see qabbit_wrapper.bytecode_bundle)
+code_provider = None
+
+
+def source_loader(fullname: str, path: str) -> importlib.machinery.SourceFileLoader:
+    """Loader for a module's source file: from the active bytecode bundle if it has the file."""
+    provider = code_provider
+    if provider is not None:
+        loader = provider(fullname, path)
+        if loader is not None:
+            return loader
+    return SourceStatLoader(fullname, path)
+
+
+class CustomNodeFinder(importlib.abc.MetaPathFinder):
+    """Meta path finder for the package aliases created by CustomNodeLoader."""
+
+    def __init__(self):
+        # Alias (e.g. "ComfyUI_KJNodes") -> package directory
+        self._roots: Dict[str, str] = {}
+        # Directory -> (file names, directory names, extension module names)
+        self._listings: Dict[str, Optional[Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]]] = {}
+
+    def register(self, python_package_name: str, package_path: str) -> None:
+        """Resolve submodules of ``python_package_name`` from ``package_path``."""
+        self._roots[python_package_name] = package_path
+
+    def unregister(self, python_package_name: str) -> None:
+        """Stop resolving submodules of a package alias."""
+        self._roots.pop(python_package_name, None)
+
+    def is_registered(self, python_package_name: str) -> bool:
+        return python_package_name in self._roots
+
+    def invalidate_caches(self) -> None:
+        """Forget cached directory listings (called by importlib.invalidate_caches())."""
+        self._listings.clear()
+
+    def preload_listings(self, listings: Dict[str, Tuple[Iterable[str], Iterable[str]]]) -> None:
+        """Fill the listing cache from (files, directories) recorded elsewhere (e.g. a bundle)."""
+        for directory, (files, dirs) in listings.items():
+            extensions = frozenset(
+                f.partition(".")[0] for f in files if f.endswith(_EXTENSION_SUFFIXES)
+            )
+            self._listings[directory] = (frozenset(files), frozenset(dirs), extensions)
+
+    def listdir(self, directory: str) -> Optional[Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]]:
+        """
+        Return the cached (files, directories, extension module names) of a directory,
+        or None if it does not exist.
+        """
+        try:
+            return self._listings[directory]
+        except KeyError:
+            pass
+        try:
+            files, dirs = set(), set()
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        (dirs if entry.is_dir() else files).add(entry.name)
+                    except OSError:
+                        continue
+            extensions = frozenset(
+                f.partition(".")[0] for f in files if f.endswith(_EXTENSION_SUFFIXES)
+            )
+            listing = (frozenset(files), frozenset(dirs), extensions)
+        except OSError:
+            listing = None
+        self._listings[directory] = listing
+        return listing
+
+    def has_file(self, directory: str, filename: str) -> bool:
+        listing = self.listdir(directory)
+        return listing is not None and filename in listing[0]
+
+    def directory_for(self, fullname: str) -> Optional[str]:
+        """Return the directory that would contain ``fullname`` (its parent's directory)."""
+        parts = fullname.split(".")
+        package_path = self._roots.get(parts[0])
+        if package_path is None:
+            return None
+        return os.path.join(package_path, *parts[1:-1])
+
+    def find_spec(self, fullname, path=None, target=None):
+        root = fullname.partition(".")[0]
+        if root not in self._roots or fullname == root:
+            return None
+
+        name = fullname.rpartition(".")[2]
+        directory = path[0] if path else self.directory_for(fullname)
+        listing = self.listdir(directory)
+        if listing is None:
+            return None
+        files, dirs, extensions = listing
+
+        if name in extensions:
+            return None  # Let the default finders handle extension modules
+
+        if name in dirs:
+            child = os.path.join(directory, name)
+            if self.has_file(child, "__init__.py"):
+                init_file = os.path.join(child, "__init__.py")
+                return importlib.util.spec_from_file_location(
+                    fullname, init_file,
+                    loader=source_loader(fullname, init_file),
+                    submodule_search_locations=[child],
+                )
+        if f"{name}.py" in files:
+            module_file = os.path.join(directory, f"{name}.py")
+            return importlib.util.spec_from_file_location(
+                fullname, module_file,
+                loader=source_loader(fullname, module_file),
+            )
+        if name in dirs:
+            # Namespace package
+            spec = importlib.machinery.ModuleSpec(fullname, None, is_package=True)
+            spec.submodule_search_locations = [os.path.join(directory, name)]
+            return spec
+        return None
+
+
+# Global finder instance
+_finder: Optional[CustomNodeFinder] = None
+_finder_lock = threading.Lock()
+
+
+def get_custom_node_finder() -> CustomNodeFinder:
+    """Get the global finder, installing it at the front of sys.meta_path on first use."""
+    global _finder
+    with _finder_lock:
+        if _finder is None:
+            _finder = CustomNodeFinder()
+        if _finder not in sys.meta_path:
+            sys.meta_path.insert(0, _finder)
+        return _finder
@@ -0,0 +1,439 @@
+"""
+Isolation module - run a custom node package in its own long-lived child process.
+
+A package marked as isolated is never imported into the calling process. A dedicated
+child process initializes ComfyUI and imports the package; ``CustomNodePackage.get()``
+returns proxy classes with the same node attributes (INPUT_TYPES, RETURN_TYPES,
+FUNCTION, CATEGORY, ...) whose method calls are forwarded to the child. A package that
+leaks memory, starts threads or changes global torch state only affects its own process.
+
+    - Tensors cross the process boundary through shared memory (torch.multiprocessing's
+      reductions), not by pickling their data.
+    - Results other than tensors, numpy arrays, plain values and lists / tuples / dicts
+      of them (e.g. model objects) stay in the child and come back as ``RemoteObject``
+      handles, which can be passed to later calls of the same package, also inside
+      lists, tuples and dicts. The child drops the object once its handle is garbage
+      collected (or on ``release()``); a handle from a child that has since been
+      replaced raises ``IsolationError`` when it is used.
+    - With ``memory_limit`` set, the child's RSS is checked while calls run; if it goes
+      over, the child is killed and the call raises ``IsolationError``.
+    - If the child crashes or is killed, the call raises ``IsolationError`` and the next
+      call starts a fresh child (up to ``max_restarts`` times).
+
+Usage:
+    from qabbit_wrapper.isolation import isolate_package
+
+    isolate_package("ComfyUI-SomeLeakyNodes", memory_limit=8 * 1024 ** 3)
+    nodes = load_nodes("nodes_config.json")       # its classes are proxies now
+    image, = nodes["LeakyNode"]().run(image=image)
+
+    # or directly
+    pkg = CustomNodePackage("ComfyUI-SomeLeakyNodes", isolated=True)
+"""
+
+import os
+import weakref
+import collections
+import itertools
+import threading
+import multiprocessing
+from typing import Optional, Dict, Any
+
+from .core import get_comfy_root, ensure_initialized
+from .worker_pool import _picklable_exception
+
+
+class IsolationError(RuntimeError):
+    """The isolated process crashed, was killed, or exceeded its memory limit."""
+
+
+class RemoteObject:
+    """Handle to a call result that stayed in an isolated package's process."""
+
+    def __init__(self, package_name: str, handle: int, type_name: str, owner: Optional[tuple] = None):
+        self.package_name = package_name
+        self.handle = handle
+        self.type_name = type_name
+        # (pid, generation) of the process holding the object
+        self.owner = owner
+
+    def __repr__(self):
+        return f"<RemoteObject {self.type_name} #{self.handle} in {self.package_name}>"
+
+
+def _remote_objects(value):
+    """Yield the RemoteObjects in a call result (also inside lists, tuples and dicts)."""
+    if isinstance(value, RemoteObject):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            yield from _remote_objects(v)
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _remote_objects(v)
+
+
+_NODE_ATTRIBUTES = (
+    "RETURN_TYPES", "RETURN_NAMES", "FUNCTION", "CATEGORY", "OUTPUT_NODE",
+    "OUTPUT_IS_LIST", "INPUT_IS_LIST", "DESCRIPTION", "OUTPUT_TOOLTIPS", "DEPRECATED", "EXPERIMENTAL",
+)
+
+
+def _enable_shared_tensors() -> None:
+    """Register torch's reductions so tensors are sent through shared memory."""
+    try:
+        import torch.multiprocessing  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_PLAIN_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+
+def _is_sendable(value) -> bool:
+    """
+    Return True if a value can be sent to the parent process: tensors, numpy arrays and
+    plain values, or lists / tuples / dicts of them. Decided by type, so outputs are
+    serialized only once, when they are sent (tensors through shared memory).
+    """
+    if isinstance(value, _PLAIN_TYPES):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_sendable(v) for v in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, _PLAIN_TYPES) and _is_sendable(v) for k, v in value.items())
+    module = type(value).__module__
+    if module.startswith("torch") and hasattr(value, "storage_offset"):
+        return True  # torch.Tensor and subclasses
+    return module == "numpy" and hasattr(value, "dtype")
+
+
+# ---- child process --------------------------------------------------------------------
+
+def _serve(conn, comfy_root: str, package_name: str, generation: int) -> None:
+    """Entry point of an isolated package's process."""
+    _enable_shared_tensors()
+    try:
+        from .core import init_comfy
+        from .custom_nodes_logic import get_loader
+        init_comfy(comfy_root)
+        loader = get_loader()
+        loader.load_custom_node_package(package_name)
+    except BaseException as e:
+        conn.send(("error", _picklable_exception(e)))
+        return
+    owner = (os.getpid(), generation)
+    conn.send(("ready", owner))
+
+    objects: Dict[int, Any] = {}
+    handles = itertools.count(1)
+
+    def resolve(value):
+        if isinstance(value, RemoteObject):
+            if value.package_name != package_name or value.owner != owner:
+                raise IsolationError(f"{value!r} is stale: the process holding it is no longer running")
+            if value.handle not in objects:
+                raise IsolationError(f"{value!r} was released")
+            return objects[value.handle]
+        if isinstance(value, list):
+            return [resolve(v) for v in value]
+        if isinstance(value, tuple):
+            return tuple(resolve(v) for v in value)
+        if isinstance(value, dict):
+            return {k: resolve(v) for k, v in value.items()}
+        return value
+
+    def sendable(value):
+        # Keep values that cannot cross the boundary in this process
+        if _is_sendable(value):
+            return value
+        handle = next(handles)
+        objects[handle] = value
+        return RemoteObject(package_name, handle, type(value).__name__, owner)
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        try:
+            op = request[0]
+            if op == "describe":
+                _, module_path, class_name = request
+                node_class = loader.import_from_custom_node(package_name, module_path, class_name)
+                reply = {name: getattr(node_class, name) for name in _NODE_ATTRIBUTES if hasattr(node_class, name)}
+                reply["INPUT_TYPES"] = node_class.INPUT_TYPES()
+                reply["methods"] = [name for name in dir(node_class)
+                                    if not name.startswith("_") and callable(getattr(node_class, name, None))]
+                result = ("ok", reply)
+            elif op == "call":
+                _, module_path, class_name, method, args, kwargs = request
+                node_class = loader.import_from_custom_node(package_name, module_path, class_name)
+                target = node_class if method in ("INPUT_TYPES", "IS_CHANGED", "VALIDATE_INPUTS") else node_class()
+                value = getattr(target, method)(
+                    *[resolve(a) for a in args], **{k: resolve(v) for k, v in kwargs.items()}
+                )
+                if isinstance(value, tuple):
+                    value = tuple(sendable(v) for v in value)
+                elif isinstance(value, dict) and "result" in value:
+                    value = {**value, "result": tuple(sendable(v) for v in value["result"])}
+                else:
+                    value = sendable(value)
+                result = ("ok", value)
+            elif op == "release":
+                for handle in request[1]:
+                    objects.pop(handle, None)
+                result = ("ok", None)
+            else:
+                result = ("error", ValueError(f"Unknown request {op!r}"))
+        except BaseException as e:
+            result = ("error", _picklable_exception(e))
+        try:
+            conn.send(result)
+        except Exception as e:
+            conn.send(("error", _picklable_exception(e)))
+
+
+# ---- parent side ----------------------------------------------------------------------
+
+class IsolatedPackage:
+    """A custom node package running in a dedicated child process."""
+
+    def __init__(self, package_name: str, comfy_root: Optional[str] = None,
+                 memory_limit: Optional[int] = None, max_restarts: int = 5,
+                 start_timeout: float = 300.0, poll_interval: float = 0.5):
+        """
+        Initialize an isolated package. The child process starts on first use.
+
+        Args:
+            package_name: Name of the package (e.g., "ComfyUI-KJNodes")
+            comfy_root: ComfyUI root for the child. Defaults to get_comfy_root().
+            memory_limit: Kill the child when its RSS exceeds this many bytes during a call
+            max_restarts: How many times a crashed or killed child is replaced
+            start_timeout: Seconds to wait for the child to import the package
+            poll_interval: Seconds between memory checks while a call runs
+        """
+        if comfy_root is None:
+            ensure_initialized()
+            comfy_root = get_comfy_root()
+        self.package_name = package_name
+        self.comfy_root = comfy_root
+        self.memory_limit = memory_limit
+        self.max_restarts = max_restarts
+        self.start_timeout = start_timeout
+        self.poll_interval = poll_interval
+        self.restarts = 0
+        self._process = None
+        self._conn = None
+        # (pid, generation) of the running child, and handles of its collected RemoteObjects
+        self._owner = None
+        self._garbage: collections.deque = collections.deque()
+        self._lock = threading.RLock()
+        self._classes: Dict[tuple, type] = {}
+        self._started_once = False
+        _enable_shared_tensors()
+
+    # ---- process lifecycle ----------------------------------------------------------
+
+    def _start(self) -> None:
+        if self._started_once:
+            if self.restarts >= self.max_restarts:
+                raise IsolationError(
+                    f"{self.package_name}: isolated process failed {self.restarts} times, not restarting"
+                )
+            self.restarts += 1
+        self._started_once = True
+
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_serve, args=(child_conn, self.comfy_root, self.package_name, self.restarts),
+            name=f"qabbit-isolated-{self.package_name}", daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        if not parent_conn.poll(self.start_timeout):
+            process.kill()
+            raise IsolationError(f"{self.package_name}: isolated process did not start in {self.start_timeout}s")
+        try:
+            status, value = parent_conn.recv()
+        except EOFError:
+            process.join(1)
+            raise IsolationError(f"{self.package_name}: isolated process exited during start "
+                                 f"(exit code {process.exitcode})")
+        if status != "ready":
+            process.join(1)
+            raise value
+        self._process, self._conn, self._owner = process, parent_conn, value
+
+    def _stop(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+        if self._process is not None:
+            self._process.join(2)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+        self._process = self._conn = self._owner = None
+        # The objects died with the process
+        self._garbage.clear()
+
+    def _request(self, *request):
+        with self._lock:
+            if self._process is None or not self._process.is_alive():
+                self._stop()
+                self._start()
+            try:
+                if self._garbage:
+                    garbage = []
+                    while self._garbage:
+                        garbage.append(self._garbage.popleft())
+                    self._exchange(("release", garbage))
+                status, value = self._exchange(request)
+            except (EOFError, OSError):
+                exitcode = None
+                if self._process is not None:
+                    self._process.join(1)
+                    exitcode = self._process.exitcode
+                self._stop()
+                raise IsolationError(f"{self.package_name}: isolated process died (exit code {exitcode})")
+        if status == "error":
+            raise value
+        return value
+
+    def _exchange(self, request) -> tuple:
+        """Send a request to the child and wait for its reply, watching its memory."""
+        self._conn.send(request)
+        while not self._conn.poll(self.poll_interval):
+            if not self._process.is_alive():
+                raise EOFError
+            if self.memory_limit is not None:
+                rss = _rss_bytes(self._process.pid)
+                if rss is not None and rss > self.memory_limit:
+                    self._process.kill()
+                    self._stop()
+                    raise IsolationError(
+                        f"{self.package_name}: isolated process exceeded its memory limit "
+                        f"({rss} > {self.memory_limit} bytes) and was killed"
+                    )
+        return self._conn.recv()
+
+    def close(self) -> None:
+        """Stop the child process."""
+        with self._lock:
+            self._stop()
+
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- node classes ---------------------------------------------------------------
+
+    def call(self, module_path: str, class_name: str, method: str, *args, **kwargs):
+        """Call ``NodeClass().method(*args, **kwargs)`` in the child process."""
+        value = self._request("call", module_path, class_name, method, args, kwargs)
+        for obj in _remote_objects(value):
+            # Release the child's object once the handle is garbage collected
+            weakref.finalize(obj, self._collect, obj.owner, obj.handle)
+        return value
+
+    def _collect(self, owner: tuple, handle: int) -> None:
+        # May run in any thread, in the middle of a request: queue it for the next request
+        if owner == self._owner:
+            self._garbage.append(handle)
+
+    def release(self, obj: RemoteObject) -> None:
+        """Drop a RemoteObject held by the child process."""
+        with self._lock:
+            if obj.owner == self._owner and self._process is not None and self._process.is_alive():
+                self._request("release", [obj.handle])
+
+    def get(self, module_path: str, class_name: str) -> type:
+        """
+        Get a proxy for a node class of this package.
+
+        The proxy has the node attributes of the real class; INPUT_TYPES() returns the
+        value computed in the child when the proxy was created, and every other method
+        call runs in the child.
+        """
+        key = (module_path, class_name)
+        if key in self._classes:
+            return self._classes[key]
+
+        info = self._request("describe", module_path, class_name)
+        package = self
+        input_types = info.pop("INPUT_TYPES")
+        methods = info.pop("methods")
+
+        def make_method(name):
+            def method(self, *args, **kwargs):
+                return package.call(module_path, class_name, name, *args, **kwargs)
+            method.__name__ = name
+            return method
+
+        namespace: Dict[str, Any] = dict(info)
+        namespace["INPUT_TYPES"] = classmethod(lambda cls: input_types)
+        for name in methods:
+            if name == "INPUT_TYPES" or name in namespace:
+                continue
+            if name in ("IS_CHANGED", "VALIDATE_INPUTS"):
+                namespace[name] = classmethod(
+                    lambda cls, *args, _name=name, **kwargs: package.call(module_path, class_name, _name, *args, **kwargs)
+                )
+            else:
+                namespace[name] = make_method(name)
+        namespace["__module__"] = f"qabbit_isolated.{self.package_name.replace('-', '_')}"
+        namespace["__isolated_package__"] = self
+
+        proxy = type(class_name, (), namespace)
+        self._classes[key] = proxy
+        return proxy
+
+
+# Packages marked with isolate_package(), by normalized package name
+_isolated: Dict[str, Dict[str, Any]] = {}
+_packages: Dict[str, IsolatedPackage] = {}
+_registry_lock = threading.Lock()
+
+
+def _normalize(package_name: str) -> str:
+    """Registry key of a package: "ComfyUI_KJNodes" and "ComfyUI-KJNodes" are the same package."""
+    return package_name.replace("_", "-")
+
+
+def isolate_package(package_name: str, **options) -> None:
+    """
+    Mark a custom node package to run in its own process.
+
+    CustomNodePackage (and so load_nodes / LazyNodeRegistry) returns proxy classes for it
+    from then on. Options are passed to IsolatedPackage (memory_limit, max_restarts, ...).
+    """
+    with _registry_lock:
+        _isolated[_normalize(package_name)] = options
+
+
+def is_isolated(package_name: str) -> bool:
+    return _normalize(package_name) in _isolated
+
+
+def get_isolated_package(package_name: str, **options) -> IsolatedPackage:
+    """Get the shared IsolatedPackage of a package, starting nothing until first use."""
+    key = _normalize(package_name)
+    with _registry_lock:
+        if key not in _packages:
+            merged = {**_isolated.get(key, {}), **options}
+            _packages[key] = IsolatedPackage(package_name, **merged)
+        return _packages[key]
@@ -0,0 +1,196 @@
+"""
+Memory-mapped checkpoint loading module - share CPU weights between worker processes.
+
+By default ``comfy.utils.load_torch_file()`` and ``safetensors.torch.load_file()`` read a
+checkpoint into private memory, so N worker processes loading the same model on one host
+hold N copies. In mmap mode, ``.safetensors`` files loaded to the CPU are instead mapped
+copy-on-write and wrapped as tensors with ``torch.frombuffer``: every process reads the
+same pages of the OS page cache, and a page is only copied into a process when it is
+written to (moving a tensor to the GPU or casting it creates a new tensor and copies
+nothing).
+
+The mode is opt-in and process-wide: ``enable_mmap_loading()`` (or QABBIT_MMAP=1 before
+init_comfy()) replaces both functions, including in already imported ComfyUI and custom
+node modules that imported them by name. Loads to other devices, other file formats and
+files with a dtype this torch build cannot map go to the original functions.
+
+Usage:
+    from qabbit_wrapper.mmap_loading import enable_mmap_loading
+
+    init_comfy("/path/to/ComfyUI")
+    enable_mmap_loading()
+    nodes = load_nodes("nodes_config.json")
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import threading
+from typing import Optional, Dict, Any, Tuple
+
+
+SAFETENSORS_SUFFIXES = (".safetensors", ".sft")
+
+# safetensors dtype -> torch dtype attribute name
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8",
+    "U64": "uint64", "U32": "uint32", "U16": "uint16",
+    "BOOL": "bool", "F8_E4M3": "float8_e4m3fn", "F8_E5M2": "float8_e5m2", "F8_E8M0": "float8_e8m0fnu",
+}
+
+
+class UnsupportedDtypeError(ValueError):
+    """A safetensors file has a dtype that cannot be mapped with this torch build."""
+
+
+def mmap_requested() -> bool:
+    """Return True if QABBIT_MMAP asks for mmap loading."""
+    return os.environ.get("QABBIT_MMAP", "").lower() in ("1", "true", "yes")
+
+
+def read_safetensors_header(path: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Read the JSON header of a safetensors file.
+
+    Returns:
+        (header, data_start): tensor entries (plus "__metadata__" if present) and the
+        offset of the data section in the file
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(8)
+        if len(prefix) != 8:
+            raise ValueError(f"Not a safetensors file: {path}")
+        (header_size,) = struct.unpack("<Q", prefix)
+        header = json.loads(f.read(header_size))
+    return header, 8 + header_size
+
+
+def load_safetensors_mmap(path: str, return_metadata: bool = False):
+    """
+    Load a safetensors file as CPU tensors backed by a copy-on-write memory map.
+
+    Args:
+        path: Path of the .safetensors file
+        return_metadata: Also return the file's "__metadata__" dict
+
+    Returns:
+        state dict, or (state dict, metadata) if return_metadata is True
+
+    Raises:
+        UnsupportedDtypeError: a tensor's dtype is unknown or missing from this torch
+                               build (checked before anything is mapped)
+    """
+    import torch
+
+    header, data_start = read_safetensors_header(path)
+    metadata = header.pop("__metadata__", None)
+    dtypes = {}
+    for name, info in header.items():
+        dtype = getattr(torch, _DTYPES.get(info["dtype"], ""), None)
+        if not isinstance(dtype, torch.dtype):
+            raise UnsupportedDtypeError(f"{path}: cannot map tensor {name!r} of dtype {info['dtype']}")
+        dtypes[name] = dtype
+    with open(path, "rb") as f:
+        # ACCESS_COPY: pages are shared until written, and the tensors are writable
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    state_dict = {}
+    for name, info in header.items():
+        dtype = dtypes[name]
+        shape = info["shape"]
+        begin, end = info["data_offsets"]
+        if end == begin:
+            state_dict[name] = torch.empty(shape, dtype=dtype)
+            continue
+        count = (end - begin) // torch.empty((), dtype=dtype).element_size()
+        # The tensors keep the mmap alive
+        tensor = torch.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + begin)
+        state_dict[name] = tensor.reshape(shape)
+    return (state_dict, metadata) if return_metadata else state_dict
+
+
+def _is_cpu(device) -> bool:
+    return device is None or str(device) == "cpu"
+
+
+_originals: Dict[str, Any] = {}
+_replaced: list = []
+_lock = threading.Lock()
+
+
+def _mmap_load_torch_file(ckpt, safe_load=False, device=None, return_metadata=False, **kwargs):
+    if str(ckpt).lower().endswith(SAFETENSORS_SUFFIXES) and _is_cpu(device) and not kwargs:
+        try:
+            return load_safetensors_mmap(ckpt, return_metadata=return_metadata)
+        except UnsupportedDtypeError:
+            pass
+    if return_metadata:
+        # Older ComfyUI versions have no return_metadata parameter
+        kwargs["return_metadata"] = True
+    return _originals["load_torch_file"](ckpt, safe_load=safe_load, device=device, **kwargs)
+
+
+def _mmap_load_file(filename, device="cpu"):
+    if _is_cpu(device):
+        try:
+            return load_safetensors_mmap(filename)
+        except UnsupportedDtypeError:
+            pass
+    return _originals["load_file"](filename, device=device)
+
+
+def _replace_everywhere(original, replacement) -> None:
+    """Rebind every module-level name bound to ``original`` (e.g. via from-imports)."""
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, "__dict__", None)
+        if not isinstance(namespace, dict):
+            continue
+        for name, value in list(namespace.items()):
+            if value is original:
+                namespace[name] = replacement
+                _replaced.append((namespace, name, original))
+
+
+def enable_mmap_loading() -> bool:
+    """
+    Route CPU loads of safetensors files through load_safetensors_mmap().
+
+    Call after init_comfy(); modules imported later pick the replacements up as well.
+
+    Returns:
+        True if at least one loader function was replaced
+    """
+    with _lock:
+        if _originals:
+            return True
+        try:
+            import comfy.utils
+            _originals["load_torch_file"] = comfy.utils.load_torch_file
+        except (ImportError, AttributeError):
+            pass
+        try:
+            import safetensors.torch
+            _originals["load_file"] = safetensors.torch.load_file
+        except ImportError:
+            pass
+        if "load_torch_file" in _originals:
+            _replace_everywhere(_originals["load_torch_file"], _mmap_load_torch_file)
+        if "load_file" in _originals:
+            _replace_everywhere(_originals["load_file"], _mmap_load_file)
+        return bool(_originals)
+
+
+def disable_mmap_loading() -> None:
+    """Restore the original loader functions. Tensors already loaded stay mapped."""
+    with _lock:
+        while _replaced:
+            namespace, name, original = _replaced.pop()
+            namespace[name] = original
+        _originals.clear()
+
+
+def mmap_loading_enabled() -> bool:
+    return bool(_originals)
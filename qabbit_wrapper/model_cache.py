@@ -0,0 +1,321 @@
+"""
+Model cache module - share loaded models across loader node calls in one process.
+
+Loader nodes (``WanVideoModelLoader``, ``WanVideoVAELoader``, ``LoadWanVideoT5TextEncoder``,
+``CLIPLoader``, ``CLIPVisionLoader``, ...) read multi-gigabyte files on every call. The model
+cache keys their outputs by loader class, method and arguments, so back-to-back jobs in
+one worker get the already loaded model instead of reading it again.
+
+The cache has a RAM budget and evicts least recently used models when a new one does
+not fit, but never a model that is in use: ``use()`` / ``acquire()`` hold a reference
+until released. Calls through a wrapped class (``wrap()``) do not hold one.
+
+Usage:
+    from qabbit_wrapper.model_cache import get_model_cache
+
+    cache = get_model_cache()
+    with cache.use(WanVideoModelLoader, model="wan2.1_t2v_14B_fp8.safetensors",
+                   base_precision="bf16", quantization="fp8_e4m3fn", load_device="offload_device") as (model,):
+        ...                          # cannot be evicted here
+
+    CLIPLoader = cache.wrap(CLIPLoader)   # cached, unpinned
+    print(cache.stats())             # bytes_loaded vs bytes_served, hits, evictions, ...
+
+The budget defaults to half of the physical RAM, or QABBIT_MODEL_CACHE_BYTES if set.
+"""
+
+import os
+import sys
+import inspect
+import functools
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from .node_cache import hash_inputs, UnhashableInput, _is_tensor
+
+
+def default_budget() -> int:
+    """Return QABBIT_MODEL_CACHE_BYTES, or half of the physical RAM."""
+    if os.environ.get("QABBIT_MODEL_CACHE_BYTES"):
+        return int(os.environ["QABBIT_MODEL_CACHE_BYTES"])
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2
+    except (ValueError, OSError, AttributeError):
+        return 16 * 1024 ** 3
+
+
+def estimate_model_size(value, _seen=None) -> int:
+    """
+    Estimate the memory held by a loader's output, in bytes.
+
+    Understands ComfyUI model patchers (``model_size()``), objects wrapping one
+    (``.patcher``, e.g. CLIP and VAE), torch modules, tensors and containers of those.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    if _is_tensor(value):
+        return value.element_size() * value.nelement()
+    model_size = getattr(value, "model_size", None)
+    if callable(model_size):
+        try:
+            return int(model_size())
+        except Exception:
+            pass
+    patcher = getattr(value, "patcher", None)
+    if patcher is not None and patcher is not value:
+        return estimate_model_size(patcher, _seen)
+    if callable(getattr(value, "parameters", None)) and callable(getattr(value, "buffers", None)):
+        # torch.nn.Module
+        return sum(t.element_size() * t.nelement()
+                   for t in list(value.parameters()) + list(value.buffers()))
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_model_size(v, _seen) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_model_size(v, _seen) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def is_loader(node_class: type) -> bool:
+    """Heuristic: a node class is a loader if its name or CATEGORY says so."""
+    name = node_class.__name__.lower()
+    category = str(getattr(node_class, "CATEGORY", "")).lower()
+    return name.endswith("loader") or "loader" in category
+
+
+def _bind_arguments(function, args: tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a method call's arguments (without self) to keyword arguments, with defaults
+    filled in, so equivalent calls get the same cache key.
+    """
+    try:
+        bound = inspect.signature(function).bind(None, *args, **kwargs)
+    except (TypeError, ValueError):
+        return kwargs
+    bound.apply_defaults()
+    arguments = dict(list(bound.arguments.items())[1:])
+    # **kwargs parameters are bound as one dict; flatten them back
+    for name, parameter in bound.signature.parameters.items():
+        if parameter.kind is inspect.Parameter.VAR_KEYWORD and name in arguments:
+            arguments.update(arguments.pop(name))
+    return arguments
+
+
+class _Entry:
+    __slots__ = ("value", "size", "refs")
+
+    def __init__(self, value, size: int):
+        self.value = value
+        self.size = size
+        self.refs = 0
+
+
+class ModelCache:
+    """Process-wide LRU cache of loader outputs, bounded by bytes, with reference counts."""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        Initialize a model cache.
+
+        Args:
+            max_bytes: RAM budget. Defaults to default_budget().
+        """
+        self.max_bytes = max_bytes if max_bytes is not None else default_budget()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        # One lock per key so concurrent requests for the same model load it once
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._stats = {
+            "loads": 0, "hits": 0, "bytes_loaded": 0, "bytes_served": 0,
+            "evictions": 0, "bytes_evicted": 0, "bypassed": 0, "over_budget": 0,
+        }
+
+    # ---- keys -----------------------------------------------------------------------
+
+    @staticmethod
+    def key_for(loader_class: type, method: str, kwargs: Dict[str, Any]) -> str:
+        """Return the cache key of a loader call (raises UnhashableInput)."""
+        return hash_inputs(f"{loader_class.__module__}.{loader_class.__qualname__}.{method}", kwargs)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    # ---- eviction -------------------------------------------------------------------
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Evict unused least recently used entries until the cache fits its budget."""
+        for key in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                return
+            entry = self._entries[key]
+            if entry.refs > 0 or key == keep:
+                continue
+            del self._entries[key]
+            self._bytes -= entry.size
+            self._stats["evictions"] += 1
+            self._stats["bytes_evicted"] += entry.size
+        if self._bytes > self.max_bytes:
+            # Everything left is in use
+            self._stats["over_budget"] += 1
+
+    # ---- loading --------------------------------------------------------------------
+
+    def _load(self, loader_class: type, method: str, kwargs: Dict[str, Any], pin: bool):
+        """Return (key, outputs) for a loader call, loading it on a miss."""
+        # Classes returned by wrap() load through their original class
+        loader_class = loader_class.__dict__.get("__model_cache_original__", loader_class)
+        kwargs = _bind_arguments(getattr(loader_class, method), (), kwargs)
+        try:
+            key = self.key_for(loader_class, method, kwargs)
+        except UnhashableInput:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None, self._call(loader_class, method, kwargs)
+
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["bytes_served"] += entry.size
+                    if pin:
+                        entry.refs += 1
+                    return key, entry.value
+
+            value = self._call(loader_class, method, kwargs)
+            size = estimate_model_size(value)
+            with self._lock:
+                entry = self._entries[key] = _Entry(value, size)
+                if pin:
+                    entry.refs += 1
+                self._bytes += size
+                self._stats["loads"] += 1
+                self._stats["bytes_loaded"] += size
+                self._evict(keep=key)
+            return key, value
+
+    @staticmethod
+    def _call(loader_class: type, method: str, kwargs: Dict[str, Any]):
+        return getattr(loader_class(), method)(**kwargs)
+
+    def get(self, loader_class: type, method: Optional[str] = None, **kwargs):
+        """
+        Return a loader's outputs, loading them on a miss. The result is not pinned.
+
+        Args:
+            loader_class: Loader node class
+            method: Method to call. Defaults to the class's FUNCTION.
+            **kwargs: Keyword arguments of the method
+        """
+        return self._load(loader_class, method or loader_class.FUNCTION, kwargs, pin=False)[1]
+
+    def acquire(self, loader_class: type, method: Optional[str] = None, **kwargs):
+        """
+        Like get(), but holds a reference: the model is not evicted until release().
+
+        Returns:
+            (key, outputs); pass the key to release()
+        """
+        return self._load(loader_class, method or loader_class.FUNCTION, kwargs, pin=True)
+
+    def release(self, key: Optional[str]) -> None:
+        """Release a reference taken by acquire(), and evict if over budget."""
+        if key is None:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.refs > 0:
+                entry.refs -= 1
+            self._evict()
+
+    @contextlib.contextmanager
+    def use(self, loader_class: type, method: Optional[str] = None, **kwargs):
+        """Context manager form of acquire()/release(); yields the loader's outputs."""
+        key, value = self.acquire(loader_class, method, **kwargs)
+        try:
+            yield value
+        finally:
+            self.release(key)
+
+    # ---- management -----------------------------------------------------------------
+
+    def set_budget(self, max_bytes: int) -> None:
+        """Change the RAM budget, evicting unused models that no longer fit."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """Drop every model that is not in use."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.refs == 0]:
+                self._bytes -= self._entries.pop(key).size
+
+    def stats(self) -> Dict[str, Any]:
+        """Return load/hit counters, bytes loaded vs served, and the current usage."""
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "in_use": sum(1 for e in self._entries.values() if e.refs),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    # ---- wrapping -------------------------------------------------------------------
+
+    def wrap(self, loader_class: type) -> type:
+        """
+        Return a subclass of a loader class whose FUNCTION method goes through this cache.
+
+        The subclass keeps the original name and node attributes. Its calls do not hold
+        a reference; use use()/acquire() to keep a model from being evicted.
+        """
+        function_name = loader_class.FUNCTION
+        original = getattr(loader_class, function_name)
+        cache = self
+
+        @functools.wraps(original)
+        def cached_function(self, *args, **kwargs):
+            arguments = _bind_arguments(original, args, kwargs)
+            return cache._load(loader_class, function_name, arguments, pin=False)[1]
+
+        return type(loader_class.__name__, (loader_class,), {
+            function_name: cached_function,
+            "__module__": loader_class.__module__,
+            "__qualname__": loader_class.__qualname__,
+            "__wrapped_node_class__": loader_class,
+            "__model_cache_original__": loader_class,
+        })
+
+    def wrap_all(self, node_classes: Dict[str, type]) -> Dict[str, type]:
+        """Wrap the loader classes (see is_loader()) of a mapping such as the result of load_nodes()."""
+        return {
+            name: self.wrap(node_class) if is_loader(node_class) else node_class
+            for name, node_class in node_classes.items()
+        }
+
+
+# Global cache instance
+_cache: Optional[ModelCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_model_cache() -> ModelCache:
+    """Get or create the global model cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ModelCache()
+        return _cache
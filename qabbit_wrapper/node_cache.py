@@ -0,0 +1,337 @@
+"""
+Node output cache module - content-addressed caching for deterministic node calls.
+
+Wrapping a node class makes its FUNCTION method look up a digest of its inputs before
+computing anything:
+
+    - tensors / numpy arrays are hashed by dtype, shape and content,
+    - strings naming an existing file are hashed by path, mtime and size,
+    - scalars, strings, lists and dicts are hashed by value.
+
+Calls whose inputs cannot be hashed by content (e.g. a loaded model object) bypass the
+cache. Results live in an in-memory LRU bounded by bytes; with ``disk_dir`` set, entries
+evicted from memory are spilled to disk and promoted back on a hit.
+
+Classes that define IS_CHANGED (their output depends on something other than the inputs)
+are never cached unless explicitly enabled, and any class can opt out with
+``QABBIT_CACHEABLE = False`` or ``cache.disable(NodeClass)``.
+
+Usage:
+    from qabbit_wrapper.node_cache import get_node_cache
+
+    cache = get_node_cache()
+    ImageResizeKJv2 = cache.wrap(get_custom_node("ComfyUI-KJNodes", "nodes/image_nodes", "ImageResizeKJv2"))
+    ImageResizeKJv2().resize(image=image, width=512, ...)   # computed
+    ImageResizeKJv2().resize(image=image, width=512, ...)   # served from cache
+    print(cache.stats())
+
+Note: cached outputs are returned as-is, not copied; do not modify them in place.
+"""
+
+import os
+import sys
+import pickle
+import inspect
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+class UnhashableInput(Exception):
+    """Raised when an input cannot be hashed by content."""
+
+
+def _is_tensor(value) -> bool:
+    return type(value).__module__.startswith("torch") and hasattr(value, "detach")
+
+
+def _is_ndarray(value) -> bool:
+    return type(value).__module__ == "numpy" and hasattr(value, "tobytes")
+
+
+def _update_hash(hasher, value) -> None:
+    """Feed a value into a hash object, by content."""
+    if value is None or isinstance(value, (bool, int, float, complex)):
+        hasher.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, str):
+        hasher.update(b"str:" + value.encode("utf-8", "surrogatepass") + b";")
+        if len(value) < 4096 and os.path.isfile(value):
+            st = os.stat(value)
+            hasher.update(f"file:{os.path.abspath(value)}:{st.st_mtime_ns}:{st.st_size};".encode())
+    elif isinstance(value, bytes):
+        hasher.update(b"bytes:" + value + b";")
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}[{len(value)}]:".encode())
+        for item in value:
+            _update_hash(hasher, item)
+    elif isinstance(value, dict):
+        hasher.update(f"dict[{len(value)}]:".encode())
+        for key in sorted(value, key=repr):
+            _update_hash(hasher, key)
+            _update_hash(hasher, value[key])
+    elif _is_tensor(value):
+        tensor = value.detach().cpu().contiguous()
+        hasher.update(f"tensor:{tensor.dtype}:{tuple(tensor.shape)}:".encode())
+        hasher.update(tensor.reshape(-1).view(dtype=_uint8()).numpy().tobytes())
+    elif _is_ndarray(value):
+        hasher.update(f"ndarray:{value.dtype}:{value.shape}:".encode())
+        hasher.update(value.tobytes())
+    else:
+        raise UnhashableInput(f"Cannot hash input of type {type(value).__name__} by content")
+
+
+def _uint8():
+    import torch
+    return torch.uint8
+
+
+def hash_inputs(*parts) -> str:
+    """Return a hex digest of the given values, hashed by content."""
+    hasher = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        _update_hash(hasher, part)
+    return hasher.hexdigest()
+
+
+def estimate_size(value) -> int:
+    """Estimate the memory held by a node output, in bytes."""
+    if _is_tensor(value):
+        return value.element_size() * value.nelement()
+    if _is_ndarray(value):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class NodeCache:
+    """In-memory LRU (bounded by bytes) with an optional on-disk tier."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, disk_dir: Optional[str] = None,
+                 disk_max_bytes: Optional[int] = None):
+        """
+        Initialize a node output cache.
+
+        Args:
+            max_bytes: Memory budget of the in-memory tier
+            disk_dir: Directory of the on-disk tier. If None, evicted entries are dropped.
+            disk_max_bytes: Size limit of the on-disk tier. None means unbounded.
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._overrides: Dict[type, bool] = {}
+        self._stats = {
+            "hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0,
+            "disk_writes": 0, "disk_evictions": 0, "bypassed": 0, "uncacheable": 0,
+        }
+
+    # ---- class policy ---------------------------------------------------------------
+
+    def enable(self, node_class: type) -> None:
+        """Force caching for a class, even if it defines IS_CHANGED."""
+        self._overrides[node_class] = True
+
+    def disable(self, node_class: type) -> None:
+        """Never cache calls of a class."""
+        self._overrides[node_class] = False
+
+    mark_uncacheable = disable
+
+    def is_cacheable(self, node_class: type) -> bool:
+        """Return whether calls of a class are cached."""
+        for klass in node_class.__mro__:
+            if klass in self._overrides:
+                return self._overrides[klass]
+        if getattr(node_class, "QABBIT_CACHEABLE", True) is False:
+            return False
+        # IS_CHANGED means the output depends on more than the inputs
+        return not hasattr(node_class, "IS_CHANGED")
+
+    # ---- storage --------------------------------------------------------------------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _spill(self, key: str, value) -> None:
+        try:
+            tmp_path = f"{self._disk_path(key)}.tmp.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+            self._stats["disk_writes"] += 1
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            return
+        if self.disk_max_bytes is not None:
+            self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self._stats["disk_evictions"] += 1
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            key, (value, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._stats["evictions"] += 1
+            if self.disk_dir:
+                self._spill(key, value)
+
+    def get(self, key: str):
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return True, entry[0]
+            if self.disk_dir and os.path.exists(self._disk_path(key)):
+                try:
+                    with open(self._disk_path(key), "rb") as f:
+                        value = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    pass
+                else:
+                    self._stats["disk_hits"] += 1
+                    self._store(key, value)
+                    return True, value
+            self._stats["misses"] += 1
+            return False, None
+
+    def _store(self, key: str, value) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            if self.disk_dir:
+                self._spill(key, value)
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        self._evict()
+
+    def put(self, key: str, value) -> None:
+        """Store a value under a key."""
+        with self._lock:
+            self._store(key, value)
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop all in-memory entries (and the on-disk tier if ``disk`` is True)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if disk and self.disk_dir:
+                for name in os.listdir(self.disk_dir):
+                    if name.endswith(".pkl"):
+                        os.remove(os.path.join(self.disk_dir, name))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and the current memory usage."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes,
+                    "max_bytes": self.max_bytes}
+
+    # ---- wrapping -------------------------------------------------------------------
+
+    def call(self, node_class: type, function_name: str, function, args: tuple, kwargs: dict):
+        """Run a node method through the cache."""
+        if not self.is_cacheable(node_class):
+            with self._lock:
+                self._stats["uncacheable"] += 1
+            return function(*args, **kwargs)
+        try:
+            key = hash_inputs(
+                f"{node_class.__module__}.{node_class.__qualname__}.{function_name}", args, kwargs
+            )
+        except UnhashableInput:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return function(*args, **kwargs)
+
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = function(*args, **kwargs)
+        self.put(key, value)
+        return value
+
+    def wrap(self, node_class: type) -> type:
+        """
+        Return a subclass of a node class whose FUNCTION method goes through this cache.
+
+        The subclass keeps the original name and node attributes (INPUT_TYPES,
+        RETURN_TYPES, ...), so it can be used wherever the original class is used.
+        """
+        function_name = node_class.FUNCTION
+        original = getattr(node_class, function_name)
+        # classmethod / staticmethod FUNCTIONs (e.g. V3 io.ComfyNode.execute) stay one
+        kind = inspect.getattr_static(node_class, function_name)
+        cache = self
+
+        if isinstance(kind, staticmethod):
+            @functools.wraps(original)
+            def cached_function(*args, **kwargs):
+                return cache.call(node_class, function_name, original, args, kwargs)
+            cached_function = staticmethod(cached_function)
+        else:
+            @functools.wraps(original)
+            def cached_function(self, *args, **kwargs):
+                # Bound to the instance, or to the class for a classmethod
+                bound = getattr(super(wrapped, self), function_name)
+                return cache.call(node_class, function_name, bound, args, kwargs)
+            if isinstance(kind, classmethod):
+                cached_function = classmethod(cached_function)
+
+        wrapped = type(node_class.__name__, (node_class,), {
+            function_name: cached_function,
+            "__module__": node_class.__module__,
+            "__qualname__": node_class.__qualname__,
+            "__wrapped_node_class__": node_class,
+        })
+        return wrapped
+
+    def wrap_all(self, node_classes: Dict[str, type]) -> Dict[str, type]:
+        """Wrap every class of a mapping such as the result of load_nodes()."""
+        return {name: self.wrap(node_class) for name, node_class in node_classes.items()}
+
+
+# Global cache instance
+_cache: Optional[NodeCache] = None
+
+
+def get_node_cache() -> NodeCache:
+    """Get or create the global node output cache."""
+    global _cache
+    if _cache is None:
+        _cache = NodeCache()
+    return _cache
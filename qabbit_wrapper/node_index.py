@@ -0,0 +1,265 @@
+"""
+Node index module - a persistent class-location index for the custom_nodes directory.
+
+The index is built by statically parsing every ``.py`` file of every custom node package
+(AST only, nothing is imported), so a class can be found by name without knowing its
+module path and without trial imports. It is cached on disk under the ComfyUI root and
+refreshed incrementally: only files whose mtime or size changed are parsed again. A
+lookup that misses refreshes the index once more, so classes added since are found.
+
+Usage:
+    from qabbit_wrapper.node_index import find_node, get_node_by_name
+
+    find_node("ImageResizeKJv2")
+    # {'package': 'ComfyUI-KJNodes', 'module_path': 'nodes/image_nodes', 'line': 1234}
+
+    ImageResizeKJv2 = get_node_by_name("ImageResizeKJv2")
+"""
+
+import os
+import ast
+import json
+from typing import Optional, Dict, Any, List
+
+from .core import get_comfy_root, ensure_initialized
+from .custom_nodes_logic import list_available_custom_nodes, get_loader
+
+
+INDEX_FILENAME = ".qabbit_node_index.json"
+INDEX_VERSION = 1
+
+# Directories inside a package that never contain node modules
+_SKIP_DIRS = {"__pycache__", "node_modules", "venv", ".venv", "tests", "test"}
+
+
+def _scan_classes(filepath: str) -> List[list]:
+    """Return [class_name, line] pairs for the top-level classes defined in a file."""
+    try:
+        with open(filepath, "rb") as f:
+            tree = ast.parse(f.read(), filename=filepath)
+    except (SyntaxError, ValueError, OSError):
+        # Unparseable files simply contribute no classes
+        return []
+    return [[node.name, node.lineno] for node in tree.body if isinstance(node, ast.ClassDef)]
+
+
+def _module_path_for(rel_path: str) -> str:
+    """
+    Convert a file path relative to the package root to the module_path format
+    used by get_custom_node() (e.g. "nodes/image_nodes.py" -> "nodes/image_nodes").
+    """
+    module_path = rel_path[:-3].replace(os.sep, "/")
+    if module_path.endswith("/__init__"):
+        # import_from_custom_node() resolves "nodes" to nodes/__init__.py
+        module_path = module_path[:-len("/__init__")]
+    return module_path
+
+
+class NodeIndex:
+    """Class name -> location index for all custom node packages."""
+
+    def __init__(self, comfy_root: Optional[str] = None, index_path: Optional[str] = None):
+        """
+        Initialize a node index.
+
+        Args:
+            comfy_root: Path to ComfyUI root. If None, uses get_comfy_root().
+            index_path: Path of the cache file. Defaults to <comfy_root>/.qabbit_node_index.json.
+        """
+        ensure_initialized()
+        self.comfy_root = comfy_root or get_comfy_root()
+        self.custom_nodes_path = os.path.join(self.comfy_root, "custom_nodes")
+        self.index_path = index_path or os.path.join(self.comfy_root, INDEX_FILENAME)
+        # Relative file path -> {"package", "mtime", "size", "classes"}
+        self._files: Dict[str, Dict[str, Any]] = {}
+        # Class name -> list of locations
+        self._classes: Dict[str, List[Dict[str, Any]]] = {}
+
+    def load(self) -> bool:
+        """
+        Load the cached index from disk.
+
+        Returns:
+            True if a compatible cache file was found and loaded
+        """
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION:
+            return False
+        self._files = data.get("files", {})
+        self._rebuild_class_map()
+        return True
+
+    def save(self) -> None:
+        """Write the index to the cache file (atomically)."""
+        tmp_path = f"{self.index_path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": self._files}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _iter_package_files(self, package_name: str):
+        """Yield (relative path, stat result) for each .py file in a package."""
+        package_path = os.path.join(self.custom_nodes_path, package_name)
+        for dirpath, dirnames, filenames in os.walk(package_path):
+            dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS and not d.startswith(".")]
+            for filename in filenames:
+                if not filename.endswith(".py"):
+                    continue
+                filepath = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(filepath)
+                except OSError:
+                    continue
+                yield os.path.relpath(filepath, self.custom_nodes_path), st
+
+    def update(self, packages: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Rescan custom node packages, parsing only new or changed files.
+
+        Args:
+            packages: Package names to scan. If None, scans every package returned by
+                      list_available_custom_nodes(); entries of packages that no longer
+                      exist are dropped.
+
+        Returns:
+            dict with counts of ``parsed``, ``reused`` and ``removed`` files
+        """
+        full_scan = packages is None
+        if full_scan:
+            packages = list_available_custom_nodes()
+        scanned = set(packages)
+
+        stats = {"parsed": 0, "reused": 0, "removed": 0}
+        seen = set()
+        for package_name in packages:
+            for rel_path, st in self._iter_package_files(package_name):
+                seen.add(rel_path)
+                entry = self._files.get(rel_path)
+                if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+                    stats["reused"] += 1
+                    continue
+                self._files[rel_path] = {
+                    "package": package_name,
+                    "mtime": st.st_mtime,
+                    "size": st.st_size,
+                    "classes": _scan_classes(os.path.join(self.custom_nodes_path, rel_path)),
+                }
+                stats["parsed"] += 1
+
+        for rel_path in list(self._files):
+            if rel_path in seen:
+                continue
+            if full_scan or self._files[rel_path]["package"] in scanned:
+                del self._files[rel_path]
+                stats["removed"] += 1
+
+        self._rebuild_class_map()
+        return stats
+
+    def _rebuild_class_map(self) -> None:
+        self._classes = {}
+        for rel_path in sorted(self._files):
+            entry = self._files[rel_path]
+            package_rel = os.path.relpath(rel_path, entry["package"])
+            module_path = _module_path_for(package_rel)
+            for class_name, line in entry["classes"]:
+                self._classes.setdefault(class_name, []).append({
+                    "package": entry["package"],
+                    "module_path": module_path,
+                    "line": line,
+                })
+
+    def find_all(self, class_name: str) -> List[Dict[str, Any]]:
+        """Return every known location of a class (it may be defined in several packages)."""
+        return list(self._classes.get(class_name, []))
+
+    def find(self, class_name: str, package_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find where a class is defined.
+
+        Args:
+            class_name: Name of the class (e.g., "ImageResizeKJv2")
+            package_name: Restrict the lookup to one package (e.g., "ComfyUI-KJNodes")
+
+        Returns:
+            dict with ``package``, ``module_path`` and ``line``, or None if not found
+        """
+        for location in self._classes.get(class_name, []):
+            if package_name is None or location["package"] == package_name:
+                return location
+        return None
+
+    def class_names(self) -> List[str]:
+        """Return all indexed class names."""
+        return sorted(self._classes)
+
+
+# Global index instance
+_index: Optional[NodeIndex] = None
+
+
+def get_node_index(refresh: bool = True) -> NodeIndex:
+    """
+    Get or create the global node index.
+
+    On first use the cache file is loaded and refreshed; the refreshed index is
+    saved back if anything changed.
+
+    Args:
+        refresh: Rescan packages for changed files when creating the index.
+    """
+    global _index
+    if _index is None:
+        index = NodeIndex()
+        index.load()
+        if refresh:
+            _save_if_changed(index, index.update())
+        _index = index
+    return _index
+
+
+def _save_if_changed(index: NodeIndex, stats: Dict[str, int]) -> None:
+    if stats["parsed"] or stats["removed"] or not os.path.exists(index.index_path):
+        try:
+            index.save()
+        except OSError:
+            pass  # Read-only ComfyUI trees still get an in-memory index
+
+
+def find_node(class_name: str, package_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Find where a custom node class is defined, without importing anything.
+
+    Example:
+        >>> find_node("ImageResizeKJv2")
+        {'package': 'ComfyUI-KJNodes', 'module_path': 'nodes/image_nodes', 'line': 1234}
+    """
+    index = get_node_index()
+    location = index.find(class_name, package_name)
+    if location is None:
+        # The class may be in a file added or changed since the index was refreshed
+        _save_if_changed(index, index.update([package_name] if package_name else None))
+        location = index.find(class_name, package_name)
+    return location
+
+
+def get_node_by_name(class_name: str, package_name: Optional[str] = None):
+    """
+    Import a custom node class by name, using the index to locate its module.
+
+    Args:
+        class_name: Name of the class to import
+        package_name: Restrict the lookup to one package
+
+    Returns:
+        The imported class
+    """
+    location = find_node(class_name, package_name)
+    if location is None:
+        raise LookupError(f"Class {class_name} not found in any custom node package")
+    return get_loader().import_from_custom_node(
+        location["package"], location["module_path"], class_name
+    )
@@ -1,10 +1,29 @@
 """
 ComfyUI nodes module - exports all standard ComfyUI nodes.
 
-This module automatically initializes ComfyUI and exports all nodes from ComfyUI's nodes.py.
+This module automatically initializes ComfyUI and exports the nodes of ComfyUI's
+nodes.py and comfy_extras/nodes_*.py. Nothing is imported up front: names are looked up
+in an index of the classes those files define (read from the source, without executing
+it), and the module defining a class is imported the first time the class is accessed
+(PEP 562). Other public names of ComfyUI's nodes.py (NODE_CLASS_MAPPINGS, MAX_RESOLUTION,
+...) are also available and import nodes.py when accessed.
+
+Usage:
+    from qabbit_wrapper.nodes import LoadImage          # imports ComfyUI's nodes.py now
+    from qabbit_wrapper import nodes
+    nodes.ImageStitch                                   # imports comfy_extras.nodes_images now
 """
 
-from .core import init_comfy, ensure_initialized
+import os
+import re
+import sys
+import threading
+import importlib
+from typing import Optional, Dict, List
+
+from .core import init_comfy, ensure_initialized, get_comfy_root
+from .profiler import profile_section
+from .custom_nodes_logic import apply_class_hooks
 
 # Auto-initialize if not already initialized
 try:
@@ -20,12 +39,109 @@ except RuntimeError:
             "Please call qabbit_wrapper.init_comfy() manually."
         )
 
-# Import all nodes from ComfyUI
-try:
-    from nodes import *
-except ImportError as e:
-    raise ImportError(
-        f"Failed to import ComfyUI nodes. Make sure ComfyUI is properly initialized. "
-        f"Error: {e}"
-    )
 
+# Top-level class definitions
+_CLASS_PATTERN = re.compile(rb"^class\s+([A-Za-z_]\w*)\s*[(:]", re.MULTILINE)
+
+# Class name -> module name, built on first lookup
+_index: Optional[Dict[str, str]] = None
+_index_lock = threading.Lock()
+
+
+def _scan_classes(filepath: str) -> List[str]:
+    try:
+        with open(filepath, "rb") as f:
+            source = f.read()
+    except OSError:
+        return []
+    return [name.decode() for name in _CLASS_PATTERN.findall(source)]
+
+
+def _build_index() -> Dict[str, str]:
+    """Map each node class name to the ComfyUI module defining it (nodes.py first)."""
+    comfy_root = get_comfy_root()
+    index: Dict[str, str] = {}
+    extras_path = os.path.join(comfy_root, "comfy_extras")
+    try:
+        extras = sorted(f for f in os.listdir(extras_path) if f.startswith("nodes_") and f.endswith(".py"))
+    except OSError:
+        extras = []
+    for filename in extras:
+        for class_name in _scan_classes(os.path.join(extras_path, filename)):
+            index.setdefault(class_name, f"comfy_extras.{filename[:-3]}")
+    # Names defined in nodes.py take precedence, as with "from nodes import *"
+    for class_name in _scan_classes(os.path.join(comfy_root, "nodes.py")):
+        index[class_name] = "nodes"
+    return index
+
+
+def _get_index() -> Dict[str, str]:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                ensure_initialized()
+                _index = _build_index()
+    return _index
+
+
+def _import(module_name: str):
+    module = sys.modules.get(module_name)
+    if module is None:
+        ensure_initialized()
+        try:
+            with profile_section(module_name):
+                module = importlib.import_module(module_name)
+        except ImportError as e:
+            raise ImportError(
+                f"Failed to import ComfyUI nodes. Make sure ComfyUI is properly initialized. "
+                f"Error: {e}"
+            )
+    return module
+
+
+def _public_names(module) -> List[str]:
+    names = getattr(module, "__all__", None)
+    if names is None:
+        names = [name for name in vars(module) if not name.startswith("_")]
+    return list(names)
+
+
+def __getattr__(name: str):
+    if name == "__all__":
+        # "from qabbit_wrapper.nodes import *" exports everything ComfyUI's nodes.py does
+        return _public_names(_import("nodes"))
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name = _get_index().get(name, "nodes")
+    module = _import(module_name)
+    try:
+        value = getattr(module, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r} "
+                             f"(not found in ComfyUI's {module_name})") from None
+    if isinstance(value, type):
+        value = apply_class_hooks(value)
+    # Later lookups do not go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    names = set(globals()) | set(_get_index())
+    if "nodes" in sys.modules:
+        names.update(_public_names(sys.modules["nodes"]))
+    return sorted(names)
+
+
+def preload(names: Optional[List[str]] = None) -> None:
+    """
+    Import ComfyUI's nodes.py, or the modules defining the given names, now (e.g. in a
+    warm-up step before forking workers).
+    """
+    if names is None:
+        _import("nodes")
+        return
+    for name in names:
+        __getattr__(name)
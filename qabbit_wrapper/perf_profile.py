@@ -0,0 +1,313 @@
+"""
+Performance profile module - device, precision and threading options for headless runs.
+
+ComfyUI reads its performance options (``--cpu``, ``--lowvram``, ``--fp16-unet``,
+``--use-sage-attention``, ``--disable-smart-memory``, ...) from ``comfy.cli_args.args``,
+and ``comfy.model_management`` uses them once, when it is imported. A ``PerfProfile``
+sets those options from Python: ``init_comfy(perf_profile=...)`` applies it to ``args``
+after ``comfy.cli_args`` is imported and before ``comfy.model_management`` is. It also
+sets the torch intra-op / inter-op thread counts and records the effective
+configuration, so the same script can be tuned per host class without code changes:
+
+    - ``init_comfy(perf_profile=PerfProfile(cpu=True, intra_op_threads=16))``
+    - ``init_comfy(perf_profile="cpu")`` for one of the PRESETS
+    - ``QABBIT_PERF_PROFILE=/etc/qabbit/cpu_host.json`` (or a preset name) in the
+      environment, used when init_comfy() gets no profile
+
+Usage:
+    from qabbit_wrapper import init_comfy
+    from qabbit_wrapper.perf_profile import PerfProfile, get_effective_config
+
+    init_comfy("/path/to/ComfyUI", perf_profile=PerfProfile(
+        vram="low", attention="sage", unet_dtype="fp8_e4m3fn", smart_memory=False,
+    ))
+    print(get_effective_config())
+
+Options the installed ComfyUI does not know are skipped and listed under "unsupported"
+in the effective configuration.
+"""
+
+import os
+import sys
+import json
+from typing import Optional, Dict, Any, List, Union
+
+
+PERF_PROFILE_ENV_VAR = "QABBIT_PERF_PROFILE"
+
+# Value -> the args flag that selects it; each group is mutually exclusive
+_VRAM_FLAGS = {
+    "gpu_only": "gpu_only", "high": "highvram", "normal": "normalvram",
+    "low": "lowvram", "none": "novram",
+}
+_ATTENTION_FLAGS = {
+    "pytorch": "use_pytorch_cross_attention", "split": "use_split_cross_attention",
+    "quad": "use_quad_cross_attention", "sage": "use_sage_attention",
+    "flash": "use_flash_attention",
+}
+_UNET_FLAGS = {
+    "fp64": "fp64_unet", "fp32": "fp32_unet", "fp16": "fp16_unet", "bf16": "bf16_unet",
+    "fp8_e4m3fn": "fp8_e4m3fn_unet", "fp8_e5m2": "fp8_e5m2_unet",
+}
+_TEXT_ENCODER_FLAGS = {
+    "fp32": "fp32_text_enc", "fp16": "fp16_text_enc", "bf16": "bf16_text_enc",
+    "fp8_e4m3fn": "fp8_e4m3fn_text_enc", "fp8_e5m2": "fp8_e5m2_text_enc",
+}
+_VAE_FLAGS = {
+    "fp32": "fp32_vae", "fp16": "fp16_vae", "bf16": "bf16_vae", "cpu": "cpu_vae",
+}
+_PRECISION_FLAGS = {"fp16": "force_fp16", "fp32": "force_fp32"}
+
+
+class PerfProfile:
+    """Typed set of ComfyUI performance options applied at init_comfy() time."""
+
+    FIELDS = (
+        "cpu", "vram", "attention", "precision", "unet_dtype", "text_encoder_dtype",
+        "vae_dtype", "smart_memory", "reserve_vram", "deterministic",
+        "intra_op_threads", "inter_op_threads", "mmap_loading", "extra_args",
+    )
+
+    def __init__(self, cpu: bool = False, vram: str = "auto", attention: str = "auto",
+                 precision: str = "auto", unet_dtype: Optional[str] = None,
+                 text_encoder_dtype: Optional[str] = None, vae_dtype: Optional[str] = None,
+                 smart_memory: bool = True, reserve_vram: Optional[float] = None,
+                 deterministic: bool = False, intra_op_threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None, mmap_loading: Optional[bool] = None,
+                 extra_args: Optional[Dict[str, Any]] = None):
+        """
+        Initialize a performance profile. "auto" / None leave ComfyUI's default.
+
+        Args:
+            cpu: Run everything on the CPU (--cpu)
+            vram: "auto", "gpu_only", "high", "normal", "low" or "none" (--lowvram, ...)
+            attention: "auto", "pytorch", "split", "quad", "sage" or "flash"
+            precision: "auto", "fp16" or "fp32" (--force-fp16 / --force-fp32)
+            unet_dtype: Diffusion model weights: "fp64", "fp32", "fp16", "bf16",
+                        "fp8_e4m3fn" or "fp8_e5m2"
+            text_encoder_dtype: "fp32", "fp16", "bf16", "fp8_e4m3fn" or "fp8_e5m2"
+            vae_dtype: "fp32", "fp16", "bf16" or "cpu" (run the VAE on the CPU)
+            smart_memory: False keeps models off the GPU between uses (--disable-smart-memory)
+            reserve_vram: GB of VRAM left for other software (--reserve-vram)
+            deterministic: Use deterministic torch algorithms (--deterministic)
+            intra_op_threads: torch.set_num_threads(); also OMP/MKL_NUM_THREADS if torch
+                              is not imported yet
+            inter_op_threads: torch.set_num_interop_threads()
+            mmap_loading: Memory-map safetensors checkpoints (see qabbit_wrapper.mmap_loading)
+            extra_args: Other ``comfy.cli_args.args`` attributes to set, e.g.
+                        {"fast": ["fp16_accumulation"]}; ``fast`` takes PerformanceFeature
+                        values (strings), converted to the enum when applied
+        """
+        _check_choice("vram", vram, ["auto"] + list(_VRAM_FLAGS))
+        _check_choice("attention", attention, ["auto"] + list(_ATTENTION_FLAGS))
+        _check_choice("precision", precision, ["auto"] + list(_PRECISION_FLAGS))
+        _check_choice("unet_dtype", unet_dtype, [None] + list(_UNET_FLAGS))
+        _check_choice("text_encoder_dtype", text_encoder_dtype, [None] + list(_TEXT_ENCODER_FLAGS))
+        _check_choice("vae_dtype", vae_dtype, [None] + list(_VAE_FLAGS))
+        for name, value in (("intra_op_threads", intra_op_threads), ("inter_op_threads", inter_op_threads)):
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise ValueError(f"{name} must be a positive integer, got {value!r}")
+        if reserve_vram is not None and reserve_vram < 0:
+            raise ValueError(f"reserve_vram must not be negative, got {reserve_vram!r}")
+
+        self.cpu = cpu
+        self.vram = vram
+        self.attention = attention
+        self.precision = precision
+        self.unet_dtype = unet_dtype
+        self.text_encoder_dtype = text_encoder_dtype
+        self.vae_dtype = vae_dtype
+        self.smart_memory = smart_memory
+        self.reserve_vram = reserve_vram
+        self.deterministic = deterministic
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.mmap_loading = mmap_loading
+        self.extra_args = dict(extra_args or {})
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PerfProfile":
+        """Create a profile from a dict (e.g. parsed JSON); unknown keys raise ValueError."""
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown performance profile options: {sorted(unknown)}")
+        return cls(**data)
+
+    @classmethod
+    def load(cls, spec: Union["PerfProfile", Dict[str, Any], str]) -> "PerfProfile":
+        """
+        Resolve a profile given as a PerfProfile, a dict, a preset name or a JSON file path.
+        """
+        if isinstance(spec, PerfProfile):
+            return spec
+        if isinstance(spec, dict):
+            return cls.from_dict(spec)
+        if spec in PRESETS:
+            # A copy, so changing the returned profile does not change the preset
+            return cls.from_dict(PRESETS[spec].to_dict())
+        if os.path.isfile(spec):
+            with open(spec, "r") as f:
+                return cls.from_dict(json.load(f))
+        raise ValueError(f"Unknown performance profile {spec!r}: not a preset ({', '.join(PRESETS)}) or a file")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def to_args(self) -> Dict[str, Any]:
+        """Map the profile to ``comfy.cli_args.args`` attribute values."""
+        values: Dict[str, Any] = {}
+        if self.cpu:
+            values["cpu"] = True
+        for choice, flags in ((self.vram, _VRAM_FLAGS), (self.attention, _ATTENTION_FLAGS),
+                              (self.precision, _PRECISION_FLAGS), (self.unet_dtype, _UNET_FLAGS),
+                              (self.text_encoder_dtype, _TEXT_ENCODER_FLAGS), (self.vae_dtype, _VAE_FLAGS)):
+            if choice not in (None, "auto"):
+                # Clear the other flags of the group, as argparse's exclusive groups would
+                for flag in flags.values():
+                    values[flag] = False
+                values[flags[choice]] = True
+        if not self.smart_memory:
+            values["disable_smart_memory"] = True
+        if self.reserve_vram is not None:
+            values["reserve_vram"] = self.reserve_vram
+        if self.deterministic:
+            values["deterministic"] = True
+        values.update(self.extra_args)
+        return values
+
+    def __repr__(self):
+        changed = ", ".join(
+            f"{name}={value!r}" for name, value in self.to_dict().items()
+            if value != _DEFAULTS.get(name)
+        )
+        return f"PerfProfile({changed})"
+
+
+def _check_choice(name: str, value, choices: list) -> None:
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {choices}, got {value!r}")
+
+
+_DEFAULTS = {
+    "cpu": False, "vram": "auto", "attention": "auto", "precision": "auto", "unet_dtype": None,
+    "text_encoder_dtype": None, "vae_dtype": None, "smart_memory": True, "reserve_vram": None,
+    "deterministic": False, "intra_op_threads": None, "inter_op_threads": None,
+    "mmap_loading": None, "extra_args": {},
+}
+
+PRESETS: Dict[str, PerfProfile] = {
+    # CPU-only host: all cores for intra-op parallelism, one inter-op thread
+    "cpu": PerfProfile(cpu=True, attention="pytorch", intra_op_threads=os.cpu_count() or 1,
+                       inter_op_threads=1, mmap_loading=True),
+    # Small GPUs: stream weights, fp8 diffusion weights, free VRAM between uses
+    "low_vram": PerfProfile(vram="low", unet_dtype="fp8_e4m3fn", smart_memory=False),
+    # Large GPUs: keep everything resident
+    "high_vram": PerfProfile(vram="high"),
+}
+
+
+def perf_profile_requested() -> Optional[str]:
+    """Return QABBIT_PERF_PROFILE (a preset name or JSON file path), if set."""
+    return os.environ.get(PERF_PROFILE_ENV_VAR) or None
+
+
+# Effective configuration of the last applied profile
+_effective: Dict[str, Any] = {}
+
+
+def apply_to_args(profile: PerfProfile, args) -> Dict[str, Any]:
+    """
+    Set the profile's options on ``comfy.cli_args.args`` and the torch thread counts.
+
+    Must run before comfy.model_management is imported, which reads ``args`` once.
+
+    Returns:
+        dict: The effective configuration (also returned by get_effective_config())
+    """
+    applied: Dict[str, Any] = {}
+    unsupported: List[str] = []
+    for name, value in profile.to_args().items():
+        if hasattr(args, name):
+            value = _convert_arg(name, value)
+            setattr(args, name, value)
+            applied[name] = value
+        elif value:
+            # Options of newer ComfyUI versions; clearing a missing flag is a no-op
+            unsupported.append(name)
+
+    warnings: List[str] = []
+    if "comfy.model_management" in sys.modules:
+        warnings.append("comfy.model_management was imported before the profile was applied; "
+                        "device and VRAM options may not take effect")
+    threads = _apply_threads(profile, warnings)
+
+    _effective.clear()
+    _effective.update({
+        "profile": profile.to_dict(),
+        "args": applied,
+        "unsupported": unsupported,
+        "threads": threads,
+        "warnings": warnings,
+    })
+    return get_effective_config()
+
+
+def _convert_arg(name: str, value):
+    """Convert JSON-friendly values of enum-typed arguments (``--fast`` features)."""
+    if name != "fast" or isinstance(value, bool):
+        return value
+    feature = getattr(sys.modules.get("comfy.cli_args"), "PerformanceFeature", None)
+    if feature is None:
+        # Older ComfyUI: --fast is a plain flag
+        return bool(value)
+    if isinstance(value, str):
+        value = [value]
+    try:
+        return {v if isinstance(v, feature) else feature(v) for v in value}
+    except ValueError:
+        raise ValueError(f"fast must list PerformanceFeature values {[f.value for f in feature]}, "
+                         f"got {value!r}") from None
+
+
+def _apply_threads(profile: PerfProfile, warnings: List[str]) -> Dict[str, Any]:
+    if "torch" not in sys.modules and profile.intra_op_threads is not None:
+        # Picked up by the OpenMP / MKL runtimes when torch loads them
+        for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(variable, str(profile.intra_op_threads))
+    try:
+        import torch
+    except ImportError:
+        return {}
+    if profile.intra_op_threads is not None:
+        torch.set_num_threads(profile.intra_op_threads)
+    if profile.inter_op_threads is not None:
+        try:
+            torch.set_num_interop_threads(profile.inter_op_threads)
+        except RuntimeError as e:
+            # Only possible before any inter-op parallel work has started
+            warnings.append(f"inter_op_threads not applied: {e}")
+    return {"intra_op": torch.get_num_threads(), "inter_op": torch.get_num_interop_threads()}
+
+
+def record_runtime(model_management) -> None:
+    """Add what comfy.model_management chose (device, VRAM state) to the effective configuration."""
+    if not _effective:
+        return
+    runtime: Dict[str, Any] = {}
+    try:
+        runtime["device"] = str(model_management.get_torch_device())
+    except Exception:
+        pass
+    vram_state = getattr(model_management, "vram_state", None)
+    if vram_state is not None:
+        runtime["vram_state"] = getattr(vram_state, "name", str(vram_state))
+    _effective["runtime"] = runtime
+
+
+def get_effective_config() -> Dict[str, Any]:
+    """
+    Return the configuration the last init_comfy() profile produced: the profile, the
+    ``args`` values set, unsupported options, torch thread counts and the device /
+    VRAM state model_management chose. Empty if no profile was applied.
+    """
+    return json.loads(json.dumps(_effective, default=str))
@@ -0,0 +1,329 @@
+"""
+Pipeline module - stream frames through node calls in fixed-size chunks.
+
+Instead of loading a whole image directory or video into one tensor, a ``Pipeline`` pulls
+frames from a source in chunks of ``chunk_size`` (IMAGE tensors of shape [B, H, W, C],
+values in 0..1, as ComfyUI uses), passes each chunk through a chain of stages (node
+calls or plain functions) and hands the results to a sink as they are produced. A
+background thread reads ahead into a bounded buffer of ``prefetch`` chunks, so decoding
+overlaps with processing while peak memory stays proportional to
+``chunk_size * (prefetch + 2)`` frames, whatever the input length.
+
+Usage:
+    from qabbit_wrapper.pipeline import Pipeline, frames_from_video, ImageDirectoryWriter
+
+    stats = (
+        Pipeline(frames_from_video("input.mp4", chunk_size=16), prefetch=2)
+        .node(ImageResizeKJv2, width=832, height=480, upscale_method="lanczos",
+              keep_proportion="crop", divisible_by=16)
+        .map(lambda images: images.clamp(0, 1))
+        .run(ImageDirectoryWriter("frames_out"))
+    )
+    print(stats)   # {'chunks': ..., 'frames': ..., 'seconds': ...}
+
+Frame sources and writers need numpy and Pillow (image directories) or OpenCV / PyAV
+(videos); any iterable of chunks can be used as a source and any callable as a sink.
+"""
+
+import os
+import time
+import queue
+import threading
+from typing import Optional, Dict, Any, List, Callable, Iterable, Iterator
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff")
+
+_DONE = object()
+
+
+# ---- sources --------------------------------------------------------------------------
+
+def _to_image_tensor(frames: list):
+    import numpy as np
+    import torch
+
+    return torch.from_numpy(np.stack(frames).astype(np.float32) / 255.0)
+
+
+def _chunked(frames: Iterable, chunk_size: int) -> Iterator:
+    """Group HxWxC uint8 arrays into IMAGE tensors, starting a new chunk on a size change."""
+    chunk: list = []
+    for frame in frames:
+        if chunk and (len(chunk) == chunk_size or frame.shape != chunk[0].shape):
+            yield _to_image_tensor(chunk)
+            chunk = []
+        chunk.append(frame)
+    if chunk:
+        yield _to_image_tensor(chunk)
+
+
+def frames_from_directory(directory: str, chunk_size: int = 16,
+                          extensions: Iterable[str] = IMAGE_EXTENSIONS) -> Iterator:
+    """
+    Yield the images of a directory, in file name order, as IMAGE chunks.
+
+    Args:
+        directory: Directory containing the frames
+        chunk_size: Frames per chunk (smaller when the image size changes)
+        extensions: File extensions to include
+    """
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    extensions = tuple(e.lower() for e in extensions)
+    names = sorted(n for n in os.listdir(directory) if n.lower().endswith(extensions))
+
+    def frames():
+        for name in names:
+            with Image.open(os.path.join(directory, name)) as image:
+                yield np.asarray(ImageOps.exif_transpose(image).convert("RGB"))
+
+    return _chunked(frames(), chunk_size)
+
+
+def frames_from_video(path: str, chunk_size: int = 16, start: int = 0,
+                      max_frames: Optional[int] = None, step: int = 1) -> Iterator:
+    """
+    Yield the frames of a video as IMAGE chunks, decoding only one chunk at a time.
+
+    Args:
+        path: Video file
+        chunk_size: Frames per chunk
+        start: Index of the first frame to yield
+        max_frames: Stop after this many frames
+        step: Keep every ``step``-th frame
+    """
+    def frames():
+        count = 0
+        for index, frame in enumerate(_decode_video(path)):
+            if index < start or (index - start) % step:
+                continue
+            if max_frames is not None and count >= max_frames:
+                return
+            count += 1
+            yield frame
+
+    return _chunked(frames(), chunk_size)
+
+
+def _decode_video(path: str) -> Iterator:
+    """Yield RGB uint8 frames using OpenCV, or PyAV if OpenCV is not installed."""
+    try:
+        import cv2
+    except ImportError:
+        cv2 = None
+    if cv2 is not None:
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            raise FileNotFoundError(f"Cannot open video: {path}")
+        try:
+            while True:
+                ok, frame = capture.read()
+                if not ok:
+                    return
+                yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        finally:
+            capture.release()
+        return
+
+    try:
+        import av
+    except ImportError:
+        raise ImportError("Reading videos requires opencv-python or av (PyAV)")
+    with av.open(path) as container:
+        for frame in container.decode(video=0):
+            yield frame.to_ndarray(format="rgb24")
+
+
+# ---- sinks ----------------------------------------------------------------------------
+
+def _to_uint8_frames(images) -> list:
+    import numpy as np
+
+    array = images.detach().cpu().clamp(0, 1).mul(255).round().byte().numpy()
+    return [np.ascontiguousarray(frame) for frame in array]
+
+
+class ImageDirectoryWriter:
+    """Sink writing each frame of IMAGE chunks as a numbered PNG file."""
+
+    def __init__(self, directory: str, prefix: str = "frame_", start: int = 0):
+        self.directory = directory
+        self.prefix = prefix
+        self.index = start
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, images) -> None:
+        from PIL import Image
+
+        for frame in _to_uint8_frames(images):
+            Image.fromarray(frame).save(os.path.join(self.directory, f"{self.prefix}{self.index:06d}.png"))
+            self.index += 1
+
+
+class VideoWriter:
+    """Sink appending IMAGE chunks to a video file (OpenCV, mp4v codec by default)."""
+
+    def __init__(self, path: str, fps: float = 16.0, fourcc: str = "mp4v"):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self._writer = None
+
+    def __call__(self, images) -> None:
+        import cv2
+
+        for frame in _to_uint8_frames(images):
+            if self._writer is None:
+                height, width = frame.shape[:2]
+                self._writer = cv2.VideoWriter(
+                    self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (width, height)
+                )
+            self._writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+
+# ---- pipeline -------------------------------------------------------------------------
+
+class Pipeline:
+    """A chunk source, a chain of stages and a bounded read-ahead buffer."""
+
+    def __init__(self, source: Iterable, prefetch: int = 2):
+        """
+        Initialize a pipeline.
+
+        Args:
+            source: Iterable of chunks, e.g. frames_from_directory() / frames_from_video()
+            prefetch: Chunks read ahead by the background thread (0 reads in the caller's thread)
+        """
+        self.source = source
+        self.prefetch = prefetch
+        self.stages: List[Callable] = []
+
+    def map(self, function: Callable) -> "Pipeline":
+        """Add a stage: ``function(chunk)`` returns the next chunk."""
+        self.stages.append(function)
+        return self
+
+    def node(self, node_class: type, input: Optional[str] = None, output: int = 0,
+             method: Optional[str] = None, **kwargs) -> "Pipeline":
+        """
+        Add a node call as a stage.
+
+        Args:
+            node_class: Node class (e.g. from get_custom_node())
+            input: Argument receiving the chunk. Defaults to the node's first IMAGE input.
+            output: Index of the node output passed on (e.g. 1 for the MASK of a node
+                    returning (IMAGE, MASK))
+            method: Method to call. Defaults to the class's FUNCTION.
+            **kwargs: Other arguments of the call, the same for every chunk
+        """
+        if input is None:
+            input = _first_image_input(node_class)
+        function = getattr(node_class(), method or node_class.FUNCTION)
+
+        def stage(chunk):
+            result = function(**{input: chunk}, **kwargs)
+            if isinstance(result, dict):
+                result = result.get("result", ())
+            return result[output]
+
+        stage.__name__ = node_class.__name__
+        return self.map(stage)
+
+    def _prefetched(self) -> Iterator:
+        if self.prefetch <= 0:
+            yield from self.source
+            return
+
+        buffer: "queue.Queue" = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read():
+            try:
+                for chunk in self.source:
+                    if not put((True, chunk)):
+                        return
+                put((True, _DONE))
+            except BaseException as e:
+                put((False, e))
+
+        thread = threading.Thread(target=read, name="qabbit-pipeline-prefetch", daemon=True)
+        thread.start()
+        try:
+            while True:
+                ok, item = buffer.get()
+                if not ok:
+                    raise item
+                if item is _DONE:
+                    return
+                yield item
+                # Drop the reference before waiting for the next chunk
+                item = None
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+
+    def __iter__(self) -> Iterator:
+        """Yield each processed chunk."""
+        for chunk in self._prefetched():
+            for stage in self.stages:
+                chunk = stage(chunk)
+            yield chunk
+
+    def run(self, sink: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        Process every chunk, passing each result to ``sink`` as soon as it is ready.
+
+        Args:
+            sink: Callable receiving each processed chunk (e.g. ImageDirectoryWriter);
+                  its ``close()`` is called at the end if it has one
+
+        Returns:
+            dict with ``chunks``, ``frames`` and ``seconds``
+        """
+        start = time.perf_counter()
+        chunks = frames = 0
+        try:
+            for chunk in self:
+                chunks += 1
+                frames += _frame_count(chunk)
+                if sink is not None:
+                    sink(chunk)
+                chunk = None
+        finally:
+            close = getattr(sink, "close", None)
+            if callable(close):
+                close()
+        return {"chunks": chunks, "frames": frames, "seconds": time.perf_counter() - start}
+
+
+def _frame_count(chunk) -> int:
+    """Batch size of an IMAGE/MASK tensor or LATENT dict, else 1."""
+    if isinstance(chunk, dict) and "samples" in chunk:
+        chunk = chunk["samples"]
+    shape = getattr(chunk, "shape", None)
+    return shape[0] if shape else 1
+
+
+def _first_image_input(node_class: type) -> str:
+    spec = node_class.INPUT_TYPES()
+    for section in ("required", "optional"):
+        for name, info in (spec.get(section) or {}).items():
+            if isinstance(info, (list, tuple)) and info and info[0] == "IMAGE":
+                return name
+    raise ValueError(f"{node_class.__name__} has no IMAGE input; pass input=...")
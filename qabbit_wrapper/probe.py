@@ -0,0 +1,338 @@
+"""
+Probe module - inspect custom node packages without executing them.
+
+Node metadata (class names, INPUT_TYPES, RETURN_TYPES, FUNCTION, CATEGORY, ...) and the
+NODE_CLASS_MAPPINGS / NODE_DISPLAY_NAME_MAPPINGS dicts are extracted from the source with
+``ast``; nothing is imported, so probing works on hosts without torch or ComfyUI's
+dependencies and takes milliseconds. When a value is computed at runtime (e.g.
+``INPUT_TYPES`` building its dict from ``folder_paths``), the affected classes can be
+imported in a separate, time-limited subprocess instead.
+
+Usage:
+    from qabbit_wrapper.probe import probe_custom_node
+
+    info = probe_custom_node("ComfyUI-KJNodes", comfy_root="/path/to/ComfyUI", fallback=False)
+    info["nodes"]["ImageResizeKJv2"]["RETURN_TYPES"]   # ['IMAGE', 'INT', 'INT']
+    info["dynamic"]                                    # node -> attributes that need an import
+
+    # Or, with an initialized wrapper
+    kj = CustomNodePackage("ComfyUI-KJNodes")
+    kj.probe("nodes/image_nodes")
+"""
+
+import os
+import ast
+import sys
+import json
+import subprocess
+from typing import Optional, Dict, Any, List
+
+from .core import get_comfy_root
+from .node_index import _SKIP_DIRS, _module_path_for
+
+
+# Class attributes extracted for each node
+NODE_ATTRIBUTES = (
+    "RETURN_TYPES", "RETURN_NAMES", "FUNCTION", "CATEGORY", "OUTPUT_NODE",
+    "DESCRIPTION", "OUTPUT_IS_LIST", "INPUT_IS_LIST", "DEPRECATED", "EXPERIMENTAL",
+)
+
+_MAPPING_NAMES = ("NODE_CLASS_MAPPINGS", "NODE_DISPLAY_NAME_MAPPINGS")
+
+_DYNAMIC = object()
+
+
+def _jsonable(value):
+    """Convert literal values to JSON-compatible ones (tuples become lists)."""
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+def _literal(node):
+    try:
+        return _jsonable(ast.literal_eval(node))
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return _DYNAMIC
+
+
+def _find_package_path(package_name: str, comfy_root: Optional[str]) -> str:
+    comfy_root = comfy_root or get_comfy_root() or os.environ.get("COMFY_ROOT")
+    if not comfy_root:
+        raise ValueError("ComfyUI root directory not set. Please pass comfy_root or call init_comfy() first.")
+    custom_nodes_path = os.path.join(os.path.abspath(comfy_root), "custom_nodes")
+    for candidate in (package_name, package_name.replace("_", "-"), package_name.replace("-", "_")):
+        package_path = os.path.join(custom_nodes_path, candidate)
+        if os.path.isdir(package_path):
+            return package_path
+    raise FileNotFoundError(
+        f"Custom node package not found: {package_name} (searched in {custom_nodes_path})"
+    )
+
+
+def _probe_class(class_node: ast.ClassDef) -> Dict[str, Any]:
+    """Extract node metadata from a class body; unknown values are reported as dynamic."""
+    info: Dict[str, Any] = {"class": class_node.name, "line": class_node.lineno}
+    dynamic: List[str] = []
+    for statement in class_node.body:
+        if isinstance(statement, (ast.Assign, ast.AnnAssign)):
+            targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+            for target in targets:
+                if isinstance(target, ast.Name) and target.id in NODE_ATTRIBUTES and statement.value:
+                    value = _literal(statement.value)
+                    if value is _DYNAMIC:
+                        dynamic.append(target.id)
+                    else:
+                        info[target.id] = value
+        elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)) and statement.name == "INPUT_TYPES":
+            returns = [n for n in ast.walk(statement) if isinstance(n, ast.Return)]
+            value = _literal(returns[0].value) if len(returns) == 1 and returns[0].value else _DYNAMIC
+            if value is _DYNAMIC:
+                dynamic.append("INPUT_TYPES")
+            else:
+                info["INPUT_TYPES"] = value
+    if class_node.bases and ("FUNCTION" not in info or "INPUT_TYPES" not in info):
+        # Attributes may be inherited from a base class
+        dynamic.append("bases")
+    info["dynamic"] = dynamic
+    return info
+
+
+def _sets_node_attributes(info: Dict[str, Any]) -> bool:
+    """True if a probed class defines at least one node attribute itself."""
+    return (any(name in info for name in NODE_ATTRIBUTES + ("INPUT_TYPES",))
+            or any(name != "bases" for name in info["dynamic"]))
+
+
+def _probe_mappings(tree: ast.Module) -> Dict[str, Any]:
+    """Collect NODE_CLASS_MAPPINGS-style dicts built from literals and class names."""
+    mappings: Dict[str, Any] = {name: {} for name in _MAPPING_NAMES}
+    dynamic = set()
+
+    def add_dict(mapping_name: str, dict_node) -> None:
+        if not isinstance(dict_node, ast.Dict):
+            dynamic.add(mapping_name)
+            return
+        for key, value in zip(dict_node.keys, dict_node.values):
+            if not isinstance(key, ast.Constant) or not isinstance(key.value, str):
+                dynamic.add(mapping_name)  # {**other} or computed keys
+                continue
+            if isinstance(value, ast.Name):
+                mappings[mapping_name][key.value] = value.id
+            elif isinstance(value, ast.Constant):
+                mappings[mapping_name][key.value] = value.value
+            else:
+                dynamic.add(mapping_name)
+
+    for statement in tree.body:
+        if isinstance(statement, ast.Assign):
+            for target in statement.targets:
+                if isinstance(target, ast.Name) and target.id in _MAPPING_NAMES:
+                    add_dict(target.id, statement.value)
+                elif (isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name)
+                      and target.value.id in _MAPPING_NAMES):
+                    key = _literal(target.slice)
+                    value = statement.value
+                    if isinstance(key, str) and isinstance(value, (ast.Name, ast.Constant)):
+                        mappings[target.value.id][key] = value.id if isinstance(value, ast.Name) else value.value
+                    else:
+                        dynamic.add(target.value.id)
+        elif (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call)
+              and isinstance(statement.value.func, ast.Attribute)
+              and statement.value.func.attr == "update"
+              and isinstance(statement.value.func.value, ast.Name)
+              and statement.value.func.value.id in _MAPPING_NAMES):
+            args = statement.value.args
+            if len(args) == 1:
+                add_dict(statement.value.func.value.id, args[0])
+            else:
+                dynamic.add(statement.value.func.value.id)
+        elif isinstance(statement, (ast.Import, ast.ImportFrom)):
+            for alias in statement.names:
+                if (alias.asname or alias.name) in _MAPPING_NAMES:
+                    dynamic.add(alias.asname or alias.name)
+    mappings["dynamic"] = sorted(dynamic)
+    return mappings
+
+
+def probe_file(filepath: str) -> Dict[str, Any]:
+    """
+    Statically extract node classes and mappings from one source file.
+
+    Returns:
+        dict with ``classes`` (class name -> metadata of classes defining node
+        attributes), ``subclasses`` (classes with base classes but no node attribute of
+        their own: nodes only if NODE_CLASS_MAPPINGS lists them, otherwise helpers such
+        as nn.Module subclasses or Enums) and ``mappings``
+    """
+    with open(filepath, "rb") as f:
+        tree = ast.parse(f.read(), filename=filepath)
+    classes = {}
+    subclasses = {}
+    for statement in tree.body:
+        if isinstance(statement, ast.ClassDef):
+            info = _probe_class(statement)
+            if _sets_node_attributes(info):
+                classes[statement.name] = info
+            elif info["dynamic"]:
+                subclasses[statement.name] = info
+    return {"classes": classes, "subclasses": subclasses, "mappings": _probe_mappings(tree)}
+
+
+def _iter_module_files(package_path: str, module_path: Optional[str]):
+    if module_path:
+        module_path = module_path[:-3] if module_path.endswith(".py") else module_path
+        for candidate in (module_path + ".py", os.path.join(module_path, "__init__.py")):
+            filepath = os.path.join(package_path, *candidate.split("/"))
+            if os.path.isfile(filepath):
+                yield filepath
+                return
+        raise FileNotFoundError(f"Module file not found: {module_path} in {package_path}")
+    for dirpath, dirnames, filenames in os.walk(package_path):
+        dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS and not d.startswith("."))
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                yield os.path.join(dirpath, filename)
+
+
+def _subprocess_probe(comfy_root: str, package_name: str, targets: Dict[str, List[str]],
+                      timeout: float) -> Dict[str, Any]:
+    """Import the given classes in a child process and report their metadata."""
+    script = f"""
+import sys, json
+sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})
+from qabbit_wrapper.core import init_comfy
+from qabbit_wrapper.custom_nodes_logic import get_loader
+init_comfy({comfy_root!r})
+attributes = {list(NODE_ATTRIBUTES)!r}
+result = {{}}
+for module_path, class_names in {targets!r}.items():
+    for class_name in class_names:
+        try:
+            cls = get_loader().import_from_custom_node({package_name!r}, module_path, class_name)
+            info = {{a: getattr(cls, a) for a in attributes if hasattr(cls, a)}}
+            if hasattr(cls, "INPUT_TYPES"):
+                info["INPUT_TYPES"] = cls.INPUT_TYPES()
+            result[class_name] = info
+        except Exception as e:
+            result[class_name] = {{"error": f"{{type(e).__name__}}: {{e}}"}}
+print("__QABBIT_PROBE__" + json.dumps(result, default=repr))
+"""
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, timeout=timeout,
+            cwd=comfy_root, env={**os.environ, "COMFY_ROOT": ""},
+        )
+    except subprocess.TimeoutExpired:
+        return {"__error__": f"subprocess probe timed out after {timeout} s"}
+    for line in completed.stdout.splitlines():
+        if line.startswith("__QABBIT_PROBE__"):
+            return _jsonable(json.loads(line[len("__QABBIT_PROBE__"):]))
+    return {"__error__": (completed.stderr.strip().splitlines() or ["subprocess probe failed"])[-1]}
+
+
+def probe_custom_node(package_name: str, module_path: Optional[str] = None,
+                      comfy_root: Optional[str] = None, fallback: bool = True,
+                      timeout: float = 120.0) -> Dict[str, Any]:
+    """
+    Extract node metadata from a custom node package without importing it.
+
+    Does not require init_comfy(); only the ComfyUI root path is needed.
+
+    Args:
+        package_name: Name of the package (e.g., "ComfyUI-KJNodes")
+        module_path: Only probe this module (e.g., "nodes/image_nodes"). Defaults to all modules.
+        comfy_root: Path to ComfyUI root. Defaults to get_comfy_root() or $COMFY_ROOT.
+        fallback: Import classes with dynamic metadata in a sandboxed subprocess
+        timeout: Seconds allowed for the subprocess
+
+    Returns:
+        dict with:
+            ``nodes``: node name -> metadata (class, module_path, line, INPUT_TYPES, ...)
+            ``mappings``: merged NODE_CLASS_MAPPINGS / NODE_DISPLAY_NAME_MAPPINGS found statically
+            ``dynamic``: node name -> attributes that could not be extracted statically
+            ``errors``: files or classes that could not be probed
+    """
+    package_path = _find_package_path(package_name, comfy_root)
+    comfy_root = os.path.dirname(os.path.dirname(package_path))
+
+    classes: Dict[str, Dict[str, Any]] = {}
+    subclasses: Dict[str, Dict[str, Any]] = {}
+    class_mappings: Dict[str, str] = {}
+    display_names: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    dynamic_mappings = []
+    for filepath in _iter_module_files(package_path, module_path):
+        rel_path = os.path.relpath(filepath, package_path)
+        try:
+            result = probe_file(filepath)
+        except (SyntaxError, ValueError, OSError) as e:
+            errors[rel_path] = f"{type(e).__name__}: {e}"
+            continue
+        file_module_path = _module_path_for(rel_path)
+        for class_name, info in result["classes"].items():
+            info["module_path"] = file_module_path
+            classes.setdefault(class_name, info)
+        for class_name, info in result["subclasses"].items():
+            info["module_path"] = file_module_path
+            subclasses.setdefault(class_name, info)
+        mappings = result["mappings"]
+        class_mappings.update(mappings["NODE_CLASS_MAPPINGS"])
+        display_names.update(mappings["NODE_DISPLAY_NAME_MAPPINGS"])
+        dynamic_mappings += [f"{rel_path}:{name}" for name in mappings["dynamic"]]
+
+    # Node names come from NODE_CLASS_MAPPINGS where available, class names otherwise.
+    # Classes inheriting every node attribute count only if the mappings list them.
+    # Unmapped classes count only if the mappings are missing or not fully static
+    # (helper classes with node attributes are not nodes when the mappings list them all).
+    nodes: Dict[str, Dict[str, Any]] = {}
+    mapped_classes = set()
+    for node_name, class_name in class_mappings.items():
+        if not isinstance(class_name, str):
+            continue
+        info = classes.get(class_name) or subclasses.get(class_name)
+        if info is not None:
+            nodes[node_name] = dict(info)
+            mapped_classes.add(class_name)
+    if not class_mappings or dynamic_mappings:
+        for class_name, info in classes.items():
+            if class_name not in mapped_classes:
+                nodes[class_name] = dict(info)
+    for node_name, info in nodes.items():
+        if node_name in display_names:
+            info["display_name"] = display_names[node_name]
+
+    dynamic = {name: info.pop("dynamic") for name, info in nodes.items()}
+    dynamic = {name: attrs for name, attrs in dynamic.items() if attrs}
+
+    if fallback and dynamic:
+        targets: Dict[str, List[str]] = {}
+        for node_name in dynamic:
+            info = nodes[node_name]
+            targets.setdefault(info["module_path"], [])
+            if info["class"] not in targets[info["module_path"]]:
+                targets[info["module_path"]].append(info["class"])
+        imported = _subprocess_probe(comfy_root, os.path.basename(package_path), targets, timeout)
+        if "__error__" in imported:
+            errors["subprocess"] = imported["__error__"]
+        else:
+            for node_name in list(dynamic):
+                runtime_info = imported.get(nodes[node_name]["class"], {})
+                if "error" in runtime_info:
+                    errors[node_name] = runtime_info["error"]
+                    continue
+                nodes[node_name].update(runtime_info)
+                del dynamic[node_name]
+
+    return {
+        "package": os.path.basename(package_path),
+        "nodes": nodes,
+        "mappings": {"NODE_CLASS_MAPPINGS": class_mappings, "NODE_DISPLAY_NAME_MAPPINGS": display_names,
+                     "dynamic": dynamic_mappings},
+        "dynamic": dynamic,
+        "errors": errors,
+    }
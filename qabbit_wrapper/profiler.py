@@ -0,0 +1,281 @@
+"""
+Startup profiler module - opt-in instrumentation of ComfyUI and custom node imports.
+
+When enabled, every module executed through the wrapper (the ComfyUI modules imported by
+init_comfy(), the ComfyUI node modules qabbit_wrapper.nodes imports on first access, and
+custom node modules loaded by CustomNodeLoader) is timed, together with all nested
+imports it triggers. For each entry the wall time, CPU time and RSS delta are recorded.
+
+Enable it with ``init_comfy(profile=True)`` or by setting ``QABBIT_PROFILE=1`` before
+initialization. If ``QABBIT_PROFILE_OUTPUT`` is set to a path, a Chrome trace is written
+there (and a text table next to it) when the process exits.
+
+Profiling covers startup only: it stops (removing its ``builtins.__import__`` hook,
+keeping the records) when the first load_nodes() call returns. Scripts that load nodes
+otherwise (get_custom_node(), CustomNodePackage, LazyNodeRegistry) call
+``stop_profiling()`` once they are set up, so imports done later inside node calls are
+neither slowed down nor recorded.
+
+Usage:
+    from qabbit_wrapper import init_comfy
+    from qabbit_wrapper.profiler import get_profiler, stop_profiling
+
+    init_comfy("/path/to/ComfyUI", profile=True)
+    ...
+    stop_profiling()                                        # if load_nodes() is not used
+    print(get_profiler().format_table(limit=30))
+    get_profiler().dump_chrome_trace("startup_trace.json")  # open in chrome://tracing
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import builtins
+import threading
+import importlib.util
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List
+
+
+PROFILE_ENV_VAR = "QABBIT_PROFILE"
+PROFILE_OUTPUT_ENV_VAR = "QABBIT_PROFILE_OUTPUT"
+
+_builtin_import = builtins.__import__
+
+
+try:
+    import psutil
+    _process = psutil.Process()
+
+    def _current_rss() -> int:
+        return _process.memory_info().rss
+except ImportError:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _current_rss() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            return 0
+
+
+class StartupProfiler:
+    """Collects timing records for module execution during startup."""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self.enabled = False
+        # Stop when load_nodes() returns (see enable_profiling())
+        self.stop_after_load = False
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._original_import = None
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def enable(self) -> None:
+        """Start recording, including nested imports done through import statements."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._profiled_import
+
+    def disable(self) -> None:
+        """Stop recording and restore the original import function."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        if builtins.__import__ == self._profiled_import:
+            builtins.__import__ = self._original_import
+        self._original_import = None
+
+    def reset(self) -> None:
+        """Discard all collected records."""
+        with self._lock:
+            self.records = []
+
+    @contextmanager
+    def section(self, name: str, kind: str = "wrapper"):
+        """Record wall time, CPU time and RSS delta of the enclosed block."""
+        stack = self._stack()
+        record = {
+            "name": name,
+            "kind": kind,
+            "depth": len(stack),
+            "parent": stack[-1]["name"] if stack else None,
+            "thread": threading.get_ident(),
+            "start": time.perf_counter() - self._origin,
+            "child_wall": 0.0,
+        }
+        stack.append(record)
+        rss_before = _current_rss()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall"] = time.perf_counter() - wall_before
+            record["cpu"] = time.process_time() - cpu_before
+            record["rss_delta"] = _current_rss() - rss_before
+            stack.pop()
+            if stack:
+                stack[-1]["child_wall"] += record["wall"]
+            record["self_wall"] = record["wall"] - record.pop("child_wall")
+            with self._lock:
+                self.records.append(record)
+
+    def _profiled_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original_import = self._original_import or _builtin_import
+        if not self.enabled:
+            return original_import(name, globals, locals, fromlist, level)
+
+        # Resolve relative imports so the record and the sys.modules check use the full name
+        full_name = name
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            try:
+                full_name = importlib.util.resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                full_name = name
+
+        is_new = full_name not in sys.modules
+        if not is_new and fromlist:
+            # "from package import submodule" may still execute the submodule
+            module = sys.modules[full_name]
+            if hasattr(module, "__path__"):
+                is_new = any(not hasattr(module, item) for item in fromlist if item != "*")
+        if not is_new:
+            return original_import(name, globals, locals, fromlist, level)
+
+        with self.section(full_name, kind="import"):
+            return original_import(name, globals, locals, fromlist, level)
+
+    def summary(self, sort_by: str = "wall") -> List[Dict[str, Any]]:
+        """Return the records sorted by a metric (``wall``, ``self_wall``, ``cpu`` or ``rss_delta``)."""
+        with self._lock:
+            records = list(self.records)
+        return sorted(records, key=lambda r: r[sort_by], reverse=True)
+
+    def format_table(self, sort_by: str = "wall", limit: Optional[int] = None) -> str:
+        """Format the records as a text table sorted by the given metric."""
+        rows = self.summary(sort_by)
+        if limit is not None:
+            rows = rows[:limit]
+        lines = [
+            f"{'wall ms':>10} {'self ms':>10} {'cpu ms':>10} {'rss MB':>9}  {'kind':<7} module",
+            "-" * 78,
+        ]
+        for r in rows:
+            lines.append(
+                f"{r['wall'] * 1000:10.1f} {r['self_wall'] * 1000:10.1f} {r['cpu'] * 1000:10.1f} "
+                f"{r['rss_delta'] / (1024 * 1024):9.1f}  {r['kind']:<7} {'  ' * r['depth']}{r['name']}"
+            )
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Return the records in Chrome trace event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = []
+        with self._lock:
+            records = sorted(self.records, key=lambda r: r["start"])
+        for r in records:
+            events.append({
+                "name": r["name"],
+                "cat": r["kind"],
+                "ph": "X",
+                "ts": r["start"] * 1e6,
+                "dur": r["wall"] * 1e6,
+                "pid": pid,
+                "tid": r["thread"],
+                "args": {
+                    "cpu_ms": r["cpu"] * 1000,
+                    "self_ms": r["self_wall"] * 1000,
+                    "rss_delta_bytes": r["rss_delta"],
+                },
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_chrome_trace(self, path: str) -> None:
+        """Write the records as a Chrome trace JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def dump_table(self, path: Optional[str] = None, sort_by: str = "wall",
+                   limit: Optional[int] = None) -> None:
+        """Write the sorted table to a file, or print it if no path is given."""
+        table = self.format_table(sort_by, limit)
+        if path is None:
+            print(table)
+        else:
+            with open(path, "w") as f:
+                f.write(table + "\n")
+
+
+# Global profiler instance
+_profiler = StartupProfiler()
+_atexit_registered = False
+
+
+def get_profiler() -> StartupProfiler:
+    """Get the global startup profiler."""
+    return _profiler
+
+
+def _dump_on_exit(path: str) -> None:
+    _profiler.dump_chrome_trace(path)
+    _profiler.dump_table(os.path.splitext(path)[0] + ".txt")
+
+
+def enable_profiling(output_path: Optional[str] = None, stop_after_load: bool = True) -> StartupProfiler:
+    """
+    Enable the global startup profiler.
+
+    Args:
+        output_path: If given (or if QABBIT_PROFILE_OUTPUT is set), write a Chrome trace
+                     to this path and a text table next to it when the process exits.
+        stop_after_load: Stop profiling when load_nodes() returns. If False, profiling
+                         runs until stop_profiling() is called.
+    """
+    global _atexit_registered
+    _profiler.stop_after_load = stop_after_load
+    _profiler.enable()
+    output_path = output_path or os.environ.get(PROFILE_OUTPUT_ENV_VAR)
+    if output_path and not _atexit_registered:
+        atexit.register(_dump_on_exit, output_path)
+        _atexit_registered = True
+    return _profiler
+
+
+def stop_profiling() -> None:
+    """Stop the global profiler and remove its import hook; the records are kept."""
+    _profiler.disable()
+
+
+def _startup_finished() -> None:
+    """Called when load_nodes() returns: ends profiling unless it should keep running."""
+    if _profiler.enabled and _profiler.stop_after_load:
+        _profiler.disable()
+
+
+def profiling_requested() -> bool:
+    """Return True if profiling was requested through the QABBIT_PROFILE environment variable."""
+    return os.environ.get(PROFILE_ENV_VAR, "").lower() not in ("", "0", "false", "no")
+
+
+@contextmanager
+def profile_section(name: str, kind: str = "wrapper"):
+    """Time a block with the global profiler; does nothing when profiling is disabled."""
+    if not _profiler.enabled:
+        yield None
+        return
+    with _profiler.section(name, kind) as record:
+        yield record
@@ -0,0 +1,229 @@
+"""
+Startup snapshot module - a lockfile of the resolved node locations for warm starts.
+
+After a successful ``load_nodes()`` run, the snapshot records where everything was found:
+the ComfyUI root, each package's directory and Python alias, and for every class the full
+module name and module file. On the next start the snapshot is validated with one
+``stat`` per recorded file (mtime and size) and the classes are imported straight from
+the recorded files, skipping root auto-detection, the hyphen/underscore package name
+checks, the ``<module>.py`` vs ``<module>/__init__.py`` probing and, when the config is a
+JSON file that has not changed, parsing the config.
+
+If anything is stale (a file changed or disappeared, a different config or ComfyUI root,
+another Python version) or the snapshot cannot be read, ``load_nodes()`` silently falls
+back to normal discovery and rewrites the snapshot.
+
+Usage:
+    from qabbit_wrapper.custom_nodes import load_nodes
+
+    nodes = load_nodes("nodes_config.json", lockfile="nodes_config.lock.json")
+"""
+
+import os
+import sys
+import json
+import hashlib
+import importlib
+from typing import Optional, Dict, Any, List
+
+from . import core
+from .custom_nodes_logic import get_loader, apply_class_hooks
+from .isolation import is_isolated
+
+
+SNAPSHOT_VERSION = 1
+
+
+def _stat_key(path: str) -> Optional[List[int]]:
+    """Return [mtime_ns, size] of a file, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _config_key(config) -> Dict[str, Any]:
+    """
+    Identify a node config: by path and stat for a JSON file (so it is not parsed on
+    warm starts), by content digest for a dict.
+    """
+    if isinstance(config, str):
+        path = os.path.abspath(config)
+        return {"path": path, "stat": _stat_key(path)}
+    data = json.dumps(config, sort_keys=True, default=str).encode()
+    return {"digest": hashlib.sha1(data).hexdigest()}
+
+
+class StartupSnapshot:
+    """Records and replays the resolved module/class map of a load_nodes() config."""
+
+    def __init__(self, path: str):
+        """
+        Initialize a startup snapshot.
+
+        Args:
+            path: Path of the snapshot (lockfile) JSON file
+        """
+        self.path = os.path.abspath(path)
+        # Why the last load() did not use the snapshot, for diagnostics
+        self.stale_reason: Optional[str] = None
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            self.stale_reason = "no snapshot"
+            return None
+        except (OSError, ValueError) as e:
+            self.stale_reason = f"unreadable snapshot: {e}"
+            return None
+        if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+            self.stale_reason = "snapshot version mismatch"
+            return None
+        return data
+
+    def validate(self, config) -> Optional[Dict[str, Any]]:
+        """
+        Check the snapshot against the current config, ComfyUI root and files.
+
+        Args:
+            config (dict or str): The config passed to load_nodes()
+
+        Returns:
+            The snapshot data if it is up to date, else None (see ``stale_reason``)
+        """
+        data = self._read()
+        if data is None:
+            return None
+        if data.get("python") != list(sys.version_info[:2]):
+            self.stale_reason = "different Python version"
+            return None
+        if data.get("config") != _config_key(config):
+            self.stale_reason = "config changed"
+            return None
+        loader = get_loader() if core._INITIALIZED else None
+        comfy_root = loader.comfy_root if loader is not None else None
+        if comfy_root is not None and comfy_root != data.get("comfy_root"):
+            self.stale_reason = "different ComfyUI root"
+            return None
+        if loader is not None and loader.namespace != data.get("namespace"):
+            self.stale_reason = "different environment"
+            return None
+        for package_name in data.get("packages", {}):
+            if is_isolated(package_name):
+                self.stale_reason = f"isolated package: {package_name}"
+                return None
+        for path, key in data.get("files", {}).items():
+            if _stat_key(path) != key:
+                self.stale_reason = f"file changed: {path}"
+                return None
+        self.stale_reason = None
+        return data
+
+    def load(self, config, workers: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Import the config's classes from the recorded locations if the snapshot is valid.
+
+        Initializes ComfyUI from the recorded root if init_comfy() has not been called.
+
+        Args:
+            config (dict or str): The config passed to load_nodes()
+            workers: Number of threads importing packages concurrently, as in load_nodes()
+
+        Returns:
+            dict: Mapping of class names to node classes in config order, or None if the
+            snapshot is stale or a recorded import fails (see ``stale_reason``).
+        """
+        from .custom_nodes import _load_grouped
+
+        data = self.validate(config)
+        if data is None:
+            return None
+
+        if not core._INITIALIZED:
+            core.init_comfy(data["comfy_root"])
+
+        packages = data["packages"]
+        order = []
+        grouped: Dict[str, list] = {}
+        for class_name, package_name, module_name, module_file in data["nodes"]:
+            order.append(class_name)
+            grouped.setdefault(package_name, []).append((class_name, module_name, module_file))
+
+        def load_group(package_name: str, entries: list) -> Dict[str, Any]:
+            package = packages[package_name]
+            loader = get_loader() if package["custom"] else None
+            results: Dict[str, Any] = {}
+            for class_name, module_name, module_file in entries:
+                try:
+                    if loader is not None:
+                        results[class_name] = loader.import_from_file(
+                            package["path"], module_name, module_file, class_name
+                        )
+                    else:
+                        results[class_name] = apply_class_hooks(getattr(importlib.import_module(module_name), class_name))
+                except Exception as e:
+                    results[class_name] = e
+            return results
+
+        try:
+            return _load_grouped(order, grouped, load_group, workers)
+        except Exception as e:
+            self.stale_reason = f"recorded import failed: {e}"
+            return None
+
+    def record(self, config, nodes: Dict[str, Any]) -> None:
+        """
+        Write the snapshot of a successful load_nodes() run (atomically).
+
+        Args:
+            config (dict or str): The config passed to load_nodes()
+            nodes: The classes load_nodes() returned
+        """
+        from .custom_nodes import _read_config, _iter_config_entries
+
+        loader = get_loader()
+        packages: Dict[str, Dict[str, Any]] = {}
+        entries = []
+        files: Dict[str, Optional[List[int]]] = {}
+        for package_name, module_path, class_name, is_custom_pkg in _iter_config_entries(_read_config(config)):
+            if class_name not in nodes:
+                continue
+            if is_custom_pkg and is_isolated(package_name):
+                # Proxies of an isolated package cannot be replayed
+                return
+            if is_custom_pkg:
+                module_name = loader.module_name_for(package_name, module_path)
+                python_package_name = module_name.partition(".")[0]
+                package_path = loader._loaded_packages[python_package_name].__path__[0]
+                packages[package_name] = {"custom": True, "path": package_path}
+            else:
+                module_name = f"{package_name}.{module_path}" if module_path else package_name
+                packages[package_name] = {"custom": False}
+
+            module_file = getattr(sys.modules.get(module_name), "__file__", None)
+            if module_file is None and is_custom_pkg:
+                # Not a regular module file (e.g. namespace package): cannot be replayed
+                return
+            if module_file is not None:
+                module_file = os.path.abspath(module_file)
+                files[module_file] = _stat_key(module_file)
+            entries.append([class_name, package_name, module_name, module_file])
+
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "python": list(sys.version_info[:2]),
+            "comfy_root": loader.comfy_root,
+            "namespace": loader.namespace,
+            "config": _config_key(config),
+            "packages": packages,
+            "nodes": entries,
+            "files": files,
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,624 @@
+"""
+Tracing module - per-call metrics and spans of node executions.
+
+Once enabled, the FUNCTION method of node classes is wrapped (in place, so classes that
+were already handed out are covered too). Every call records its wall time and status;
+a sampled fraction of calls (``sample_rate``, 5% by default) also records:
+
+    - CPU time of the calling thread
+    - process RSS before/after and the peak RSS high-water mark (getrusage)
+    - torch CUDA allocator delta and peak, when CUDA is already initialized
+    - shapes and dtypes of tensor inputs and outputs (IMAGE, MASK, LATENT, ...)
+
+Metrics are exported in the Prometheus text format (call counters and wall time
+histograms over all calls; CPU time and peak memory over the sampled calls) and every
+sampled call is written as an OpenTelemetry-style span (trace/span ids, parent span for
+nested node calls, start/end time in unix nanoseconds, attributes, status) to a
+JSON-lines file. Node calls made inside a sampled call are always sampled.
+
+An unsampled call costs two clock reads and a counter update; a sampled call adds a few
+system calls and the span record (50-200 us on a virtual machine, see
+benchmarks/bench_tracing_overhead.py). At the default rate the overhead stays under 1%
+for nodes running 5 ms or longer; ``sample_rate=1.0`` records every call, e.g. while
+debugging a workflow, at about 1% for 20 ms nodes.
+
+``enable_tracing()`` instruments the classes of the custom node modules already loaded
+and every class the loader returns afterwards (get_custom_node(), load_nodes(),
+LazyNodeRegistry, qabbit_wrapper.nodes). QABBIT_TRACE=1 enables it in init_comfy(),
+with spans written to QABBIT_TRACE_SPANS if set and the sample rate taken from
+QABBIT_TRACE_SAMPLE_RATE.
+
+Usage:
+    from qabbit_wrapper.tracing import enable_tracing, get_tracer
+
+    tracer = enable_tracing(spans_path="spans.jsonl")
+    nodes = load_nodes("nodes_config.json")
+    with tracer.trace("request-42"):          # one trace id for all calls in the block
+        ...
+    tracer.write_prometheus("/var/lib/node_exporter/qabbit.prom")
+    tracer.serve_prometheus(9464)             # or scrape http://host:9464/metrics
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import atexit
+import random
+import inspect
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterable
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .profiler import _current_rss
+
+
+TRACE_ENV_VAR = "QABBIT_TRACE"
+TRACE_SPANS_ENV_VAR = "QABBIT_TRACE_SPANS"
+TRACE_SAMPLE_RATE_ENV_VAR = "QABBIT_TRACE_SAMPLE_RATE"
+
+# Fraction of calls recording CPU time, memory and a span
+DEFAULT_SAMPLE_RATE = 0.05
+
+# Upper bounds (seconds) of the wall time histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Describe at most this many tensors per input / output list
+_MAX_LIST_ITEMS = 4
+
+# The span writer wakes up every _SPAN_FLUSH_INTERVAL seconds, or once this many are queued
+_SPAN_FLUSH_INTERVAL = 1.0
+_SPAN_BATCH = 1024
+
+
+def tracing_requested() -> bool:
+    """Return True if QABBIT_TRACE asks for tracing."""
+    return os.environ.get(TRACE_ENV_VAR, "").lower() in ("1", "true", "yes")
+
+
+# Kilobytes on Linux, bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+_RUSAGE_THREAD = getattr(resource, "RUSAGE_THREAD", None)
+
+
+def _thread_usage():
+    """
+    (CPU seconds of the calling thread, peak RSS of the process in bytes).
+
+    On Linux one getrusage(RUSAGE_THREAD) call returns both (ru_maxrss is the process's
+    high-water mark), which keeps the per-call syscalls down.
+    """
+    if _RUSAGE_THREAD is not None:
+        usage = resource.getrusage(_RUSAGE_THREAD)
+        return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * _MAXRSS_UNIT
+    if resource is None:
+        return time.thread_time(), 0
+    return time.thread_time(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+_statm_fd: Optional[int] = None
+_statm_pid: Optional[int] = None
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss() -> int:
+    """
+    Current RSS in bytes.
+
+    On Linux /proc/self/statm stays open and is re-read with pread(), which is several
+    times cheaper than opening it on every call (profiler._current_rss).
+    """
+    global _statm_fd, _statm_pid
+    pid = os.getpid()
+    if _statm_pid != pid:
+        # /proc/self is resolved at open time, so a forked child needs its own descriptor
+        try:
+            _statm_fd = os.open("/proc/self/statm", os.O_RDONLY)
+        except (OSError, AttributeError):
+            _statm_fd = None
+        _statm_pid = pid
+    if _statm_fd is None:
+        return _current_rss()
+    try:
+        return int(os.pread(_statm_fd, 64, 0).split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _cuda_allocator():
+    """torch.cuda if CUDA is initialized (never initializes it), else None."""
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return None
+    try:
+        return torch.cuda if torch.cuda.is_initialized() else None
+    except Exception:
+        return None
+
+
+def describe_value(value) -> Optional[Any]:
+    """Shape/dtype of a tensor, LATENT dict or list of tensors; None for other values."""
+    shape = getattr(value, "shape", None)
+    if shape is not None and hasattr(value, "dtype"):
+        return {"shape": list(shape), "dtype": str(value.dtype)}
+    if isinstance(value, dict) and "samples" in value:
+        return describe_value(value["samples"])
+    if isinstance(value, (list, tuple)) and value:
+        described = [describe_value(item) for item in value[:_MAX_LIST_ITEMS]]
+        if any(d is not None for d in described):
+            return described
+    return None
+
+
+def _current_node_id() -> Optional[str]:
+    server_module = sys.modules.get("server")
+    instance = getattr(getattr(server_module, "PromptServer", None), "instance", None)
+    return getattr(instance, "last_node_id", None)
+
+
+class _NodeMetrics:
+    """Aggregated metrics of one node class."""
+
+    __slots__ = ("calls", "errors", "sampled", "wall_sum", "cpu_sum", "bucket_counts", "rss_peak",
+                 "allocated_peak")
+
+    def __init__(self, buckets: int):
+        self.calls = 0
+        self.errors = 0
+        self.sampled = 0
+        self.wall_sum = 0.0
+        self.cpu_sum = 0.0
+        self.bucket_counts = [0] * (buckets + 1)
+        self.rss_peak = 0
+        self.allocated_peak = 0
+
+
+class Tracer:
+    """Records node calls as metrics and spans."""
+
+    def __init__(self, spans_path: Optional[str] = None, buckets: Iterable[float] = DEFAULT_BUCKETS,
+                 record_shapes: bool = True, sample_rate: float = DEFAULT_SAMPLE_RATE):
+        """
+        Initialize a tracer.
+
+        Args:
+            spans_path: JSON-lines file receiving one span per sampled call (appended).
+                        None keeps no spans, only metrics.
+            buckets: Upper bounds of the wall time histogram, in seconds
+            record_shapes: Describe tensor inputs/outputs in spans
+            sample_rate: Fraction of calls recording CPU time, memory and a span
+                         (1.0: every call)
+        """
+        self.spans_path = spans_path
+        self.buckets = tuple(sorted(buckets))
+        self.record_shapes = record_shapes
+        self.sample_rate = sample_rate
+        self.enabled = False
+        self._metrics: Dict[str, _NodeMetrics] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Spans are serialized and written by a background thread, off the call path
+        self._spans: deque = deque()
+        self._spans_file = None
+        self._file_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        # Original FUNCTION attribute of each instrumented class (None: inherited)
+        self._instrumented: Dict[type, Any] = {}
+
+    # ---- instrumentation ------------------------------------------------------------
+
+    def instrument(self, node_class: type) -> type:
+        """
+        Wrap a node class's FUNCTION method in place; returns the class.
+
+        Classes whose method is already wrapped are left as they are; a class updated by
+        hot reload (which replaces the wrapper with the new method) is wrapped again.
+        """
+        function_name = getattr(node_class, "FUNCTION", None)
+        if not isinstance(function_name, str):
+            return node_class
+        # The raw class attribute (possibly inherited), so classmethods and staticmethods
+        # (e.g. V3 io.ComfyNode.execute) are wrapped as such
+        try:
+            raw = inspect.getattr_static(node_class, function_name)
+        except AttributeError:
+            return node_class
+        kind = type(raw) if isinstance(raw, (classmethod, staticmethod)) else None
+        original = raw.__func__ if kind is not None else raw
+        if not inspect.isfunction(original) or getattr(original, "__qabbit_traced__", False):
+            return node_class
+        tracer = self
+        name = node_class.__name__
+
+        @functools.wraps(original)
+        def traced(*args, **kwargs):
+            if not tracer.enabled:
+                return original(*args, **kwargs)
+            return tracer._call(name, function_name, original, args, kwargs)
+
+        traced.__qabbit_traced__ = True
+        with self._lock:
+            self._instrumented[node_class] = node_class.__dict__.get(function_name)
+        setattr(node_class, function_name, kind(traced) if kind is not None else traced)
+        return node_class
+
+    def instrument_all(self, node_classes) -> None:
+        """Instrument every class of a mapping (e.g. load_nodes() result) or iterable."""
+        classes = node_classes.values() if isinstance(node_classes, dict) else node_classes
+        for node_class in classes:
+            if isinstance(node_class, type):
+                self.instrument(node_class)
+
+    def uninstrument_all(self) -> None:
+        """Restore the original methods of all instrumented classes."""
+        with self._lock:
+            instrumented, self._instrumented = self._instrumented, {}
+        for node_class, original in instrumented.items():
+            function_name = node_class.FUNCTION
+            if original is None:
+                try:
+                    delattr(node_class, function_name)
+                except AttributeError:
+                    pass
+            else:
+                setattr(node_class, function_name, original)
+
+    # ---- recording ------------------------------------------------------------------
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def trace(self, name: Optional[str] = None):
+        """Give every node call in the block (in this thread) one trace id."""
+        previous = getattr(self._local, "trace_id", None)
+        self._local.trace_id = f"{random.getrandbits(128):032x}"
+        self._local.trace_name = name
+        try:
+            yield self._local.trace_id
+        finally:
+            self._local.trace_id = previous
+            self._local.trace_name = None
+
+    def _call(self, name: str, method: str, function, args, kwargs):
+        stack = getattr(self._local, "stack", None)
+        if not stack and random.random() >= self.sample_rate:
+            # Unsampled: wall time and status only
+            wall_before = time.perf_counter()
+            failed = True
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                wall = time.perf_counter() - wall_before
+                with self._lock:
+                    self._record_call(name, wall, failed)
+        return self._sampled_call(name, method, function, args, kwargs)
+
+    def _sampled_call(self, name: str, method: str, function, args, kwargs):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        trace_id = getattr(self._local, "trace_id", None) or (parent[0] if parent else f"{random.getrandbits(128):032x}")
+        span_id = f"{random.getrandbits(64):016x}"
+        stack.append((trace_id, span_id))
+
+        cuda = _cuda_allocator()
+        allocated_before = 0
+        if cuda is not None:
+            allocated_before = cuda.memory_allocated()
+            cuda.reset_peak_memory_stats()
+        rss_before = _rss()
+        cpu_before, _ = _thread_usage()
+        start_ns = time.time_ns()
+        wall_before = time.perf_counter()
+        error = None
+        try:
+            result = function(*args, **kwargs)
+            return result
+        except BaseException as e:
+            error = e
+            result = None
+            raise
+        finally:
+            wall = time.perf_counter() - wall_before
+            end_ns = start_ns + int(wall * 1e9)
+            cpu_after, rss_peak = _thread_usage()
+            cpu = cpu_after - cpu_before
+            rss_after = _rss()
+            # ru_maxrss is only updated periodically by the kernel
+            rss_peak = max(rss_peak, rss_after)
+            allocated_delta = allocated_peak = None
+            if cuda is not None:
+                allocated_delta = cuda.memory_allocated() - allocated_before
+                allocated_peak = cuda.max_memory_allocated()
+            stack.pop()
+
+            self._record_metrics(name, wall, cpu, rss_peak, allocated_peak, error is not None)
+            if self.spans_path is not None:
+                attributes: Dict[str, Any] = {
+                    "node.class": name,
+                    "node.method": method,
+                    "cpu_seconds": cpu,
+                    "rss_before_bytes": rss_before,
+                    "rss_delta_bytes": rss_after - rss_before,
+                    "rss_peak_bytes": rss_peak,
+                }
+                node_id = _current_node_id()
+                if node_id is not None:
+                    attributes["comfy.node_id"] = node_id
+                trace_name = getattr(self._local, "trace_name", None)
+                if trace_name is not None:
+                    attributes["trace.name"] = trace_name
+                if allocated_delta is not None:
+                    attributes["torch.cuda.allocated_delta_bytes"] = allocated_delta
+                    attributes["torch.cuda.allocated_peak_bytes"] = allocated_peak
+                if self.record_shapes:
+                    inputs = {k: d for k, d in ((k, describe_value(v)) for k, v in kwargs.items()) if d is not None}
+                    if inputs:
+                        attributes["inputs"] = inputs
+                    outputs = result.get("result") if isinstance(result, dict) else result
+                    described = describe_value(outputs) if isinstance(outputs, (list, tuple)) else None
+                    if described:
+                        attributes["outputs"] = described
+                self._write_span({
+                    "trace_id": trace_id,
+                    "span_id": span_id,
+                    "parent_span_id": parent[1] if parent else None,
+                    "name": f"{name}.{method}",
+                    "kind": "INTERNAL",
+                    "start_time_unix_nano": start_ns,
+                    "end_time_unix_nano": end_ns,
+                    "attributes": attributes,
+                    "status": {"code": "ERROR", "message": repr(error)} if error is not None else {"code": "OK"},
+                })
+
+    def _record_call(self, name: str, wall: float, failed: bool) -> _NodeMetrics:
+        """Count a call in its class's metrics; the caller holds self._lock."""
+        bucket = bisect.bisect_left(self.buckets, wall)
+        metrics = self._metrics.get(name)
+        if metrics is None:
+            metrics = self._metrics[name] = _NodeMetrics(len(self.buckets))
+        metrics.calls += 1
+        metrics.errors += failed
+        metrics.wall_sum += wall
+        metrics.bucket_counts[bucket] += 1
+        return metrics
+
+    def _record_metrics(self, name: str, wall: float, cpu: float, rss_peak: int,
+                        allocated_peak: Optional[int], failed: bool) -> None:
+        with self._lock:
+            metrics = self._record_call(name, wall, failed)
+            metrics.sampled += 1
+            metrics.cpu_sum += cpu
+            metrics.rss_peak = max(metrics.rss_peak, rss_peak)
+            if allocated_peak is not None:
+                metrics.allocated_peak = max(metrics.allocated_peak, allocated_peak)
+
+    def _write_span(self, span: Dict[str, Any]) -> None:
+        self._spans.append(span)
+        writer = self._writer
+        # Also restarts the writer in a forked child, where the thread does not exist
+        if writer is None or not writer.is_alive():
+            with self._lock:
+                if self._writer is writer:
+                    self._writer = threading.Thread(target=self._write_loop, name="qabbit-spans", daemon=True)
+                    self._writer.start()
+        if len(self._spans) >= _SPAN_BATCH:
+            self._wakeup.set()
+
+    def _write_loop(self) -> None:
+        while True:
+            self._wakeup.wait(_SPAN_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write queued spans to the spans file."""
+        with self._file_lock:
+            if not self._spans:
+                return
+            if self._spans_file is None or self._spans_file.closed:
+                directory = os.path.dirname(os.path.abspath(self.spans_path))
+                os.makedirs(directory, exist_ok=True)
+                self._spans_file = open(self.spans_path, "a", buffering=1 << 16)
+            while self._spans:
+                self._spans_file.write(json.dumps(self._spans.popleft(), default=str) + "\n")
+            self._spans_file.flush()
+
+    def close(self) -> None:
+        """Write queued spans and close the spans file."""
+        self.flush()
+        with self._file_lock:
+            if self._spans_file is not None:
+                self._spans_file.close()
+                self._spans_file = None
+
+    # ---- export ---------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per node class: calls, errors, wall seconds, and over the sampled calls: CPU
+        seconds, peak RSS and CUDA allocation.
+        """
+        with self._lock:
+            return {
+                name: {
+                    "calls": m.calls, "errors": m.errors, "wall_seconds": m.wall_sum,
+                    "sampled_calls": m.sampled, "cpu_seconds": m.cpu_sum, "rss_peak_bytes": m.rss_peak,
+                    "cuda_allocated_peak_bytes": m.allocated_peak,
+                }
+                for name, m in self._metrics.items()
+            }
+
+    def prometheus_text(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+            snapshot = [(name, m.calls, m.errors, m.wall_sum, m.cpu_sum, list(m.bucket_counts),
+                         m.sampled, m.rss_peak, m.allocated_peak) for name, m in metrics]
+
+        def label(name: str) -> str:
+            return name.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        lines = [
+            "# HELP qabbit_node_calls_total Node calls, by node class and status.",
+            "# TYPE qabbit_node_calls_total counter",
+        ]
+        for name, calls, errors, *_ in snapshot:
+            lines.append(f'qabbit_node_calls_total{{node="{label(name)}",status="ok"}} {calls - errors}')
+            lines.append(f'qabbit_node_calls_total{{node="{label(name)}",status="error"}} {errors}')
+        lines += [
+            "# HELP qabbit_node_call_seconds Wall time of node calls.",
+            "# TYPE qabbit_node_call_seconds histogram",
+        ]
+        for name, calls, _, wall_sum, _, bucket_counts, *_ in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, bucket_counts):
+                cumulative += count
+                lines.append(f'qabbit_node_call_seconds_bucket{{node="{label(name)}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'qabbit_node_call_seconds_bucket{{node="{label(name)}",le="+Inf"}} {calls}')
+            lines.append(f'qabbit_node_call_seconds_sum{{node="{label(name)}"}} {wall_sum:.6f}')
+            lines.append(f'qabbit_node_call_seconds_count{{node="{label(name)}"}} {calls}')
+        lines += [
+            "# HELP qabbit_node_sampled_calls_total Node calls that recorded CPU time, memory and a span.",
+            "# TYPE qabbit_node_sampled_calls_total counter",
+        ]
+        for name, *_, sampled, _, _ in snapshot:
+            lines.append(f'qabbit_node_sampled_calls_total{{node="{label(name)}"}} {sampled}')
+        lines += [
+            "# HELP qabbit_node_cpu_seconds_total CPU time of the calling thread during sampled node calls.",
+            "# TYPE qabbit_node_cpu_seconds_total counter",
+        ]
+        for name, _, _, _, cpu_sum, *_ in snapshot:
+            lines.append(f'qabbit_node_cpu_seconds_total{{node="{label(name)}"}} {cpu_sum:.6f}')
+        lines += [
+            "# HELP qabbit_node_rss_peak_bytes Process peak RSS at the end of the node's sampled calls.",
+            "# TYPE qabbit_node_rss_peak_bytes gauge",
+        ]
+        for name, *_, rss_peak, _ in snapshot:
+            lines.append(f'qabbit_node_rss_peak_bytes{{node="{label(name)}"}} {rss_peak}')
+        if any(allocated for *_, allocated in snapshot):
+            lines += [
+                "# HELP qabbit_node_cuda_allocated_peak_bytes Peak torch CUDA allocation during the node's sampled calls.",
+                "# TYPE qabbit_node_cuda_allocated_peak_bytes gauge",
+            ]
+            for name, *_, allocated in snapshot:
+                lines.append(f'qabbit_node_cuda_allocated_peak_bytes{{node="{label(name)}"}} {allocated}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the metrics atomically (e.g. for node_exporter's textfile collector)."""
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def serve_prometheus(self, port: int, host: str = "0.0.0.0"):
+        """
+        Serve the metrics on http://host:port/metrics from a daemon thread.
+
+        Returns:
+            The HTTPServer; call ``shutdown()`` to stop it.
+        """
+        from http.server import HTTPServer, BaseHTTPRequestHandler
+
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = tracer.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="qabbit-metrics", daemon=True).start()
+        return server
+
+
+# Global tracer instance
+_tracer = Tracer()
+_atexit_registered = False
+
+
+def get_tracer() -> Tracer:
+    """Get the global tracer."""
+    return _tracer
+
+
+def _instrument_loaded_classes(tracer: Tracer) -> None:
+    """Instrument the classes of already loaded custom node modules and ComfyUI's nodes.py."""
+    from .import_finder import get_custom_node_finder
+
+    # Package aliases of every loader (the global one and those of environments)
+    finder = get_custom_node_finder()
+    for module_name, module in list(sys.modules.items()):
+        if module is None:
+            continue
+        root, dot, _ = module_name.partition(".")
+        if not (module_name == "nodes" or (dot and finder.is_registered(root))):
+            continue
+        mappings = getattr(module, "NODE_CLASS_MAPPINGS", None)
+        if isinstance(mappings, dict):
+            tracer.instrument_all(mappings)
+
+
+def enable_tracing(spans_path: Optional[str] = None, **options) -> Tracer:
+    """
+    Enable the global tracer and instrument loaded and future node classes.
+
+    Args:
+        spans_path: JSON-lines file for spans (default: QABBIT_TRACE_SPANS, or no spans)
+        **options: Other Tracer settings (buckets, record_shapes, sample_rate). The sample
+                   rate defaults to QABBIT_TRACE_SAMPLE_RATE if set.
+
+    Returns:
+        Tracer: the global tracer
+    """
+    from .custom_nodes_logic import add_class_hook
+
+    global _atexit_registered
+    _tracer.spans_path = spans_path or os.environ.get(TRACE_SPANS_ENV_VAR) or _tracer.spans_path
+    if "buckets" in options:
+        _tracer.buckets = tuple(sorted(options["buckets"]))
+    if "record_shapes" in options:
+        _tracer.record_shapes = options["record_shapes"]
+    if "sample_rate" in options:
+        _tracer.sample_rate = options["sample_rate"]
+    elif os.environ.get(TRACE_SAMPLE_RATE_ENV_VAR):
+        _tracer.sample_rate = float(os.environ[TRACE_SAMPLE_RATE_ENV_VAR])
+    _tracer.enabled = True
+    add_class_hook(_tracer.instrument)
+    _instrument_loaded_classes(_tracer)
+    if not _atexit_registered:
+        atexit.register(_tracer.close)
+        _atexit_registered = True
+    return _tracer
+
+
+def disable_tracing() -> None:
+    """Stop recording and restore the original node methods."""
+    from .custom_nodes_logic import remove_class_hook
+
+    _tracer.enabled = False
+    remove_class_hook(_tracer.instrument)
+    _tracer.uninstrument_all()
+    _tracer.flush()
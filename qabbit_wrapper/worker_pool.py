@@ -0,0 +1,366 @@
+"""
+Worker pool module - run node calls in processes forked from a pre-initialized template.
+
+A template process is started once; it calls init_comfy(), imports ComfyUI's core nodes
+and loads the requested custom nodes. Workers are then forked from that template, so each
+of them starts with ComfyUI and every node module already imported. Jobs sent to the pool
+("call ImageResizeKJv2().resize(**kwargs)") run in one of these warm workers.
+
+Usage:
+    from qabbit_wrapper.worker_pool import WarmWorkerPool
+
+    with WarmWorkerPool("/path/to/ComfyUI", "nodes_config.json", processes=4,
+                        max_jobs_per_worker=100) as pool:
+        future = pool.submit("ImageResizeKJv2", {"image": image, "width": 512, ...})
+        resized, = future.result()
+        results = pool.map("WanVideoTextEncode", [kwargs_a, kwargs_b])
+
+Notes:
+    - Forking needs a POSIX platform. Elsewhere each worker is spawned and initializes
+      itself once (still reused across jobs, but not shared).
+    - The template only imports modules; it never runs nodes, so no torch thread pools
+      exist at fork time.
+    - Arguments and results are pickled between processes.
+    - A job whose worker dies (OOM kill, crash in a native extension) fails with a
+      RuntimeError; the pool replaces the worker.
+"""
+
+import os
+import time
+import queue
+import pickle
+import weakref
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List
+
+from .core import get_comfy_root
+
+
+# Set in the template process and inherited by forked workers
+_node_classes: Dict[str, Any] = {}
+_result_queue = None
+# (job id, worker pid) of started jobs; a SimpleQueue writes to its pipe synchronously,
+# so the parent learns the pid even if the worker dies right after
+_started_queue = None
+
+# Sent after None once every submitted job has an outcome
+_TERMINATE = "terminate"
+
+
+def _warm_up(comfy_root: str, nodes_config: Optional[dict], core_nodes: bool) -> Dict[str, Any]:
+    """Initialize ComfyUI and import the requested node set in the current process."""
+    from .core import init_comfy
+    init_comfy(comfy_root)
+    if core_nodes:
+        from . import nodes
+        nodes.preload()
+    if nodes_config:
+        from .custom_nodes import load_nodes
+        return load_nodes(nodes_config)
+    return {}
+
+
+def _resolve_class(class_name: str):
+    if class_name in _node_classes:
+        return _node_classes[class_name]
+    import nodes
+    if hasattr(nodes, class_name):
+        return getattr(nodes, class_name)
+    mappings = getattr(nodes, "NODE_CLASS_MAPPINGS", {})
+    if class_name in mappings:
+        return mappings[class_name]
+    raise KeyError(f"Node {class_name} was not loaded in the worker pool")
+
+
+def _picklable_exception(exc: BaseException) -> BaseException:
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:
+        return RuntimeError("".join(traceback.format_exception(type(exc), exc, exc.__traceback__)))
+
+
+def _run_job(job_id: int, class_name: str, method: Optional[str], kwargs: Dict[str, Any]) -> None:
+    """Run one node call in a worker and send the outcome straight to the parent."""
+    # Tell the parent which worker runs the job, so it can fail the job if the worker dies
+    _started_queue.put((job_id, os.getpid()))
+    try:
+        node_class = _resolve_class(class_name)
+        function = getattr(node_class(), method or node_class.FUNCTION)
+        outcome = (job_id, True, function(**kwargs))
+    except BaseException as e:
+        outcome = (job_id, False, _picklable_exception(e))
+    try:
+        _result_queue.put(outcome)
+    except Exception as e:
+        # Unpicklable result
+        _result_queue.put((job_id, False, _picklable_exception(e)))
+
+
+def _init_spawned_worker(comfy_root, nodes_config, core_nodes, result_queue, started_queue) -> None:
+    global _node_classes, _result_queue, _started_queue
+    _node_classes = _warm_up(comfy_root, nodes_config, core_nodes)
+    _result_queue = result_queue
+    _started_queue = started_queue
+
+
+def _template_main(comfy_root, nodes_config, core_nodes, processes, max_jobs_per_worker,
+                   request_queue, result_queue, started_queue, ready_conn) -> None:
+    """Entry point of the template process."""
+    global _node_classes, _result_queue, _started_queue
+    # The template never writes to the result queue itself: a queue whose feeder thread
+    # was started before fork() does not deliver items put by the forked workers
+    _result_queue = result_queue
+    _started_queue = started_queue
+
+    try:
+        if "fork" in multiprocessing.get_all_start_methods():
+            _node_classes = _warm_up(comfy_root, nodes_config, core_nodes)
+            pool = multiprocessing.get_context("fork").Pool(
+                processes, maxtasksperchild=max_jobs_per_worker
+            )
+        else:
+            pool = multiprocessing.get_context("spawn").Pool(
+                processes,
+                initializer=_init_spawned_worker,
+                initargs=(comfy_root, nodes_config, core_nodes, result_queue, started_queue),
+                maxtasksperchild=max_jobs_per_worker,
+            )
+    except BaseException as e:
+        ready_conn.send((False, _picklable_exception(e)))
+        return
+    ready_conn.send((True, os.getpid()))
+    ready_conn.close()
+
+    while True:
+        job = request_queue.get()
+        if job is None:
+            break
+        pool.apply_async(_run_job, job)
+
+    # Queued jobs run to completion; the parent says when they all have an outcome.
+    # pool.join() alone would wait forever for a job lost with a killed worker.
+    pool.close()
+    while request_queue.get() != _TERMINATE:
+        pass
+    pool.terminate()
+    pool.join()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _shutdown_template(request_queue, template, timeout: Optional[float] = None) -> None:
+    """Ask the template to stop its workers and exit; terminate it if it does not."""
+    if template.is_alive():
+        request_queue.put(None)
+        request_queue.put(_TERMINATE)
+        template.join(timeout)
+    if template.is_alive():
+        template.terminate()
+        template.join()
+
+
+class WarmWorkerPool:
+    """A process pool whose workers start with ComfyUI and the node set already loaded."""
+
+    def __init__(
+        self,
+        comfy_root: Optional[str] = None,
+        nodes_config=None,
+        processes: Optional[int] = None,
+        max_jobs_per_worker: Optional[int] = None,
+        core_nodes: bool = True,
+        start_timeout: Optional[float] = None,
+    ):
+        """
+        Start the template process and its workers.
+
+        Args:
+            comfy_root: Path to ComfyUI root. If None, uses get_comfy_root().
+            nodes_config (dict or str): load_nodes() config of the custom nodes to preload.
+            processes: Number of workers (defaults to os.cpu_count()).
+            max_jobs_per_worker: Replace a worker with a fresh fork from the template after
+                                 this many jobs, to bound memory growth. None means never.
+            core_nodes: Also preload ComfyUI's core nodes (``from nodes import *``).
+            start_timeout: Seconds to wait for the template to finish warming up.
+        """
+        comfy_root = comfy_root or get_comfy_root()
+        if comfy_root is None:
+            raise ValueError("ComfyUI root directory not set. Please pass comfy_root or call init_comfy() first.")
+        if nodes_config is not None:
+            from .custom_nodes import _read_config
+            nodes_config = _read_config(nodes_config)
+
+        ctx = multiprocessing.get_context("spawn")
+        self._request_queue = ctx.Queue()
+        self._result_queue = ctx.Queue()
+        self._started_queue = ctx.SimpleQueue()
+        ready_recv, ready_send = ctx.Pipe(duplex=False)
+        self._template = ctx.Process(
+            target=_template_main,
+            args=(os.path.abspath(comfy_root), nodes_config, core_nodes, processes,
+                  max_jobs_per_worker, self._request_queue, self._result_queue,
+                  self._started_queue, ready_send),
+        )
+        self._template.start()
+        ready_send.close()
+        # Daemonic processes cannot have children, so make sure the template is stopped
+        # at interpreter exit even if close() is never called
+        self._finalizer = weakref.finalize(self, _shutdown_template, self._request_queue, self._template)
+
+        ok, value = self._wait_until_ready(ready_recv, start_timeout)
+        ready_recv.close()
+        if not ok:
+            self._finalizer()
+            raise RuntimeError(f"Worker pool template failed to initialize: {value}") from value
+
+        self._futures: Dict[int, Future] = {}
+        # job id -> pid of the worker running it
+        self._job_pids: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._next_job_id = 0
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+    def _wait_until_ready(self, ready_conn, timeout: Optional[float]):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not ready_conn.poll(1.0):
+            if not self._template.is_alive():
+                return False, RuntimeError(f"template exited with code {self._template.exitcode}")
+            if deadline is not None and time.monotonic() > deadline:
+                return False, TimeoutError(f"template not ready after {timeout} s")
+        try:
+            return ready_conn.recv()
+        except EOFError:
+            return False, RuntimeError("template exited during initialization")
+
+    def _collect_results(self) -> None:
+        next_check = time.monotonic() + 1.0
+        suspects: set = set()
+        while True:
+            self._drain_started()
+            if time.monotonic() >= next_check:
+                suspects = self._check_workers(suspects)
+                next_check = time.monotonic() + 1.0
+            try:
+                job_id, ok, value = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not self._template.is_alive():
+                    self._fail_pending(RuntimeError("Worker pool template process exited"))
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            if job_id is None:
+                return
+            with self._lock:
+                self._job_pids.pop(job_id, None)
+                future = self._futures.pop(job_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _drain_started(self) -> None:
+        """Record which worker runs each started job."""
+        while not self._started_queue.empty():
+            job_id, pid = self._started_queue.get()
+            with self._lock:
+                if job_id in self._futures:
+                    self._job_pids[job_id] = pid
+
+    def _check_workers(self, suspects: set) -> set:
+        """
+        Fail the jobs whose worker process has died.
+
+        A job is failed on the check after the one that first found its worker gone, so
+        a result the worker sent just before exiting is collected first. Returns the
+        jobs whose worker is gone, for the next check.
+        """
+        with self._lock:
+            running = list(self._job_pids.items())
+        gone = {job_id for job_id, pid in running if not _pid_alive(pid)}
+        for job_id in gone & suspects:
+            with self._lock:
+                pid = self._job_pids.pop(job_id, None)
+                future = self._futures.pop(job_id, None)
+            if future is not None:
+                future.set_exception(RuntimeError(
+                    f"Worker process {pid} exited before returning the result of job {job_id}"
+                ))
+        return gone - suspects
+
+    def _fail_pending(self, exc: BaseException) -> None:
+        with self._lock:
+            futures, self._futures = self._futures, {}
+            self._job_pids.clear()
+        for future in futures.values():
+            future.set_exception(exc)
+
+    def submit(self, class_name: str, kwargs: Optional[Dict[str, Any]] = None,
+               method: Optional[str] = None) -> Future:
+        """
+        Run a node call in a warm worker.
+
+        Args:
+            class_name: Name of a preloaded node class (e.g., "ImageResizeKJv2")
+            kwargs: Keyword arguments for the node method
+            method: Method to call. Defaults to the class's FUNCTION.
+
+        Returns:
+            concurrent.futures.Future resolving to the method's return value
+        """
+        if self._closed:
+            raise RuntimeError("Cannot submit to a closed worker pool")
+        future: Future = Future()
+        with self._lock:
+            job_id = self._next_job_id
+            self._next_job_id += 1
+            self._futures[job_id] = future
+        self._request_queue.put((job_id, class_name, method, kwargs or {}))
+        return future
+
+    def map(self, class_name: str, kwargs_list: List[Dict[str, Any]],
+            method: Optional[str] = None, timeout: Optional[float] = None) -> List[Any]:
+        """Run one node call per kwargs dict and return the results in order."""
+        futures = [self.submit(class_name, kwargs, method) for kwargs in kwargs_list]
+        return [future.result(timeout) for future in futures]
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Finish queued jobs, then stop the workers and the template process."""
+        if self._closed:
+            return
+        self._closed = True
+        self._request_queue.put(None)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Results (and failures of jobs whose worker died) arrive through the collector
+        while self._template.is_alive() and (deadline is None or time.monotonic() < deadline):
+            with self._lock:
+                if not self._futures:
+                    break
+            time.sleep(0.05)
+        _shutdown_template(self._request_queue, self._template, 10.0)
+        self._finalizer.detach()
+        self._result_queue.put((None, True, None))
+        self._collector.join()
+        self._fail_pending(RuntimeError("Worker pool closed before the job finished"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,102 @@
+"""Tests for qabbit_wrapper.graph caching."""
+
+import math
+
+from qabbit_wrapper.graph import Graph, GraphExecutor
+
+
+class Box:
+    """Input object without content hashing (compared by identity)."""
+
+    def __init__(self, n):
+        self.n = n
+
+
+class Unbox:
+    FUNCTION = "run"
+    RETURN_TYPES = ("INT",)
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {"required": {"box": ("*",)}}
+
+    def run(self, box):
+        return (box.n,)
+
+
+class AddOne:
+    FUNCTION = "run"
+    RETURN_TYPES = ("INT",)
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {"required": {"value": ("INT",)}}
+
+    def run(self, value):
+        return (value + 1,)
+
+
+def test_fresh_object_inputs_rerun_each_time():
+    executor = GraphExecutor()
+    for n in range(5):
+        graph = Graph()
+        graph.add(Unbox, box=Box(n))
+        outputs = executor.run(graph)
+        assert outputs["1"] == (n,)
+        assert executor.last_run["executed"] == ["1"]
+        del graph, outputs
+
+
+def test_same_object_input_is_cached():
+    executor = GraphExecutor()
+    box = Box(3)
+    for _ in range(2):
+        graph = Graph()
+        source = graph.add(Unbox, box=box)
+        graph.add(AddOne, value=source[0])
+        outputs = executor.run(graph)
+    assert outputs["2"] == (4,)
+    assert executor.last_run["cached"] == ["1", "2"]
+
+
+def test_equal_containers_are_cached_by_content():
+    executor = GraphExecutor()
+    for n in (1, 1, 2):
+        prompt = {"1": {"class_type": "AddOne", "inputs": {"value": n}}}
+        executor.node_classes["AddOne"] = AddOne
+        outputs = executor.run(prompt)
+    assert outputs["1"] == (3,)
+    assert executor.last_run["executed"] == ["1"]
+
+
+class Counter:
+    """Source node that always re-runs and returns a new value each time."""
+
+    FUNCTION = "run"
+    RETURN_TYPES = ("INT",)
+
+    def __init__(self):
+        self.count = 0
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {"required": {}}
+
+    @classmethod
+    def IS_CHANGED(cls):
+        return math.nan
+
+    def run(self):
+        self.count += 1
+        return (self.count,)
+
+
+def test_dependents_of_always_changed_node_rerun():
+    executor = GraphExecutor()
+    for expected in (2, 3):
+        graph = Graph()
+        source = graph.add(Counter)
+        graph.add(AddOne, value=source[0])
+        outputs = executor.run(graph)
+        assert outputs["2"] == (expected,)
+        assert executor.last_run["executed"] == ["1", "2"]
@@ -0,0 +1,49 @@
+"""Tests for qabbit_wrapper.hot_reload dependency tracking."""
+
+import os
+import sys
+import importlib
+
+from qabbit_wrapper.hot_reload import HotReloader
+
+
+class _Loader:
+    """Stand-in for CustomNodeLoader with one package loaded."""
+
+    def __init__(self, name):
+        self._loaded_packages = {name: None}
+        self._loaded_modules = {}
+
+    def alias_for(self, name):
+        return name
+
+
+def _write(path, source):
+    with open(path, "w") as f:
+        f.write(source)
+    # Make the change visible to the mtime/size check
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+
+def test_value_import_dependents_are_reloaded(tmp_path, monkeypatch):
+    package = tmp_path / "hr_value_pkg"
+    package.mkdir()
+    _write(package / "__init__.py", "")
+    _write(package / "_helper_0.py", "OFFSET = 1\n")
+    _write(package / "nodes.py", "from ._helper_0 import OFFSET\n\ndef shifted(x):\n    return x + OFFSET\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    try:
+        nodes = importlib.import_module("hr_value_pkg.nodes")
+        assert nodes.shifted(1) == 2
+
+        reloader = HotReloader(_Loader("hr_value_pkg"))
+        reloader.changed_modules()
+        _write(package / "_helper_0.py", "OFFSET = 10\n")
+        reloaded = reloader.reload()
+
+        assert reloaded == ["hr_value_pkg._helper_0", "hr_value_pkg.nodes"]
+        assert sys.modules["hr_value_pkg.nodes"].shifted(1) == 11
+    finally:
+        for name in [name for name in sys.modules if name.startswith("hr_value_pkg")]:
+            del sys.modules[name]
@@ -0,0 +1,52 @@
+"""Tests for qabbit_wrapper.node_cache wrapping."""
+
+from qabbit_wrapper.node_cache import NodeCache
+
+
+class Counter:
+    FUNCTION = "run"
+    calls = 0
+
+    def run(self, x):
+        type(self).calls += 1
+        return (x * 2,)
+
+
+class ClassMethodNode:
+    FUNCTION = "run"
+    calls = 0
+
+    @classmethod
+    def run(cls, x):
+        ClassMethodNode.calls += 1
+        return (cls.__name__, x)
+
+
+class StaticMethodNode:
+    FUNCTION = "run"
+    calls = 0
+
+    @staticmethod
+    def run(x):
+        StaticMethodNode.calls += 1
+        return (x,)
+
+
+def test_instance_method_is_cached():
+    node_class = NodeCache().wrap(Counter)
+    assert node_class().run(x=2) == (4,)
+    assert node_class().run(x=2) == (4,)
+    assert node_class.calls == 1
+
+
+def test_classmethod_and_staticmethod_functions():
+    cache = NodeCache()
+    wrapped = cache.wrap(ClassMethodNode)
+    assert wrapped().run(x=1) == ("ClassMethodNode", 1)
+    assert wrapped.run(x=1) == ("ClassMethodNode", 1)
+    assert ClassMethodNode.calls == 1
+
+    wrapped = cache.wrap(StaticMethodNode)
+    assert wrapped().run(x=5) == (5,)
+    assert wrapped.run(x=5) == (5,)
+    assert StaticMethodNode.calls == 1
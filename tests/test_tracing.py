@@ -0,0 +1,64 @@
+"""Tests for qabbit_wrapper.tracing instrumentation."""
+
+from qabbit_wrapper.tracing import Tracer
+
+
+class Plain:
+    FUNCTION = "run"
+
+    def run(self, x):
+        return (x,)
+
+
+class ClassMethodNode:
+    FUNCTION = "run"
+
+    @classmethod
+    def run(cls, x):
+        return (cls.__name__, x)
+
+
+class StaticMethodNode:
+    FUNCTION = "run"
+
+    @staticmethod
+    def run(x):
+        return (x,)
+
+
+class InheritedClassMethodNode(ClassMethodNode):
+    pass
+
+
+def _tracer():
+    tracer = Tracer(sample_rate=1.0)
+    tracer.enabled = True
+    return tracer
+
+
+def test_method_kinds_keep_their_binding():
+    tracer = _tracer()
+    for node_class in (Plain, ClassMethodNode, StaticMethodNode, InheritedClassMethodNode):
+        tracer.instrument(node_class)
+    try:
+        assert Plain().run(x=1) == (1,)
+        assert ClassMethodNode().run(x=1) == ("ClassMethodNode", 1)
+        assert ClassMethodNode.run(x=2) == ("ClassMethodNode", 2)
+        assert StaticMethodNode().run(x=3) == (3,)
+        assert StaticMethodNode.run(3) == (3,)
+        assert InheritedClassMethodNode().run(x=4) == ("InheritedClassMethodNode", 4)
+        # The subclass shares its base class's wrapper
+        assert tracer.stats()["ClassMethodNode"]["calls"] == 3
+        assert tracer.stats()["StaticMethodNode"]["calls"] == 2
+    finally:
+        tracer.uninstrument_all()
+
+
+def test_uninstrument_restores_descriptors():
+    tracer = _tracer()
+    tracer.instrument(ClassMethodNode)
+    tracer.instrument(InheritedClassMethodNode)
+    tracer.uninstrument_all()
+    assert isinstance(ClassMethodNode.__dict__["run"], classmethod)
+    assert "run" not in InheritedClassMethodNode.__dict__
+    assert ClassMethodNode().run(x=1) == ("ClassMethodNode", 1)